@@ -13,6 +13,11 @@ class Settings(BaseSettings):
     NEO4J_USER: str = ""
     NEO4J_PASSWORD: str = ""
     NEO4J_DATABASE: str = "neo4j"
+    # Alias-mode blue/green reloads (Neo4j Enterprise): two database names, comma
+    # separated. NEO4J_DATABASE must already be an alias for one of them; it is
+    # repointed at the freshly loaded one. Unset, full reloads swap generations
+    # inside NEO4J_DATABASE (works on Community).
+    NEO4J_GENERATIONS: str = ""
     
     # LLMs
     OPENAI_API_KEY: str = ""
@@ -30,6 +35,51 @@ class Settings(BaseSettings):
     EMBEDDINGS_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDINGS_DIMENSION: int = 384
 
+    # Search: "contains" (per-term CONTAINS scan) or "fulltext" (Lucene index)
+    SEARCH_MODE: str = "contains"
+
+    # Streaming Cypher: records pulled per batch, and the hard row cap (0 = no cap)
+    CYPHER_FETCH_SIZE: int = 1000
+    CYPHER_MAX_ROWS: int = 10000
+
+    # LLM-generated Cypher: read transaction timeout (seconds) and the largest
+    # estimated cartesian product the guard lets through
+    CYPHER_TIMEOUT: float = 30.0
+    CYPHER_MAX_ESTIMATED_ROWS: int = 1000000
+
+    # Statement statistics (/api/admin/statements): executions slower than
+    # CYPHER_SLOW_MS go to the slow-query log, which keeps the last
+    # CYPHER_SLOW_LOG_SIZE; at most CYPHER_STATS_MAX_STATEMENTS fingerprints are tracked
+    CYPHER_SLOW_MS: float = 500.0
+    CYPHER_SLOW_LOG_SIZE: int = 100
+    CYPHER_STATS_MAX_STATEMENTS: int = 1000
+
+    # Bulk loader: parallel sessions for load stages, and the initial batch size
+    # (adapted per session to keep each transaction around one second)
+    LOADER_WORKERS: int = 4
+    LOADER_BATCH_SIZE: int = 2000
+
+    # Graph store: "neo4j" (the server above) or "memory" (in-process stand-in
+    # seeded from outcomes.csv, for benchmarks, tests and offline demos)
+    GRAPH_BACKEND: str = "neo4j"
+
+    # Analytics aggregations: "neo4j" (Cypher per request) or "columnar"
+    # (in-process NumPy/pandas projection, reloaded when the data version changes)
+    ANALYTICS_BACKEND: str = "neo4j"
+
+    # Analytics response cache: entries kept in process memory, and the size
+    # bound of the on-disk tier (least recently used entries are evicted)
+    CACHE_MEMORY_ENTRIES: int = 512
+    CACHE_DISK_MAX_MB: int = 256
+    # Warm-up after loads and on startup: parallel computations, and how many
+    # of the most requested views are warmed besides the defaults
+    CACHE_WARM_CONCURRENCY: int = 4
+    CACHE_WARM_TOP_N: int = 20
+
+    # HTTP caching: Cache-Control max-age for ETagged responses (0 = always
+    # revalidate), and the smallest response body that gets compressed
+    HTTP_CACHE_MAX_AGE: int = 0
+    COMPRESSION_MIN_BYTES: int = 1024
 
     class Config:
         # Point directly to the root .env so uvicorn started from backend/ still loads it
@@ -65,6 +115,39 @@ settings = {
         "model": _settings.EMBEDDINGS_MODEL,
         "dimension": _settings.EMBEDDINGS_DIMENSION
     },
+    "search": {
+        "mode": _settings.SEARCH_MODE
+    },
+    "cypher": {
+        "fetch_size": _settings.CYPHER_FETCH_SIZE,
+        "max_rows": _settings.CYPHER_MAX_ROWS,
+        "timeout": _settings.CYPHER_TIMEOUT,
+        "max_estimated_rows": _settings.CYPHER_MAX_ESTIMATED_ROWS,
+        "slow_ms": _settings.CYPHER_SLOW_MS,
+        "slow_log_size": _settings.CYPHER_SLOW_LOG_SIZE,
+        "stats_max_statements": _settings.CYPHER_STATS_MAX_STATEMENTS
+    },
+    "loader": {
+        "workers": _settings.LOADER_WORKERS,
+        "batch_size": _settings.LOADER_BATCH_SIZE
+    },
+    "analytics": {
+        "backend": _settings.ANALYTICS_BACKEND
+    },
+    "cache": {
+        "memory_entries": _settings.CACHE_MEMORY_ENTRIES,
+        "disk_max_bytes": _settings.CACHE_DISK_MAX_MB * 1024 * 1024,
+        "warm_concurrency": _settings.CACHE_WARM_CONCURRENCY,
+        "warm_top_n": _settings.CACHE_WARM_TOP_N
+    },
+    "http": {
+        "max_age": _settings.HTTP_CACHE_MAX_AGE,
+        "compression_min_bytes": _settings.COMPRESSION_MIN_BYTES
+    },
+    "graph": {
+        "backend": _settings.GRAPH_BACKEND,
+        "generations": [name.strip() for name in _settings.NEO4J_GENERATIONS.split(",") if name.strip()]
+    },
     "csv_path": _settings.CSV_PATH,
     "data_dir": _settings.DATA_DIR
 }
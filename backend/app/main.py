@@ -1,8 +1,29 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import analytics, collaboration, graph, query, retrieval
+from app.config import secrets
+from app.routers import admin, analytics, collaboration, graph, query, retrieval
+from app.utils import cache_warmer, graph_backend
+from app.utils.http_cache import add_compression
+from app.utils.metrics import add_metrics
+from app.utils.llm_handler import llm_clients
 
-app = FastAPI(title="Biotech GraphRAG API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One driver pool for the whole app, connected before the first request
+    await graph_backend.startup()
+    # Provider clients and the BioMCP check are built once, not on each NL query
+    await asyncio.to_thread(llm_clients.warm, query.MODEL_NAMES.values(), secrets)
+    # Analytics views are computed in the background; progress in /api/retrieval/status
+    await cache_warmer.startup(retrieval.retrieval_status)
+    yield
+    await cache_warmer.shutdown()
+    await graph_backend.shutdown()
+
+
+app = FastAPI(title="Biotech GraphRAG API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -20,12 +41,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies above COMPRESSION_MIN_BYTES (map and grants payloads are large)
+add_compression(app)
+
+# Prometheus: request latency per route, plus /metrics
+add_metrics(app)
+
 # Include routers
 app.include_router(query.router, prefix="/api/query", tags=["query"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(collaboration.router, prefix="/api/collaboration", tags=["collaboration"])
 app.include_router(graph.router, prefix="/api/graph", tags=["graph"])
 app.include_router(retrieval.router, prefix="/api/retrieval", tags=["retrieval"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 print("DEBUG: Included retrieval router")
 print(f"DEBUG: Routes count: {len(app.routes)}")
 
@@ -33,3 +61,9 @@ print(f"DEBUG: Routes count: {len(app.routes)}")
 @app.get("/")
 async def root():
     return {"message": "Biotech GraphRAG API is running"}
+
+
+@app.get("/api/health/pool")
+async def pool_health():
+    """Neo4j connection pool statistics: in-use / idle connections and acquisition wait"""
+    return graph_backend.pool_stats()
@@ -4,6 +4,7 @@ import logging
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.config import settings
+from app.utils.metrics import StageTimer
 
 # Adjusted imports for the new structure
 from app.retrieval_agent import scraper
@@ -58,9 +59,11 @@ def fetch_data(nhmrc=True, arc=True, save_files=True, progress_callback=None):
         
     nhmrc_dfs = []
     arc_dfs = []
+    stages = StageTimer("retrieval")
 
     # 1. NHMRC Scrape & Process
     if nhmrc:
+        stages.start("nhmrc")
         report_progress("Scraping NHMRC website for data files...")
         logger.info("Starting NHMRC Data Retrieval...")
         url = "https://www.nhmrc.gov.au/funding/data-research/outcomes"
@@ -120,6 +123,7 @@ def fetch_data(nhmrc=True, arc=True, save_files=True, progress_callback=None):
 
     # 2. ARC Data Retrieval
     if arc and arc_retriever:
+        stages.start("arc")
         report_progress("Fetching ARC grants from API...")
         logger.info("Starting ARC Data Retrieval...")
         try:
@@ -144,6 +148,7 @@ def fetch_data(nhmrc=True, arc=True, save_files=True, progress_callback=None):
          logger.warning("arc_retriever module not found, skipping ARC data.")
 
     # 3. Aggregate
+    stages.start("aggregate")
     report_progress("Aggregating and saving data...")
     all_dfs = nhmrc_dfs + arc_dfs
     
@@ -195,6 +200,7 @@ def fetch_data(nhmrc=True, arc=True, save_files=True, progress_callback=None):
             except Exception as e:
                 logger.error(f"Failed to save CSV files: {e}")
                 
+    stages.finish()
     report_progress("Retrieval complete.")
 
     return {
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.utils.statement_stats import StatementStats, statement_stats
+
+router = APIRouter()
+
+
+@router.get("/statements")
+def get_statements(sort_by: str = "total_ms", limit: int = Query(50, ge=1, le=1000)):
+    """Cypher statement statistics per fingerprint, the most expensive first"""
+    if sort_by not in StatementStats.SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(StatementStats.SORT_FIELDS)}")
+    return {
+        **statement_stats.summary(),
+        "statements": statement_stats.statements(sort_by=sort_by, limit=limit),
+    }
+
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int = Query(100, ge=1, le=1000)):
+    """Most recent executions slower than CYPHER_SLOW_MS (parameters redacted to their types)"""
+    return {
+        "slow_ms": statement_stats.slow_ms,
+        "queries": statement_stats.slow_queries(limit=limit),
+    }
+
+
+@router.post("/statements/reset")
+def reset_statements():
+    """Clear the statement statistics and the slow-query log"""
+    statement_stats.reset()
+    return {"status": "reset"}
@@ -1,26 +1,33 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from typing import Optional, List, Dict
-from app.utils.neo4j_handler import Neo4jHandler
+from app.utils.analytics_engine import ColumnarAnalyticsEngine
+from app.utils.graph_backend import get_async_graph_handler, graph_backend
 from app.config import settings
 from app.utils.geocoding import get_institution_coordinates
-from app.utils.cache import get_cache_key, get_cached_data, set_cached_data
+from app.utils.cache import cached
+import time
 
 router = APIRouter()
 
-_handler = None
+_engine = None
 
-def get_neo4j_handler():
-    global _handler
-    if _handler is None:
-        _handler = Neo4jHandler(
-            uri=settings["neo4j"]["uri"],
-            user=settings["neo4j"]["user"],
-            password=settings["neo4j"]["password"],
-            database=settings["neo4j"]["database"]
-        )
-    return _handler
+def get_analytics_backend():
+    """
+    Backend for the stats / institutions / trends / map aggregations:
+    the Neo4j handler, or the in-process columnar engine (ANALYTICS_BACKEND=columnar).
+    Both expose the same coroutines. The in-memory graph backend is already
+    columnar, so it always answers directly.
+    """
+    global _engine
+    if settings["analytics"]["backend"] != "columnar" or graph_backend() == "memory":
+        return get_async_graph_handler()
+    if _engine is None:
+        _engine = ColumnarAnalyticsEngine(get_async_graph_handler())
+    return _engine
 
 @router.get("/stats")
+@cached("stats")
 async def get_stats(
     institution: Optional[str] = None,
     start_year: Optional[int] = None,
@@ -36,9 +43,9 @@ async def get_stats(
     institution_name: Optional[str] = None,
     grant_status: Optional[str] = None,
     application_id: Optional[str] = None,
+    handler=Depends(get_analytics_backend)
 ):
     try:
-        handler = get_neo4j_handler()
         filters = {
             "institution": institution,
             "start_year": start_year,
@@ -57,29 +64,22 @@ async def get_stats(
         # Filter out None values
         filters = {k: v for k, v in filters.items() if v is not None}
         
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("stats", **filters)
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
-
-        stats = handler.get_database_stats(filters=filters)
-        set_cached_data(cache_key, data_version, stats)
+        stats = await handler.get_database_stats(filters=filters)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/schema")
-async def get_schema():
+@cached("schema")
+async def get_schema(handler=Depends(get_async_graph_handler)):
     try:
-        handler = get_neo4j_handler()
-        schema = handler.get_schema()
+        schema = await handler.get_schema()
         return schema
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/institutions")
+@cached("top_institutions")
 async def get_top_institutions(
     limit: int = 10,
     institution: Optional[str] = None,
@@ -96,9 +96,9 @@ async def get_top_institutions(
     institution_name: Optional[str] = None,
     grant_status: Optional[str] = None,
     application_id: Optional[str] = None,
+    handler=Depends(get_analytics_backend)
 ):
     try:
-        handler = get_neo4j_handler()
         filters = {
             "institution": institution,
             "start_year": start_year,
@@ -116,20 +116,13 @@ async def get_top_institutions(
         }
         filters = {k: v for k, v in filters.items() if v is not None}
         
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("top_institutions", limit=limit, **filters)
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
-
-        institutions = handler.get_top_institutions(limit=limit, filters=filters)
-        set_cached_data(cache_key, data_version, institutions)
+        institutions = await handler.get_top_institutions(limit=limit, filters=filters)
         return institutions
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trends")
+@cached("funding_trends")
 async def get_funding_trends(
     start_year_range: int = Query(2000, alias="start_year_min"),
     end_year_range: int = Query(2030, alias="start_year_max"),
@@ -146,9 +139,9 @@ async def get_funding_trends(
     institution_name: Optional[str] = None,
     grant_status: Optional[str] = None,
     application_id: Optional[str] = None,
+    handler=Depends(get_analytics_backend)
 ):
     try:
-        handler = get_neo4j_handler()
         filters = {
             "institution": institution,
             "grant_type": grant_type,
@@ -165,38 +158,68 @@ async def get_funding_trends(
         }
         filters = {k: v for k, v in filters.items() if v is not None}
         
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("funding_trends", start=start_year_range, end=end_year_range, **filters)
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
-
-        trends = handler.get_funding_trends(start_year=start_year_range, end_year=end_year_range, filters=filters)
-        set_cached_data(cache_key, data_version, trends)
+        trends = await handler.get_funding_trends(start_year=start_year_range, end_year=end_year_range, filters=filters)
         return trends
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/filters")
-async def get_filters():
+@cached("filter_options")
+async def get_filters(handler=Depends(get_async_graph_handler)):
     try:
-        handler = get_neo4j_handler()
-        
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("filter_options")
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
-
-        options = handler.get_filter_options()
-        set_cached_data(cache_key, data_version, options)
+        options = await handler.get_filter_options()
         return options
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/facets")
+@cached("facets")
+async def get_facets(
+    institution: Optional[str] = None,
+    start_year: Optional[int] = None,
+    grant_type: Optional[str] = None,
+    broad_research_area: Optional[str] = None,
+    field_of_research: Optional[str] = None,
+    funding_body: Optional[str] = None,
+    search: Optional[str] = None,
+    pi_name: Optional[str] = None,
+    title: Optional[str] = None,
+    description: Optional[str] = None,
+    institution_name: Optional[str] = None,
+    grant_status: Optional[str] = None,
+    application_id: Optional[str] = None,
+    handler=Depends(get_async_graph_handler)
+):
+    """
+    Filter dropdown options for the current filters, with counts:
+    {facet: [{"value", "grant_count", "total_funding"}]}. Options with no
+    matching grants are left out.
+    """
+    try:
+        filters = {
+            "institution": institution,
+            "start_year": start_year,
+            "grant_type": grant_type,
+            "broad_research_area": broad_research_area,
+            "field_of_research": field_of_research,
+            "funding_body": funding_body,
+            "search": search,
+            "pi_name": pi_name,
+            "title": title,
+            "description": description,
+            "institution_name": institution_name,
+            "grant_status": grant_status,
+            "application_id": application_id
+        }
+        filters = {k: v for k, v in filters.items() if v is not None}
+
+        facets = await handler.get_facets(filters=filters)
+        return facets
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/map")
+@cached("map_data")
 async def get_map_data(
     start_year: Optional[int] = None,
     end_year: Optional[int] = None,
@@ -204,14 +227,14 @@ async def get_map_data(
     funding_body: Optional[str] = None,
     institution: Optional[str] = None,
     broad_research_area: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    handler=Depends(get_analytics_backend)
 ):
     """
     Get aggregated data for interactive map.
     Returns list of institutions with stats and coordinates.
     """
     try:
-        handler = get_neo4j_handler()
         
         filters = {
             "start_year": start_year,
@@ -225,14 +248,7 @@ async def get_map_data(
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
         
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("map_data", **filters)
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
-
-        data = handler.get_institution_map_data(filters)
+        data = await handler.get_institution_map_data(filters)
         
         # Enrich with coordinates
         enriched_data = []
@@ -248,12 +264,12 @@ async def get_map_data(
                 # print(f"Missing coords for: {name}")
                 pass
                 
-        set_cached_data(cache_key, data_version, enriched_data)
         return enriched_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/grants")
+@cached("grants")
 async def get_grants(
     limit: int = 50,
     skip: int = 0,
@@ -271,10 +287,16 @@ async def get_grants(
     grant_status: Optional[str] = None,
     application_id: Optional[str] = None,
     sort_by: str = "start_year",
-    order: str = "DESC"
+    order: str = "DESC",
+    cursor: Optional[str] = None,
+    handler=Depends(get_async_graph_handler)
 ):
+    """
+    Paginated grants list. With `skip` this returns a plain list (offset paging).
+    Passing `cursor` (empty for the first page) switches to keyset paging and
+    returns {"items": [...], "next_cursor": ...}.
+    """
     try:
-        handler = get_neo4j_handler()
         filters = {
             "institution": institution,
             "start_year": start_year,
@@ -291,15 +313,145 @@ async def get_grants(
         }
         filters = {k: v for k, v in filters.items() if v is not None}
         
-        # Cache Check
-        data_version = handler.get_data_version()
-        cache_key = get_cache_key("grants", limit=limit, skip=skip, search=search, sort=sort_by, order=order, **filters)
-        cached = get_cached_data(cache_key, data_version)
-        if cached:
-            return cached
+        if cursor is not None:
+            return await handler.get_grants_page(limit=limit, cursor=cursor or None, filters=filters, search=search, sort_by=sort_by, order=order)
+
+        # Columnar fetch + pandas JSON encoder instead of per-value dict building (cached as the encoded body)
+        frame = await handler.get_grants_frame(limit=limit, skip=skip, filters=filters, search=search, sort_by=sort_by, order=order)
+        payload = handler.frame_to_json(frame)
+        return Response(content=payload, media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/grants/export")
+async def export_grants(
+    institution: Optional[str] = None,
+    start_year: Optional[int] = None,
+    grant_type: Optional[str] = None,
+    broad_research_area: Optional[str] = None,
+    field_of_research: Optional[str] = None,
+    funding_body: Optional[str] = None,
+    search: Optional[str] = None,
+    pi_name: Optional[str] = None,
+    title: Optional[str] = None,
+    description: Optional[str] = None,
+    institution_name: Optional[str] = None,
+    grant_status: Optional[str] = None,
+    application_id: Optional[str] = None,
+    sort_by: str = "start_year",
+    order: str = "DESC",
+    format: str = "ndjson",
+    max_rows: Optional[int] = None,
+    handler=Depends(get_async_graph_handler)
+):
+    """
+    Stream every grant matching the filters as NDJSON (default) or JSON.
+    Rows are fetched from Neo4j in batches as the body is written, capped at
+    CYPHER_MAX_ROWS (a smaller `max_rows` may be requested).
+    """
+    if format not in ("ndjson", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'json'")
+    filters = {
+        "institution": institution,
+        "start_year": start_year,
+        "grant_type": grant_type,
+        "broad_research_area": broad_research_area,
+        "field_of_research": field_of_research,
+        "funding_body": funding_body,
+        "pi_name": pi_name,
+        "title": title,
+        "description": description,
+        "institution_name": institution_name,
+        "grant_status": grant_status,
+        "application_id": application_id
+    }
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    row_cap = handler.max_rows
+    if max_rows is not None and max_rows > 0:
+        row_cap = min(max_rows, row_cap) if row_cap else max_rows
+
+    body = handler.stream_grants(filters=filters, search=search, sort_by=sort_by, order=order,
+                                 max_rows=row_cap, fmt=format)
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(body, media_type=media_type)
+
+@router.get("/dashboard")
+@cached("dashboard", timings=True)
+async def get_dashboard(
+    panels: Optional[str] = None,
+    start_year_range: int = Query(2000, alias="start_year_min"),
+    end_year_range: int = Query(2030, alias="start_year_max"),
+    institutions_limit: int = 10,
+    limit: int = 50,
+    skip: int = 0,
+    institution: Optional[str] = None,
+    start_year: Optional[int] = None,
+    grant_type: Optional[str] = None,
+    broad_research_area: Optional[str] = None,
+    field_of_research: Optional[str] = None,
+    funding_body: Optional[str] = None,
+    search: Optional[str] = None,
+    pi_name: Optional[str] = None,
+    title: Optional[str] = None,
+    description: Optional[str] = None,
+    institution_name: Optional[str] = None,
+    grant_status: Optional[str] = None,
+    application_id: Optional[str] = None,
+    sort_by: str = "start_year",
+    order: str = "DESC",
+    handler=Depends(get_async_graph_handler)
+):
+    """
+    Bundle of the stats, institutions, trends, map and grants panels for one
+    filter set, computed in a single Cypher execution.
+    `panels` is an optional comma-separated subset (e.g. "stats,trends").
+    """
+    try:
+        started = time.perf_counter()
+        filters = {
+            "institution": institution,
+            "start_year": start_year,
+            "grant_type": grant_type,
+            "broad_research_area": broad_research_area,
+            "field_of_research": field_of_research,
+            "funding_body": funding_body,
+            "search": search,
+            "pi_name": pi_name,
+            "title": title,
+            "description": description,
+            "institution_name": institution_name,
+            "grant_status": grant_status,
+            "application_id": application_id
+        }
+        filters = {k: v for k, v in filters.items() if v is not None}
+        panel_list = [p.strip() for p in panels.split(",") if p.strip()] if panels else list(handler.DASHBOARD_PANELS)
+
+        data = await handler.get_dashboard_data(
+            filters=filters, panels=panel_list,
+            start_year_min=start_year_range, start_year_max=end_year_range,
+            institutions_limit=institutions_limit, limit=limit, skip=skip,
+            sort_by=sort_by, order=order
+        )
+        timings = data.pop("timings", {})
+
+        if "map" in data:
+            # Enrich with coordinates (same as /map)
+            enrich_started = time.perf_counter()
+            enriched_data = []
+            for item in data["map"]:
+                coords = get_institution_coordinates(item.get("institution_name"))
+                if coords:
+                    item["latitude"] = coords[0]
+                    item["longitude"] = coords[1]
+                    enriched_data.append(item)
+            data["map"] = enriched_data
+            timings["map_enrichment_ms"] = round((time.perf_counter() - enrich_started) * 1000, 2)
 
-        grants = handler.get_grants_list(limit=limit, skip=skip, filters=filters, search=search, sort_by=sort_by, order=order)
-        set_cached_data(cache_key, data_version, grants)
-        return grants
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        data["timings"] = timings
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,23 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from app.utils.neo4j_handler import Neo4jHandler
-from app.config import settings
+from fastapi import APIRouter, Depends, HTTPException
+from app.utils.graph_backend import CypherUnavailableError, get_graph_handler
 
 router = APIRouter()
 
-def get_neo4j_handler():
-    return Neo4jHandler(
-        uri=settings["neo4j"]["uri"],
-        user=settings["neo4j"]["user"],
-        password=settings["neo4j"]["password"],
-        database=settings["neo4j"]["database"]
-    )
-
 @router.get("/researcher/{name}")
-async def get_researcher(name: str):
+def get_researcher(name: str, handler=Depends(get_graph_handler)):
     try:
-        handler = get_neo4j_handler()
-        query = """
-        MATCH (r:Researcher {name: $researcher_name})
+        query = f"""
+        {handler.ACTIVE_GENERATION}
+        MATCH (r:Researcher {{name: $researcher_name}})
+        WHERE generation IS NULL OR r.generation = generation
         OPTIONAL MATCH (r)-[:PRINCIPAL_INVESTIGATOR]->(g:Grant)
         OPTIONAL MATCH (r)-[:AFFILIATED_WITH]->(i:Institution)
         RETURN r.name as researcher_name,
@@ -25,7 +17,7 @@ async def get_researcher(name: str):
                r.department as department,
                r.email as email,
                collect(DISTINCT i.name) as institutions,
-               collect(DISTINCT {
+               collect(DISTINCT {{
                    title: g.title,
                    amount: g.amount,
                    start_date: g.start_date,
@@ -33,11 +25,13 @@ async def get_researcher(name: str):
                    agency: g.agency,
                    description: g.description,
                    plain_description: g.plain_description
-               }) as grants
+               }}) as grants
         """
         results = handler.execute_cypher(query, {"researcher_name": name})
         if not results:
             raise HTTPException(status_code=404, detail="Researcher not found")
         return results[0]
+    except CypherUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
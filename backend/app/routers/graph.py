@@ -1,24 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from app.utils.neo4j_handler import Neo4jHandler
-from app.config import settings
+from fastapi import APIRouter, Depends, HTTPException
+from app.utils.graph_backend import CypherUnavailableError, get_graph_handler
 
 router = APIRouter()
 
-def get_neo4j_handler():
-    return Neo4jHandler(
-        uri=settings["neo4j"]["uri"],
-        user=settings["neo4j"]["user"],
-        password=settings["neo4j"]["password"],
-        database=settings["neo4j"]["database"]
-    )
-
 @router.get("/data")
-async def get_graph_data(limit: int = 100):
+def get_graph_data(limit: int = 100, handler=Depends(get_graph_handler)):
     try:
-        handler = get_neo4j_handler()
         # This is a simplified query, you might want to adapt the logic from graphrag_viz_page.py
         query = f"""
+        {handler.ACTIVE_GENERATION}
         MATCH (n)-[r]->(m)
+        WHERE generation IS NULL OR n.generation = generation
         RETURN n, r, m
         LIMIT {limit}
         """
@@ -55,5 +47,7 @@ async def get_graph_data(limit: int = 100):
             })
             
         return {"nodes": list(nodes.values()), "links": links}
+    except CypherUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,22 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.utils.query_processor import QueryProcessor
-from app.utils.neo4j_handler import Neo4jHandler
+from app.utils.cypher_guard import CypherRejectedError
+from app.utils.graph_backend import CypherUnavailableError, get_graph_handler
 from app.utils.llm_handler import LLMHandler
-from app.config import settings, secrets
+from app.config import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Map frontend model names to backend expected names
+MODEL_NAMES = {
+    "claude-4-5-sonnet": "Claude 4.5 Sonnet",
+    "claude-3-5-sonnet": "Claude 3.5 Sonnet",
+    "gemini-2-0-flash": "Gemini 2.0 Flash",
+    "deepseek-r1": "DeepSeek R1",
+    "deepseek-v3": "DeepSeek V3"
+}
+
 class QueryRequest(BaseModel):
     query: str
     llm_model: str = "claude-4-5-sonnet"
     enable_search: bool = True
 
 @router.post("/")
-def process_query(request: QueryRequest):
+def process_query(request: QueryRequest, neo4j_handler=Depends(get_graph_handler)):
     try:
         logger.info(f"Processing query: {request.query} with model {request.llm_model}")
         
@@ -24,29 +34,9 @@ def process_query(request: QueryRequest):
             logger.error("Secrets not loaded. Please check .env")
             raise HTTPException(status_code=500, detail="Configuration error: Secrets not loaded from .env")
 
-        # Initialize Neo4j Handler
-        try:
-            neo4j_handler = Neo4jHandler(
-                uri=settings["neo4j"]["uri"],
-                user=settings["neo4j"]["user"],
-                password=settings["neo4j"]["password"],
-                database=settings["neo4j"]["database"]
-            )
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {e}")
-            raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
-
-        # Map frontend model names to backend expected names
-        model_map = {
-            "claude-4-5-sonnet": "Claude 4.5 Sonnet",
-            "claude-3-5-sonnet": "Claude 3.5 Sonnet",
-            "gemini-2-0-flash": "Gemini 2.0 Flash",
-            "deepseek-r1": "DeepSeek R1",
-            "deepseek-v3": "DeepSeek V3"
-        }
-        backend_model = model_map.get(request.llm_model, "Claude 4.5 Sonnet")
+        backend_model = MODEL_NAMES.get(request.llm_model, "Claude 4.5 Sonnet")
         
-        # Initialize LLM Handler
+        # Per-request handler over the shared provider client (see LLMClientRegistry)
         try:
             llm_handler = LLMHandler(backend_model, secrets)
         except Exception as e:
@@ -62,6 +52,11 @@ def process_query(request: QueryRequest):
         return result
     except HTTPException:
         raise
+    except CypherRejectedError as e:
+        logger.warning(f"Generated query rejected: {e}")
+        raise HTTPException(status_code=400, detail=f"Query rejected: {e}")
+    except CypherUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
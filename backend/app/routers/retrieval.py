@@ -1,14 +1,17 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from typing import Optional, Dict, Any
 import io
 import pandas as pd
 import json
 import logging
 from app.retrieval_agent.agent import fetch_data
-from app.utils.neo4j_handler import Neo4jHandler
+from app.utils.graph_backend import create_graph_handler, get_graph_handler
 from app.config import settings
 from app.utils.cache import clear_cache
+from app.utils.cache_warmer import schedule_warmup
+from app.utils.metrics import StageTimer
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
 
 
 router = APIRouter()
@@ -17,7 +20,9 @@ logger = logging.getLogger(__name__)
 # Global Status (In-memory for simplicity)
 retrieval_status = {
     "is_running": False,
-    "message": "Ready"
+    "message": "Ready",
+    "last_load": None,
+    "warmup": None
 }
 
 # Temporary storage for fetched data (In-memory dataframe for simplicity, or save/load from file)
@@ -25,13 +30,6 @@ retrieval_status = {
 # We will use the 'outcomes.csv' file that agent saves.
 LATEST_DATA_FILE = "outcomes.csv"
 
-def get_neo4j_handler():
-    return Neo4jHandler(
-        uri=settings['neo4j']['uri'],
-        user=settings['neo4j']['user'],
-        password=settings['neo4j']['password']
-    )
-
 def update_progress(msg: str):
     retrieval_status["message"] = msg
     logger.info(f"Retrieval Progress: {msg}")
@@ -94,27 +92,46 @@ def run_retrieval_task(nhmrc: bool, arc: bool):
     finally:
         retrieval_status["is_running"] = False
 
-def run_neo4j_load_task():
-    """Load data from CSV files into Neo4j database."""
+def run_neo4j_load_task(full: bool = False):
+    """
+    Load data from CSV files into Neo4j database.
+    By default only the grants that changed since the last load are written
+    (see Neo4jHandler.apply_grants_delta); `full` reloads everything as a new
+    blue/green generation, so readers keep the old graph until it is complete.
+    """
     try:
         retrieval_status["is_running"] = True
         update_progress("Starting Neo4j load...")
         
-        handler = get_neo4j_handler()
-        
-        # Clear existing data first
-        update_progress("Clearing existing Neo4j data...")
-        handler.clear_database()
-        logger.info("Neo4j database cleared")
+        # Own handler on the shared driver: a blue/green load retargets its generation
+        # (or, in alias mode, its database) while it runs
+        handler = create_graph_handler()
         
         # Load outcomes.csv
         filepath = os.path.join(settings['data_dir'], "outcomes.csv")
         if os.path.exists(filepath):
-            update_progress("Loading combined grants to Neo4j...")
+            stages = StageTimer("neo4j_load")
+            stages.start("read_csv")
             df = pd.read_csv(filepath)
-            handler.load_grants_from_dataframe(df)
-            clear_cache()
-            logger.info(f"Loaded {len(df)} grants to Neo4j and cleared cache")
+            mode = "delta"
+            if full:
+                mode = "blue_green"
+                stages.start(mode)
+                update_progress("Loading combined grants into the staging generation...")
+                stats = handler.load_grants_blue_green(df, progress_callback=update_progress)
+                stats = {"inserted": stats.pop("grants"), "updated": 0, "deleted": 0, "unchanged": 0, **stats}
+            else:
+                stages.start(mode)
+                update_progress("Applying grant changes to Neo4j...")
+                stats = handler.apply_grants_delta(df, progress_callback=update_progress)
+            stages.finish()
+            retrieval_status["last_load"] = {"mode": mode, **stats, "finished_at": time.time()}
+
+            if full or stats["inserted"] or stats["updated"] or stats["deleted"]:
+                clear_cache()
+                # Recompute the default and most requested views in the background
+                schedule_warmup(retrieval_status)
+            logger.info(f"Neo4j {mode} load finished: {stats}")
 
         else:
             logger.warning(f"{filepath} not found")
@@ -137,12 +154,16 @@ async def start_retrieval(background_tasks: BackgroundTasks):
     return {"message": "Retrieval started"}
 
 @router.post("/load-neo4j")
-async def load_neo4j(background_tasks: BackgroundTasks):
-    """Load data from CSV files into Neo4j database (clears existing data first)."""
+async def load_neo4j(background_tasks: BackgroundTasks, full: bool = False):
+    """
+    Load data from CSV files into Neo4j database. Only changed grants are
+    written unless `full` is set, which reloads everything beside the live
+    graph and switches readers over once it is complete.
+    """
     if retrieval_status["is_running"]:
         raise HTTPException(status_code=409, detail="Task already running")
     
-    background_tasks.add_task(run_neo4j_load_task)
+    background_tasks.add_task(run_neo4j_load_task, full=full)
     return {"message": "Neo4j load started"}
 
 @router.get("/status")
@@ -154,6 +175,7 @@ def get_status():
 @router.get("/data")
 def get_data(
     request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=500),
     search: Optional[str] = "",
@@ -170,6 +192,13 @@ def get_data(
     
     filepath = os.path.join(settings['data_dir'], filename)
 
+    # The page is a function of the file version and the query string
+    if os.path.exists(filepath):
+        stat = os.stat(filepath)
+        etag = make_etag(filepath, stat.st_mtime_ns, stat.st_size, sorted(request.query_params.multi_items()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(cache_headers(etag))
         
     try:
         # Use cached loader
@@ -243,12 +272,10 @@ def get_unique_values(column: str, source: str = Query("combined", regex="^(comb
         return {"values": []}
 
 @router.get("/neo4j_stats")
-def get_neo4j_stats():
+def get_neo4j_stats(handler=Depends(get_graph_handler)):
     """Get stats from the Neo4j graph database."""
     try:
-        handler = get_neo4j_handler()
         stats = handler.get_database_stats()
-        handler.close()
         return {"status": "ok", "stats": stats}
     except Exception as e:
         return {"status": "error", "message": str(e)}
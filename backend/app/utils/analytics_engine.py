@@ -0,0 +1,442 @@
+"""
+In-process columnar analytics engine.
+
+Holds a columnar projection of the Grant nodes (plus their researcher and
+institution links) in NumPy / pandas arrays and answers the /stats,
+/institutions, /trends and /map aggregations from it. Filters are evaluated
+as vectorized boolean masks with the same semantics as
+Neo4jQueryBuilder._build_filter_clause, and results have the same shape as
+the Neo4j handler's, so routers can use either backend.
+
+The projection is reloaded from Neo4j whenever the data version changes.
+Filters it cannot evaluate (e.g. full-text search) fall through to Neo4j.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.neo4j_handler import Neo4jQueryBuilder
+
+
+logger = logging.getLogger(__name__)
+
+
+class GrantProjection:
+    """Columnar snapshot of Grant nodes and their HOSTED_BY / investigator links"""
+
+    # Grant properties matched with toLower(...) CONTAINS toLower(...)
+    TEXT_COLUMNS = ["title", "grant_status", "funding_body", "application_id", "grant_type",
+                    "broad_research_area", "field_of_research", "description"]
+
+    # Grant properties the search filter looks at (besides researchers and institutions)
+    SEARCH_COLUMNS = ["title", "description", "application_id", "field_of_research",
+                      "broad_research_area", "grant_type", "funding_body"]
+
+    # Integer properties matched with equality
+    INT_COLUMNS = ["start_year", "end_year"]
+
+    # Each query keeps to the active load generation (see Neo4jQueryBuilder.GENERATION_LABELS)
+    GRANTS_QUERY = f"""
+    {Neo4jQueryBuilder.ACTIVE_GENERATION}
+    MATCH (g:Grant) WHERE generation IS NULL OR g.generation = generation
+    RETURN g.application_id AS application_id, g.title AS title, g.description AS description,
+           g.grant_status AS grant_status, g.funding_body AS funding_body, g.grant_type AS grant_type,
+           g.broad_research_area AS broad_research_area, g.field_of_research AS field_of_research,
+           g.start_year AS start_year, g.end_year AS end_year, g.amount AS amount
+    """
+    RESEARCHERS_QUERY = f"""
+    {Neo4jQueryBuilder.ACTIVE_GENERATION}
+    MATCH (r:Researcher) WHERE generation IS NULL OR r.generation = generation
+    RETURN r.name AS name
+    """
+    INSTITUTIONS_QUERY = f"""
+    {Neo4jQueryBuilder.ACTIVE_GENERATION}
+    MATCH (i:Institution) WHERE generation IS NULL OR i.generation = generation
+    RETURN i.name AS name
+    """
+    INVESTIGATOR_EDGES_QUERY = f"""
+    {Neo4jQueryBuilder.ACTIVE_GENERATION}
+    MATCH (r:Researcher)-[rel:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant)
+    WHERE generation IS NULL OR g.generation = generation
+    RETURN g.application_id AS grant, r.name AS researcher, type(rel) = 'PRINCIPAL_INVESTIGATOR' AS is_pi
+    """
+    HOSTED_EDGES_QUERY = f"""
+    {Neo4jQueryBuilder.ACTIVE_GENERATION}
+    MATCH (g:Grant)-[:HOSTED_BY]->(i:Institution)
+    WHERE generation IS NULL OR g.generation = generation
+    RETURN g.application_id AS grant, i.name AS institution
+    """
+
+    def __init__(self, grants: Any, researchers: Any, institutions: Any,
+                 investigator_edges: Any, hosted_edges: Any):
+        import numpy as np
+        import pandas as pd
+
+        self.size = len(grants)
+        self.amount = pd.to_numeric(grants["amount"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+        # Integer columns use -1 for missing values (years are positive)
+        self.ints = {
+            col: pd.to_numeric(grants[col], errors="coerce").fillna(-1).to_numpy(dtype="int64")
+            for col in self.INT_COLUMNS
+        }
+
+        # Text as categoricals: a CONTAINS test runs once per distinct value
+        # (against its lower-cased form) and is mapped back through the codes
+        self.text = {}
+        self.text_lower = {}
+        for col in self.TEXT_COLUMNS:
+            values = pd.Categorical(grants[col].map(lambda v: None if pd.isna(v) else str(v)))
+            self.text[col] = values
+            self.text_lower[col] = np.array([v.lower() for v in values.categories], dtype=object)
+
+        # Researchers / institutions are indexed by position; names are unique
+        self.researcher_names = researchers["name"].astype(object).to_numpy()
+        self.researcher_lower = pd.Series(self.researcher_names).map(
+            lambda v: str(v).lower() if v is not None else "").to_numpy(dtype=object)
+        self.institution_names = institutions["name"].astype(object).to_numpy()
+        self.institution_lower = pd.Series(self.institution_names).map(
+            lambda v: str(v).lower() if v is not None else "").to_numpy(dtype=object)
+
+        # Edge arrays (grant position -> researcher / institution position)
+        inv_g = self._positions(grants["application_id"], investigator_edges["grant"])
+        inv_r = self._positions(researchers["name"], investigator_edges["researcher"])
+        keep = (inv_g >= 0) & (inv_r >= 0)
+        self.inv_grant = inv_g[keep]
+        self.inv_researcher = inv_r[keep]
+        self.inv_is_pi = investigator_edges["is_pi"].to_numpy(dtype=bool)[keep]
+
+        host_g = self._positions(grants["application_id"], hosted_edges["grant"])
+        host_i = self._positions(institutions["name"], hosted_edges["institution"])
+        keep = (host_g >= 0) & (host_i >= 0)
+        # Sorted by institution, largest amount first, so per-institution slices
+        # of any grant selection come out already ordered
+        order = np.lexsort((-self.amount[host_g[keep]], host_i[keep]))
+        self.host_grant = host_g[keep][order]
+        self.host_institution = host_i[keep][order]
+
+        # Grant positions sorted by (start_year, amount) for the trend groups and medians
+        self.year_amount_order = np.lexsort((self.amount, self.ints["start_year"]))
+
+        # (grant, institution, researcher) triples for per-institution researcher counts
+        hosted = pd.DataFrame({"grant": self.host_grant, "institution": self.host_institution})
+        investigated = pd.DataFrame({"grant": self.inv_grant, "researcher": self.inv_researcher})
+        triples = hosted.merge(investigated, on="grant")
+        triple_key = (triples["institution"].to_numpy(dtype="int64") * max(len(self.researcher_names), 1)
+                      + triples["researcher"].to_numpy(dtype="int64"))
+        # Sorted by (institution, researcher) key: distinct pairs of a selection are run starts
+        order = np.argsort(triple_key, kind="stable")
+        self.triple_key = triple_key[order]
+        self.triple_grant = triples["grant"].to_numpy()[order]
+
+    @staticmethod
+    def _positions(keys: Any, lookup: Any) -> Any:
+        """Row position of each lookup value in keys (-1 when missing; first row wins)"""
+        import numpy as np
+        import pandas as pd
+
+        usable = keys.notna() & ~keys.duplicated()
+        index = pd.Index(keys[usable])
+        rows = np.flatnonzero(usable.to_numpy())
+        found = index.get_indexer(lookup)
+        return np.where(found >= 0, rows[found], -1) if len(rows) else np.full(len(found), -1)
+
+    def supports(self, filters: Optional[Dict[str, Any]]) -> bool:
+        """Whether every active filter can be evaluated on the projection"""
+        for key, value in (filters or {}).items():
+            if value is None or value == "" or not key.isidentifier():
+                continue
+            if key in ("institution", "institution_name", "start_year", "search"):
+                continue
+            if key in Neo4jQueryBuilder.RESEARCHER_FILTER_KEYS or key in self.text or key in self.ints:
+                continue
+            return False
+        return True
+
+    def _text_contains(self, column: str, needle: str) -> Any:
+        """Grant mask for toLower(g.column) CONTAINS needle (needle already lower-cased)"""
+        import numpy as np
+
+        matched = self._contains(self.text_lower[column], needle)
+        # Code -1 (null) picks the trailing False
+        return np.append(matched, False)[self.text[column].codes]
+
+    def _via_researchers(self, researcher_mask: Any) -> Any:
+        """Grant mask: grants with any investigator in researcher_mask"""
+        import numpy as np
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.inv_grant[researcher_mask[self.inv_researcher]]] = True
+        return mask
+
+    def _via_institutions(self, institution_mask: Any) -> Any:
+        """Grant mask: grants hosted by an institution in institution_mask"""
+        import numpy as np
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.host_grant[institution_mask[self.host_institution]]] = True
+        return mask
+
+    @staticmethod
+    def _contains(names: Any, needle: str) -> Any:
+        """Mask over a lower-cased name array for CONTAINS needle"""
+        import numpy as np
+
+        return np.fromiter((needle in name for name in names), dtype=bool, count=len(names))
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]], search_terms: List[str]) -> Any:
+        """Boolean grant mask equivalent to _build_filter_clause (search pre-split into terms)"""
+        import numpy as np
+
+        mask = np.ones(self.size, dtype=bool)
+        for key, value in (filters or {}).items():
+            if value is None or value == "" or not key.isidentifier():
+                continue
+
+            if key == "institution":
+                mask &= self._via_institutions(self.institution_names == value)
+            elif key == "institution_name":
+                mask &= self._via_institutions(self._contains(self.institution_lower, str(value).lower()))
+            elif key in Neo4jQueryBuilder.RESEARCHER_FILTER_KEYS:
+                mask &= self._via_researchers(self._contains(self.researcher_lower, str(value).lower()))
+            elif key == "search":
+                # Every term must match a grant property, a researcher or the institution
+                for term in search_terms:
+                    term_mask = self._via_researchers(self._contains(self.researcher_lower, term))
+                    term_mask |= self._via_institutions(self._contains(self.institution_lower, term))
+                    for col in self.SEARCH_COLUMNS:
+                        term_mask |= self._text_contains(col, term)
+                    mask &= term_mask
+            elif key in self.text:
+                mask &= self._text_contains(key, str(value).lower())
+            elif key in self.ints:
+                mask &= self.ints[key] == int(value)
+        return mask
+
+    def _distinct_count(self, keys: Any, size: int) -> int:
+        """Number of distinct values in an array of positions < size"""
+        import numpy as np
+
+        if not len(keys):
+            return 0
+        return int(np.count_nonzero(np.bincount(keys, minlength=size)))
+
+    def stats(self, mask: Any, filtered: bool) -> Dict[str, int]:
+        """Same result as get_database_stats"""
+        import numpy as np
+
+        pi_edges = self.inv_is_pi
+        if not filtered:
+            # Unfiltered Neo4j stats count whole labels
+            record = {
+                "stat_grants": self.size,
+                "stat_funding": float(np.nansum(self.amount)),
+                "stat_researchers": len(self.researcher_names),
+                "stat_unique_pi": self._distinct_count(self.inv_researcher[pi_edges], len(self.researcher_names)),
+                "stat_institutions": len(self.institution_names),
+            }
+            return Neo4jQueryBuilder._shape_stats(record)
+
+        inv_selected = mask[self.inv_grant]
+        record = {
+            "stat_grants": int(mask.sum()),
+            "stat_funding": float(np.nansum(self.amount[mask])),
+            "stat_researchers": self._distinct_count(self.inv_researcher[inv_selected], len(self.researcher_names)),
+            "stat_unique_pi": self._distinct_count(self.inv_researcher[inv_selected & pi_edges],
+                                                   len(self.researcher_names)),
+            "stat_institutions": self._distinct_count(self.host_institution[mask[self.host_grant]],
+                                                      len(self.institution_names)),
+        }
+        return Neo4jQueryBuilder._shape_stats(record)
+
+    def _funded(self, mask: Any) -> Any:
+        """mask AND g.amount IS NOT NULL AND g.amount > 0"""
+        import numpy as np
+
+        with np.errstate(invalid="ignore"):
+            return mask & (self.amount > 0)
+
+    def _institution_totals(self, selected: Any) -> tuple:
+        """Per-institution grant count and summed amount over the selected grants"""
+        import numpy as np
+
+        edges = selected[self.host_grant]
+        institutions = self.host_institution[edges]
+        size = len(self.institution_names)
+        counts = np.bincount(institutions, minlength=size)
+        totals = np.bincount(institutions, weights=self.amount[self.host_grant[edges]], minlength=size)
+        return counts, totals
+
+    def top_institutions(self, mask: Any, limit: int) -> List[Dict]:
+        """Same result as get_top_institutions"""
+        import numpy as np
+
+        counts, totals = self._institution_totals(self._funded(mask))
+        candidates = np.flatnonzero(counts)
+        top = candidates[np.argsort(-totals[candidates], kind="stable")][:max(limit, 0)]
+        return [
+            {"institution": self.institution_names[i], "grant_count": int(counts[i]), "total_funding": float(totals[i])}
+            for i in top
+        ]
+
+    def funding_trends(self, mask: Any, start_year: int, end_year: int) -> List[Dict]:
+        """Same result as get_funding_trends (median is percentileCont(0.5))"""
+        import numpy as np
+
+        years = self.ints["start_year"]
+        selected = self._funded(mask) & (years >= start_year) & (years <= end_year)
+        # Walk the presorted order so years and amounts come out sorted
+        rows = self.year_amount_order[selected[self.year_amount_order]]
+        years = years[rows]
+        amounts = self.amount[rows]
+        if not len(years):
+            return []
+
+        unique_years, starts, counts = np.unique(years, return_index=True, return_counts=True)
+        totals = np.add.reduceat(amounts, starts)
+
+        trends = []
+        for year, start, count, total in zip(unique_years, starts, counts, totals):
+            # Amounts are sorted within each year, so the median is a direct lookup
+            mid = start + (count - 1) / 2
+            median = (amounts[int(np.floor(mid))] + amounts[int(np.ceil(mid))]) / 2
+            trends.append({
+                "year": int(year),
+                "grant_count": int(count),
+                "total_funding": float(total),
+                "avg_funding": float(total / count),
+                "median_funding": float(median),
+            })
+        return trends
+
+    def institution_map(self, mask: Any, limit: int = 100) -> List[Dict]:
+        """Same rows as _institution_map_query, before _dedupe_funders"""
+        import numpy as np
+
+        funded = self._funded(mask)
+        counts, totals = self._institution_totals(funded)
+
+        # Distinct researchers per institution over grants that match the filters
+        # and have an amount (the g2 match of the Cypher query)
+        keys = self.triple_key[(mask & ~np.isnan(self.amount))[self.triple_grant]]
+        researcher_count = np.zeros(len(self.institution_names), dtype="int64")
+        if len(keys):
+            pairs = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            researcher_count += np.bincount(pairs // max(len(self.researcher_names), 1),
+                                            minlength=len(self.institution_names))
+
+        candidates = np.flatnonzero((counts > 0) & (researcher_count > 0))
+        top = candidates[np.argsort(-totals[candidates], kind="stable")][:limit]
+        if not len(top):
+            return []
+
+        # Funding bodies of each institution's grants, largest amount first
+        edges = funded[self.host_grant]
+        edge_grants = self.host_grant[edges]
+        edge_institutions = self.host_institution[edges]
+        funders = self.text["funding_body"]
+        funder_categories = funders.categories.to_numpy(dtype=object)
+
+        rows = []
+        for i in top:
+            lo, hi = np.searchsorted(edge_institutions, [i, i + 1])
+            codes = funders.codes[edge_grants[lo:hi]]
+            raw_funders = [funder_categories[c] for c in codes[codes >= 0][:50]]
+            rows.append({
+                "institution_name": self.institution_names[i],
+                "total_funding": float(totals[i]),
+                "project_count": int(counts[i]),
+                "researcher_count": int(researcher_count[i]),
+                "raw_funders": raw_funders,
+            })
+        return rows
+
+
+class ColumnarAnalyticsEngine:
+    """
+    Analytics backend answering stats / institutions / trends / map from a
+    GrantProjection. Exposes the same coroutines as AsyncNeo4jHandler for
+    those endpoints and delegates anything it cannot answer to the handler.
+    """
+
+    def __init__(self, handler: Any):
+        self.handler = handler
+        self._projection: Optional[GrantProjection] = None
+        self._projection_version: Optional[str] = None
+        self._load_lock = asyncio.Lock()
+
+    async def get_data_version(self) -> str:
+        return await self.handler.get_data_version()
+
+    async def _load_projection(self) -> GrantProjection:
+        """Fetch the projection columns from Neo4j and build the arrays off the event loop"""
+        started = time.perf_counter()
+        frames = await asyncio.gather(
+            self.handler.execute_cypher_df(GrantProjection.GRANTS_QUERY),
+            self.handler.execute_cypher_df(GrantProjection.RESEARCHERS_QUERY),
+            self.handler.execute_cypher_df(GrantProjection.INSTITUTIONS_QUERY),
+            self.handler.execute_cypher_df(GrantProjection.INVESTIGATOR_EDGES_QUERY),
+            self.handler.execute_cypher_df(GrantProjection.HOSTED_EDGES_QUERY),
+        )
+        projection = await asyncio.to_thread(GrantProjection, *frames)
+        logger.info(f"Columnar projection loaded: {projection.size} grants "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return projection
+
+    async def _current_projection(self) -> Optional[GrantProjection]:
+        """Projection for the current data version, None if it cannot be loaded"""
+        try:
+            version = await self.handler.get_data_version()
+            if version == "error":
+                return None
+            if version != self._projection_version:
+                async with self._load_lock:
+                    # Another request may have loaded it while we waited
+                    if version != self._projection_version:
+                        self._projection = await self._load_projection()
+                        self._projection_version = version
+            return self._projection
+        except Exception as e:
+            logger.warning(f"Columnar projection unavailable, using Neo4j: {e}")
+            return None
+
+    async def _projection_for(self, filters: Optional[Dict[str, Any]]) -> Optional[GrantProjection]:
+        """Projection if it can evaluate these filters, else None (Neo4j answers)"""
+        if self.handler._uses_fulltext(filters):
+            return None
+        projection = await self._current_projection()
+        if projection is None or not projection.supports(filters):
+            return None
+        return projection
+
+    def _mask(self, projection: GrantProjection, filters: Optional[Dict[str, Any]]) -> Any:
+        search_terms = self.handler._search_terms((filters or {}).get("search"))
+        return projection.filter_mask(filters, search_terms)
+
+    async def get_database_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        projection = await self._projection_for(filters)
+        if projection is None:
+            return await self.handler.get_database_stats(filters)
+        # Same test as _stats_query: any parameter means filtered stats
+        filtered = bool(self.handler._filter_params(filters))
+        return projection.stats(self._mask(projection, filters), filtered)
+
+    async def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection = await self._projection_for(filters)
+        if projection is None:
+            return await self.handler.get_top_institutions(limit, filters)
+        return projection.top_institutions(self._mask(projection, filters), limit)
+
+    async def get_funding_trends(self, start_year: int = 2000, end_year: int = 2024,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection = await self._projection_for(filters)
+        if projection is None:
+            return await self.handler.get_funding_trends(start_year, end_year, filters)
+        return projection.funding_trends(self._mask(projection, filters), start_year, end_year)
+
+    async def get_institution_map_data(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection = await self._projection_for(filters)
+        if projection is None:
+            return await self.handler.get_institution_map_data(filters)
+        return Neo4jQueryBuilder._dedupe_funders(projection.institution_map(self._mask(projection, filters)))
@@ -0,0 +1,372 @@
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from typing import List, Dict, Any, Optional, AsyncIterator
+import json
+import logging
+import time
+from app.utils.neo4j_handler import Neo4jQueryBuilder
+from app.utils.metrics import instrument_queries
+from app.utils.rollup_cube import FundingRollupCube
+from app.utils.statement_stats import AsyncTrackedDriver
+
+
+logger = logging.getLogger(__name__)
+
+
+@instrument_queries
+class AsyncNeo4jHandler(Neo4jQueryBuilder):
+    """
+    Asyncio counterpart of Neo4jHandler for the read-only analytics queries.
+    Built on AsyncGraphDatabase so awaiting a query yields the event loop
+    instead of blocking it. Queries come from the shared Neo4jQueryBuilder,
+    so results match the sync handler exactly.
+    """
+
+    def __init__(self, uri: str, user: str, password: str, database: str = "neo4j",
+                 search_mode: Optional[str] = None, driver: Optional[Any] = None):
+        """
+        Initialize the async Neo4j driver (connections are opened lazily).
+        Pass `driver` to share an existing async driver; closing it is then left to the owner.
+        Every statement run through the driver is recorded in statement_stats.
+        """
+        super().__init__(database=database, search_mode=search_mode)
+        self._owns_driver = driver is None
+        self.driver = AsyncTrackedDriver.wrap(driver or AsyncGraphDatabase.driver(uri, auth=(user, password), **self.DRIVER_KWARGS))
+
+    async def verify_connection(self):
+        """Verify database connection"""
+        try:
+            await self.driver.verify_connectivity()
+            logger.info("Neo4j connectivity verified")
+        except Exception as e:
+            logger.error(f"Neo4j connection failed: {str(e)}")
+            raise
+
+    async def close(self):
+        """Close the driver connection (only when this handler created it)"""
+        if self.driver and self._owns_driver:
+            await self.driver.close()
+
+    async def execute_cypher(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Execute a Cypher query and return results as list of dictionaries
+        """
+        try:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(query, parameters or {})  # type: ignore
+                return [self._record_to_dict(record) async for record in result]
+        except Exception as e:
+            logger.error(f"Cypher execution error: {str(e)}")
+            logger.error(f"Query: {query}")
+            raise
+
+    async def execute_cypher_df(self, query: str, parameters: Optional[Dict] = None) -> Any:
+        """Execute a Cypher query and return a pandas DataFrame (see Neo4jHandler.execute_cypher_df)"""
+        try:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(query, parameters or {})  # type: ignore
+                keys = result.keys()
+                values = await result.values()
+        except Exception as e:
+            logger.error(f"Cypher execution error: {str(e)}")
+            logger.error(f"Query: {query}")
+            raise
+        return self._values_to_frame(keys, values)
+
+    async def execute_cypher_arrow(self, query: str, parameters: Optional[Dict] = None) -> Any:
+        """Execute a Cypher query and return a pyarrow Table (requires pyarrow)"""
+        return self._frame_to_arrow(await self.execute_cypher_df(query, parameters))
+
+    async def stream_cypher(self, query: str, parameters: Optional[Dict] = None,
+                            max_rows: Optional[int] = None,
+                            fetch_size: Optional[int] = None,
+                            timeout: Optional[float] = None,
+                            read_only: bool = False) -> AsyncIterator[Dict]:
+        """
+        Execute a Cypher query and yield records lazily as dictionaries
+        (see Neo4jHandler.stream_cypher for fetch_size / max_rows / timeout /
+        read_only semantics).
+        """
+        limit = self._row_limit(max_rows)
+        async with self.driver.session(database=self.database, fetch_size=fetch_size or self.fetch_size,
+                                       default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS) as session:
+            tx = await session.begin_transaction(timeout=timeout)
+            try:
+                result = await tx.run(query, parameters or {})  # type: ignore
+                count = 0
+                async for record in result:
+                    if limit is not None and count >= limit:
+                        logger.warning(f"Cypher stream stopped at max_rows={limit}")
+                        break
+                    yield self._record_to_dict(record)
+                    count += 1
+                else:
+                    await tx.commit()
+            except Exception as e:
+                logger.error(f"Cypher execution error: {str(e)}")
+                logger.error(f"Query: {query}")
+                raise
+            finally:
+                # Rolls back if the stream stopped early or the client disconnected
+                await tx.close()
+
+    async def stream_json(self, query: str, parameters: Optional[Dict] = None,
+                          max_rows: Optional[int] = None, fmt: str = "ndjson") -> AsyncIterator[str]:
+        """
+        Stream a query result as a response body.
+        "ndjson": one record per line, plus a final {"_truncated": true, "max_rows": N}
+        line when the row cap cut the result short.
+        "json": {"rows": [...], "count": n, "truncated": bool}.
+        """
+        limit = self._row_limit(max_rows)
+        # One extra row tells a capped result apart from one that fits exactly
+        rows = self.stream_cypher(query, parameters, max_rows=limit + 1 if limit else 0)
+        count = 0
+        truncated = False
+
+        if fmt == "json":
+            yield '{"rows":['
+        try:
+            async for row in rows:
+                if limit is not None and count >= limit:
+                    truncated = True
+                    break
+                if fmt == "json":
+                    yield ("," if count else "") + self._json_line(row)
+                else:
+                    yield self._json_line(row) + "\n"
+                count += 1
+        finally:
+            # Also runs when the client disconnects mid-stream, so the transaction is released
+            await rows.aclose()
+
+        if fmt == "json":
+            yield f'],"count":{count},"truncated":{"true" if truncated else "false"}}}'
+        elif truncated:
+            yield self._json_line({"_truncated": True, "max_rows": limit}) + "\n"
+
+    async def get_schema(self) -> Dict[str, Any]:
+        """
+        Get database schema information
+        Returns node labels, relationship types, and properties
+        """
+        async with self.driver.session(database=self.database) as session:
+            node_result = await session.run("CALL db.labels()")
+            node_labels = [record["label"] async for record in node_result if record["label"] not in self.INTERNAL_LABELS]
+
+            rel_result = await session.run("CALL db.relationshipTypes()")
+            relationships = [record["relationshipType"] async for record in rel_result]
+
+            prop_result = await session.run("CALL db.propertyKeys()")
+            properties = [record["propertyKey"] async for record in prop_result]
+
+            return {
+                "node_labels": node_labels,
+                "relationships": relationships,
+                "properties": properties
+            }
+
+    async def get_data_version(self) -> str:
+        """Get the version string used to invalidate cached analytics (see Neo4jHandler.get_data_version)"""
+        try:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(self.DATA_VERSION_QUERY)
+                record = await result.single()
+                version = self._stamped_version(dict(record) if record else None)
+                if version:
+                    return version
+
+                cached = self._cached_version()
+                if cached:
+                    return cached
+
+                result = await session.run(self.LEGACY_DATA_VERSION_QUERY)
+                record = await result.single()
+                return self._store_version(dict(record) if record else None)
+        except Exception as e:
+            logger.warning(f"Error getting data version: {e}")
+            return "error"
+
+    async def get_database_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Get database statistics with optional filtering"""
+        cypher, params = self._stats_query(filters)
+        records = await self.execute_cypher(cypher, params)
+        return self._shape_stats(records[0] if records else None)
+
+    async def _funding_rollup(self) -> Optional[FundingRollupCube]:
+        """Rollup cube for the current data version, None when it is not built or current"""
+        try:
+            version = await self.get_data_version()
+            if version != self._rollup_version:
+                self._store_rollup(version, await self.execute_cypher(self.ROLLUP_LOAD_QUERY))
+            return self._rollup
+        except Exception as e:
+            logger.warning(f"Funding rollup unavailable, using live queries: {e}")
+            return None
+
+    async def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Get top institutions by funding with optional filtering (rollup cube when possible)"""
+        cube = await self._funding_rollup() if FundingRollupCube.supports(filters) else None
+        if cube is not None:
+            return cube.top_institutions(limit, filters)
+
+        cypher, params = self._top_institutions_query(limit, filters)
+        return await self.execute_cypher(cypher, params)
+
+    async def get_funding_trends(self, start_year: int = 2000, end_year: int = 2024,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Analyze funding trends over time with optional filtering (rollup cube when possible)"""
+        cube = await self._funding_rollup() if FundingRollupCube.supports(filters) else None
+        if cube is not None:
+            return cube.funding_trends(start_year, end_year, filters)
+
+        cypher, params = self._funding_trends_query(start_year, end_year, filters)
+        return await self.execute_cypher(cypher, params)
+
+    async def get_grants_list(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None,
+                              search: Optional[str] = None, sort_by: str = "start_year",
+                              order: str = "DESC") -> List[Dict]:
+        """Get paginated list of grants with search and dynamic sorting"""
+        cypher, params = self._grants_list_query(limit, skip, filters, search, sort_by, order)
+        return await self.execute_cypher(cypher, params)
+
+    async def get_grants_frame(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None,
+                               search: Optional[str] = None, sort_by: str = "start_year",
+                               order: str = "DESC") -> Any:
+        """get_grants_list as a DataFrame, for callers that encode it with frame_to_json"""
+        cypher, params = self._grants_list_query(limit, skip, filters, search, sort_by, order)
+        return await self.execute_cypher_df(cypher, params)
+
+    def stream_grants(self, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None,
+                      sort_by: str = "start_year", order: str = "DESC",
+                      max_rows: Optional[int] = None, fmt: str = "ndjson") -> AsyncIterator[str]:
+        """Stream the full filtered, sorted grants list as NDJSON or JSON (see stream_json)"""
+        limit = self._row_limit(max_rows)
+        # LIMIT one past the cap so the server stops early but truncation is still
+        # visible; with the cap disabled the LIMIT is effectively unbounded
+        cypher, params = self._grants_list_query(
+            limit=limit + 1 if limit else 2 ** 62, skip=0, filters=filters,
+            search=search, sort_by=sort_by, order=order
+        )
+        return self.stream_json(cypher, params, max_rows=limit or 0, fmt=fmt)
+
+    async def get_grants_page(self, limit: int = 50, cursor: Optional[str] = None,
+                              filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None,
+                              sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """Keyset-paginated grants list (see Neo4jHandler.get_grants_page)"""
+        sort_order, after, segments, start = self._keyset_plan(cursor, sort_by, order)
+        local_filters = self._with_search(filters, search)
+
+        items: List[Dict] = []
+        has_more = False
+        for idx in range(start, len(segments)):
+            remaining = limit - len(items)
+            cypher, params = self._keyset_segment_query(
+                local_filters, self.KEYSET_SORT_PROPERTIES[sort_by], sort_order, segments[idx],
+                after if idx == start else None, remaining + 1
+            )
+            rows = await self.execute_cypher(cypher, params)
+            if len(rows) > remaining:
+                items.extend(rows[:remaining])
+                has_more = True
+                break
+            items.extend(rows)
+
+        return self._keyset_page(items, has_more, sort_by, sort_order)
+
+    async def get_dashboard_data(self, filters: Optional[Dict[str, Any]] = None,
+                                 panels: Optional[List[str]] = None,
+                                 start_year_min: int = 2000, start_year_max: int = 2030,
+                                 institutions_limit: int = 10,
+                                 limit: int = 50, skip: int = 0,
+                                 sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """Compute several analytics panels in a single Cypher execution"""
+        panels = self._dashboard_panels(panels)
+        if not panels:
+            return {"timings": {}}
+
+        # Institutions / trends come from the rollup cube when the filters allow it
+        rollup_data: Dict[str, Any] = {}
+        if set(panels) & set(self.ROLLUP_PANELS) and FundingRollupCube.supports(filters):
+            cube = await self._funding_rollup()
+            if cube is not None:
+                started = time.perf_counter()
+                rollup_data = self._rollup_panels(cube, panels, filters, start_year_min,
+                                                  start_year_max, institutions_limit)
+                rollup_ms = (time.perf_counter() - started) * 1000
+                panels = [p for p in panels if p not in rollup_data]
+
+        # Unfiltered, the map panel reads the institution summaries like /map
+        summary_data: Dict[str, Any] = {}
+        if "map" in panels and not self._filter_params(filters):
+            summaries = await self.execute_cypher(self.INSTITUTION_SUMMARY_QUERY)
+            if summaries:
+                summary_data["map"] = self._dedupe_funders(summaries)
+                panels = [p for p in panels if p != "map"]
+
+        data: Dict[str, Any] = {"timings": {}}
+        if panels:
+            cypher, params = self._dashboard_query(
+                filters, panels, start_year_min, start_year_max, institutions_limit,
+                limit, skip, sort_by, order
+            )
+
+            started = time.perf_counter()
+            try:
+                async with self.driver.session(database=self.database) as session:
+                    result = await session.run(cypher, params)  # type: ignore
+                    record = await result.single()
+                    summary = await result.consume()
+            except Exception as e:
+                logger.error(f"Dashboard query failed: {e}")
+                raise
+            query_ms = (time.perf_counter() - started) * 1000
+            data = self._shape_dashboard(record, panels, query_ms, summary)
+
+        if rollup_data:
+            data.update(rollup_data)
+            data["timings"]["rollup_ms"] = round(rollup_ms, 2)
+        data.update(summary_data)
+        return data
+
+    async def get_filter_options(self) -> Dict[str, List[str]]:
+        """Get unique values for filters"""
+        options = {}
+
+        scope = self._generation_scope()
+        async with self.driver.session(database=self.database) as session:
+            for prop, label in self.FILTER_OPTION_PROPERTIES:
+                result = await session.run(f"{scope} MATCH (n:{label}) WHERE n.{prop} IS NOT NULL AND {self._in_generation('n')} RETURN DISTINCT n.{prop} as value ORDER BY value LIMIT 1000")
+                options[prop] = [str(record["value"]) async for record in result if record["value"]]
+
+            # Special case for institutions
+            result = await session.run(f"{scope} MATCH (i:Institution) WHERE {self._in_generation('i')} RETURN DISTINCT i.name as value ORDER BY value LIMIT 1000")
+            options["institution"] = [record["value"] async for record in result if record["value"]]
+
+        return options
+
+    async def get_facets(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
+        """Filter facet values with grant counts and funding (see Neo4jHandler.get_facets)"""
+        if not self._filter_params(filters):
+            records = await self.execute_cypher(self.FACET_DICTIONARY_QUERY)
+            if records and records[0].get("facets"):
+                return json.loads(records[0]["facets"])
+
+        cypher, params = self._facets_query(filters)
+        records = await self.execute_cypher(cypher, params)
+        return self._shape_facets(records[0] if records else None)
+
+    async def get_institution_map_data(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Get aggregated stats for all institutions for map visualization.
+        Returns: list of dicts with name, funding, counts, etc.
+        Unfiltered requests read the precomputed institution summaries when current.
+        Query errors propagate, so a failure is never cached as an empty map.
+        """
+        if not self._filter_params(filters):
+            results = await self.execute_cypher(self.INSTITUTION_SUMMARY_QUERY)
+            if results:
+                return self._dedupe_funders(results)
+
+        cypher, params = self._institution_map_query(filters)
+        results = await self.execute_cypher(cypher, params)
+        return self._dedupe_funders(results)
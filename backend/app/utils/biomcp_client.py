@@ -5,17 +5,37 @@ This module provides functions to search PubMed for articles related to research
 import subprocess
 import json
 import logging
+import threading
+import time
 from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 class BioMCPClient:
     """Client for interacting with BioMCP to retrieve PubMed articles"""
+
+    # Availability is checked once per process (a `biomcp --version` subprocess);
+    # a negative result is re-checked after UNAVAILABLE_RECHECK_S in case it gets installed
+    UNAVAILABLE_RECHECK_S = 300
+    _available: Optional[bool] = None
+    _checked_at = 0.0
+    _check_lock = threading.Lock()
     
     def __init__(self):
-        self.available = self._check_biomcp_available()
+        self.available = self.check_available()
+
+    @classmethod
+    def check_available(cls, refresh: bool = False) -> bool:
+        """Cached result of _check_biomcp_available"""
+        with cls._check_lock:
+            stale = cls._available is False and time.monotonic() - cls._checked_at > cls.UNAVAILABLE_RECHECK_S
+            if refresh or cls._available is None or stale:
+                cls._available = cls._check_biomcp_available()
+                cls._checked_at = time.monotonic()
+            return cls._available
     
-    def _check_biomcp_available(self) -> bool:
+    @staticmethod
+    def _check_biomcp_available() -> bool:
         """Check if biomcp is installed and available"""
         try:
             result = subprocess.run(
@@ -1,63 +1,435 @@
-import os
-import json
+"""
+Two-tier cache for analytics responses.
+
+Entries are stamped with the data version they were computed from and are
+only served while it is current.
+
+- Memory tier: an LRU of decoded results, so a warm hit costs a dict lookup.
+- Disk tier: one SQLite file (pickled values, written in a transaction, so a
+  crash never leaves a torn entry), bounded in bytes; least recently used
+  rows are evicted. It survives restarts and refills the memory tier.
+  From async code its reads and writes run in a worker thread, so SQLite
+  I/O and pickling never block the event loop; memory hits stay inline.
+
+Empty results ([], {}, 0) are cached like any other (negative caching), and
+concurrent misses for the same key share one computation (single-flight).
+Endpoints use it through the @cached decorator.
+"""
+import asyncio
+import functools
 import hashlib
-import time
+import inspect
+import json
 import logging
-from typing import Any, Callable, Dict, Optional
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.params import Depends
+from fastapi.responses import Response
+from pydantic.fields import FieldInfo
+
 from app.config import settings
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
 
 logger = logging.getLogger(__name__)
 
 CACHE_DIR = os.path.join(settings['data_dir'], ".cache")
 
+# Sentinel for "not cached" (None is a cacheable result)
+MISS = object()
+
+# How the last lookup in this request was answered: "memory", "disk", "coalesced" or "miss"
+cache_status: ContextVar[Optional[str]] = ContextVar("cache_status", default=None)
+
+
 def get_cache_key(name: str, **kwargs) -> str:
     """Generate a unique hash for a query/function and its arguments"""
     # Sort keys to ensure consistent hashing
     filtered_kwargs = {k: v for k, v in kwargs.items() if v is not None}
-    arg_str = json.dumps(filtered_kwargs, sort_keys=True)
+    arg_str = json.dumps(filtered_kwargs, sort_keys=True, default=str)
     return hashlib.md5(f"{name}:{arg_str}".encode()).hexdigest()
 
-def get_cached_data(cache_key: str, data_version: str) -> Optional[Any]:
-    """Retrieve data from disk cache if version matches"""
-    if not os.path.exists(CACHE_DIR):
-        return None
-        
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-    if not os.path.exists(cache_file):
-        return None
-        
-    try:
-        with open(cache_file, 'r') as f:
-            cached = json.load(f)
-            if cached.get("version") == data_version:
-                logger.debug(f"Cache hit for {cache_key}")
-                return cached.get("data")
-    except Exception as e:
-        logger.error(f"Error reading cache {cache_file}: {e}")
-        
-    return None
-
-def set_cached_data(cache_key: str, data_version: str, data: Any):
-    """Save data to disk cache with version"""
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-    try:
-        with open(cache_file, 'w') as f:
-            json.dump({
-                "version": data_version,
-                "timestamp": time.time(),
-                "data": data
-            }, f)
-        logger.debug(f"Cache saved for {cache_key}")
-    except Exception as e:
-        logger.error(f"Error writing cache {cache_file}: {e}")
 
-def clear_cache():
-    """Clear all cached files"""
-    if os.path.exists(CACHE_DIR):
-        import shutil
-        shutil.rmtree(CACHE_DIR)
-        os.makedirs(CACHE_DIR)
+class CachedResponse(NamedTuple):
+    """A pre-encoded Response body, stored in place of the Response object"""
+    body: bytes
+    media_type: Optional[str]
+    status_code: int
+
+
+class AnalyticsCache:
+    """Memory LRU in front of a size-bounded SQLite tier, with single-flight misses"""
+
+    def __init__(self, path: str, memory_entries: int = 512, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        # _lock guards the memory tier and counters, _disk_lock the SQLite connection
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes: Optional[int] = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+            "writes": 0, "memory_evictions": 0, "disk_evictions": 0, "errors": 0,
+        }
+        # Request counts per (endpoint name, parameters JSON) since the last save_requests()
+        self._requests: Counter = Counter()
+
+    # --- disk tier ---
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open (and create) the SQLite file on first use; caller holds the disk lock"""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, version TEXT NOT NULL, data BLOB NOT NULL,"
+                " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS requests ("
+                " name TEXT NOT NULL, params TEXT NOT NULL, hits INTEGER NOT NULL,"
+                " PRIMARY KEY (name, params))"
+            )
+            self._disk_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._db = db
+        return self._db
+
+    def _disk_get(self, key: str, version: str) -> Any:
+        db = self._conn()
+        row = db.execute("SELECT version, data FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] != version:
+            return MISS
+        db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[1])
+
+    def _disk_set(self, key: str, version: str, value: Any):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.disk_max_bytes:
+            return
+        db = self._conn()
+        with db:
+            old = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, version, data, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, version, data, len(data), time.time())
+            )
+        self._disk_bytes += len(data) - (old[0] if old else 0)
+        if self._disk_bytes > self.disk_max_bytes:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        """Drop least recently used rows until the tier is back under 90% of its bound"""
+        db = self._conn()
+        target = int(self.disk_max_bytes * 0.9)
+        evicted = []
+        with db:
+            for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+                if self._disk_bytes <= target:
+                    break
+                evicted.append((key,))
+                self._disk_bytes -= size
+            db.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        with self._lock:
+            self.counters["disk_evictions"] += len(evicted)
+
+    # --- memory tier ---
+
+    def _memory_set(self, key: str, version: str, value: Any):
+        self._memory[key] = (version, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    # --- public API ---
+
+    def _memory_lookup(self, key: str, version: str) -> Any:
+        """Value from the memory tier, or MISS"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == version:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                cache_status.set("memory")
+                return entry[1]
+        return MISS
+
+    def _disk_lookup(self, key: str, version: str) -> Any:
+        """Value from the disk tier (copied into the memory tier), or MISS; blocking"""
+        try:
+            with self._disk_lock:
+                value = self._disk_get(key, version)
+        except Exception as e:
+            with self._lock:
+                self.counters["errors"] += 1
+            logger.error(f"Error reading cache entry {key}: {e}")
+            return MISS
+        if value is MISS:
+            return MISS
+        with self._lock:
+            self._memory_set(key, version, value)
+            self.counters["disk_hits"] += 1
+        return value
+
+    def _disk_store(self, key: str, version: str, value: Any):
+        """Write an entry to the disk tier; blocking"""
+        try:
+            with self._disk_lock:
+                self._disk_set(key, version, value)
+        except Exception as e:
+            with self._lock:
+                self.counters["errors"] += 1
+            logger.error(f"Error writing cache entry {key}: {e}")
+
+    def _memory_store(self, key: str, version: str, value: Any):
+        with self._lock:
+            self._memory_set(key, version, value)
+            self.counters["writes"] += 1
+
+    def _miss(self):
+        with self._lock:
+            self.counters["misses"] += 1
+        cache_status.set("miss")
+
+    def get(self, key: str, version: str) -> Any:
+        """Cached value for key at this data version, or MISS (blocking; async code uses get_or_compute)"""
+        value = self._memory_lookup(key, version)
+        if value is MISS:
+            value = self._disk_lookup(key, version)
+            if value is MISS:
+                self._miss()
+            else:
+                cache_status.set("disk")
+        return value
+
+    def set(self, key: str, version: str, value: Any):
+        """Store a value in both tiers (blocking; async code uses get_or_compute)"""
+        self._memory_store(key, version, value)
+        self._disk_store(key, version, value)
+
+    async def get_or_compute(self, key: str, version: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value, or the result of compute() (then cached). Concurrent
+        misses for the same key and version await one shared computation;
+        it runs as its own task, so a disconnecting caller does not cancel it
+        for the others. Exceptions are not cached, and neither is anything
+        computed under the "error" version (the graph was unreachable when the
+        version was read). Memory hits are answered inline; disk reads and
+        writes run in a worker thread.
+        """
+        if version == "error":
+            self._miss()
+            return await compute()
+
+        value = self._memory_lookup(key, version)
+        if value is not MISS:
+            return value
+
+        flight = (key, version)
+        if flight not in self._inflight:
+            value = await asyncio.to_thread(self._disk_lookup, key, version)
+            if value is not MISS:
+                cache_status.set("disk")
+                return value
+
+        task = self._inflight.get(flight)
+        if task is not None:
+            with self._lock:
+                self.counters["coalesced"] += 1
+            cache_status.set("coalesced")
+            return await asyncio.shield(task)
+
+        self._miss()
+
+        async def run():
+            try:
+                result = await compute()
+                self._memory_store(key, version, result)
+                await asyncio.to_thread(self._disk_store, key, version, result)
+                return result
+            finally:
+                self._inflight.pop(flight, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[flight] = task
+        return await asyncio.shield(task)
+
+    def record(self, name: str, params: Dict[str, Any]):
+        """Count a request, for warming the most requested views"""
+        self._requests[(name, json.dumps(params, sort_keys=True, default=str))] += 1
+
+    def save_requests(self):
+        """Add the request counts gathered since the last call to the disk tier"""
+        with self._lock:
+            counts, self._requests = self._requests, Counter()
+        if not counts:
+            return
+        with self._disk_lock:
+            try:
+                db = self._conn()
+                with db:
+                    db.executemany(
+                        "INSERT INTO requests (name, params, hits) VALUES (?, ?, ?)"
+                        " ON CONFLICT (name, params) DO UPDATE SET hits = hits + excluded.hits",
+                        [(name, params, hits) for (name, params), hits in counts.items()]
+                    )
+            except Exception as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                logger.error(f"Error saving request counts: {e}")
+
+    def top_requests(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """The most requested (endpoint name, parameters), counted across restarts; blocking"""
+        self.save_requests()
+        with self._disk_lock:
+            try:
+                rows = self._conn().execute(
+                    "SELECT name, params FROM requests ORDER BY hits DESC LIMIT ?", (limit,)
+                ).fetchall()
+            except Exception as e:
+                logger.error(f"Error reading request counts: {e}")
+                return []
+        return [(name, json.loads(params)) for name, params in rows]
+
+    def clear(self):
+        """Drop every entry from both tiers (request counts are kept)"""
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            try:
+                db = self._conn()
+                with db:
+                    db.execute("DELETE FROM entries")
+                self._disk_bytes = 0
+            except Exception as e:
+                logger.error(f"Error clearing cache: {e}")
         logger.info("Cache cleared")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.memory_entries,
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes,
+                "inflight": len(self._inflight),
+            }
+
+
+# Endpoints decorated with @cached, by cache name (each has a .warm coroutine)
+cached_endpoints: Dict[str, Callable] = {}
+
+analytics_cache = AnalyticsCache(
+    os.path.join(CACHE_DIR, "analytics.sqlite3"),
+    memory_entries=settings["cache"]["memory_entries"],
+    disk_max_bytes=settings["cache"]["disk_max_bytes"],
+)
+
+
+def cached(name: str, timings: bool = False, cache: AnalyticsCache = analytics_cache):
+    """
+    Cache an async endpoint's result per data version.
+
+    The key is `name` plus every argument except `handler` (the data version
+    comes from handler.get_data_version()). A Response result is cached as its
+    encoded body. With timings=True, a cached dict is returned with
+    {"timings": {"cache_ms": ...}} in place of the stored computation timings.
+
+    Responses carry an ETag over (key, data version); a request whose
+    If-None-Match names it gets a 304 before the cache is even consulted.
+
+    The wrapper's .warm(**params) fills the cache for the given parameters
+    (defaults for the rest) without a request, and requests are counted so
+    the most popular parameter sets can be warmed after a reload.
+    """
+    def decorator(endpoint: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(endpoint)
+        # Parameter defaults as FastAPI resolves them, and the handler dependency
+        defaults = {}
+        dependency = None
+        for param in signature.parameters.values():
+            if isinstance(param.default, Depends):
+                dependency = param.default.dependency
+            elif isinstance(param.default, FieldInfo):
+                defaults[param.name] = param.default.default
+            elif param.default is not inspect.Parameter.empty:
+                defaults[param.name] = param.default
+
+        async def load(kwargs: Dict[str, Any], key: str, data_version: str):
+            async def compute():
+                result = await endpoint(**kwargs)
+                if isinstance(result, Response):
+                    return CachedResponse(bytes(result.body), result.media_type, result.status_code)
+                return result
+            return await cache.get_or_compute(key, data_version, compute)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            started = time.perf_counter()
+            request = kwargs.pop("_http_request")
+            response = kwargs.pop("_http_response")
+            try:
+                data_version = await kwargs["handler"].get_data_version()
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            params = {k: v for k, v in kwargs.items() if k != "handler"}
+            key = get_cache_key(name, **params)
+            cache.record(name, {k: v for k, v in params.items() if v is not None})
+
+            headers = {}
+            if data_version != "error":
+                etag = make_etag(key, data_version)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+                headers = cache_headers(etag)
+
+            value = await load(kwargs, key, data_version)
+            if isinstance(value, CachedResponse):
+                return Response(content=value.body, media_type=value.media_type, status_code=value.status_code, headers=headers)
+            response.headers.update(headers)
+            if timings and cache_status.get() != "miss" and isinstance(value, dict):
+                return {**value, "timings": {"cache_ms": round((time.perf_counter() - started) * 1000, 2)}}
+            return value
+
+        async def warm(**params):
+            """Compute and cache the response for these parameters"""
+            params = {**defaults, **params}
+            kwargs = {**params, "handler": dependency()}
+            data_version = await kwargs["handler"].get_data_version()
+            await load(kwargs, get_cache_key(name, **params), data_version)
+
+        # FastAPI builds the endpoint from this signature: the original
+        # parameters plus the request (for If-None-Match) and the response (for headers)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("_http_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            inspect.Parameter("_http_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+        ])
+        wrapper.warm = warm
+        cached_endpoints[name] = wrapper
+        return wrapper
+    return decorator
+
+
+def clear_cache():
+    """Clear all cached entries"""
+    analytics_cache.clear()
@@ -0,0 +1,112 @@
+"""
+Analytics cache warm-up.
+
+After a load clears the cache (and on startup), the default dashboard views
+and the most requested parameter sets are computed in the background, so the
+first visitor gets a cache hit instead of the cold Neo4j cost. Progress is
+written into a status dict (retrieval_status["warmup"]).
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.cache import analytics_cache, cached_endpoints
+from app.utils.metrics import StageTimer
+from app.utils.neo4j_handler import Neo4jQueryBuilder
+
+logger = logging.getLogger(__name__)
+
+# (cache name, parameters) computed on every warm-up; other parameters take their defaults
+DEFAULT_VIEWS: List[Tuple[str, Dict[str, Any]]] = [
+    ("stats", {}),
+    ("funding_trends", {}),
+    ("top_institutions", {}),
+    ("map_data", {}),
+    ("filter_options", {}),
+    ("facets", {}),
+    ("schema", {}),
+    ("dashboard", {}),
+    # First grants page for every sortable column, both directions
+    *[("grants", {"sort_by": sort_by, "order": order})
+      for sort_by in Neo4jQueryBuilder.GRANT_SORT_FIELDS for order in ("DESC", "ASC")],
+]
+
+# The event loop the app runs on (async drivers are bound to it); set by startup()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_current: Optional[concurrent.futures.Future] = None
+
+
+def warmup_views(top_n: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Default views followed by the top_n most requested, without duplicates"""
+    views, seen = [], set()
+    for name, params in DEFAULT_VIEWS + analytics_cache.top_requests(top_n):
+        marker = (name, json.dumps(params, sort_keys=True, default=str))
+        if name in cached_endpoints and marker not in seen:
+            seen.add(marker)
+            views.append((name, params))
+    return views
+
+
+async def warm_cache(status: Dict[str, Any]):
+    """Compute every warm-up view with bounded concurrency, reporting into status["warmup"]"""
+    views = await asyncio.to_thread(warmup_views, settings["cache"]["warm_top_n"])
+    progress = {"state": "running", "done": 0, "failed": 0, "total": len(views),
+                "started_at": time.time(), "seconds": None}
+    status["warmup"] = progress
+    semaphore = asyncio.Semaphore(max(1, settings["cache"]["warm_concurrency"]))
+    stages = StageTimer("cache_warmup")
+    stages.start("views")
+
+    async def warm_one(name: str, params: Dict[str, Any]):
+        async with semaphore:
+            try:
+                await cached_endpoints[name].warm(**params)
+            except Exception as e:
+                progress["failed"] += 1
+                logger.warning(f"Cache warm-up of {name} {params} failed: {e}")
+            finally:
+                progress["done"] += 1
+
+    try:
+        await asyncio.gather(*(warm_one(name, params) for name, params in views))
+        progress["state"] = "completed"
+        stages.finish()
+    except asyncio.CancelledError:
+        progress["state"] = "cancelled"
+        raise
+    finally:
+        progress["seconds"] = round(time.time() - progress["started_at"], 2)
+        logger.info(f"Cache warm-up {progress['state']}: {progress['done'] - progress['failed']}/{progress['total']} views")
+
+
+def schedule_warmup(status: Dict[str, Any]):
+    """
+    Start a warm-up on the app's event loop; callable from any thread (load
+    tasks run in the threadpool). A warm-up still running is cancelled, since
+    the data it was computing for has just changed.
+    """
+    global _current
+    if _loop is None or _loop.is_closed():
+        logger.info("Cache warm-up skipped: no running app event loop")
+        return
+    if _current is not None and not _current.done():
+        _current.cancel()
+    _current = asyncio.run_coroutine_threadsafe(warm_cache(status), _loop)
+
+
+async def startup(status: Dict[str, Any]):
+    """Remember the app's event loop and warm the cache in the background"""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    schedule_warmup(status)
+
+
+async def shutdown():
+    """Stop a running warm-up and persist the request counts"""
+    if _current is not None and not _current.done():
+        _current.cancel()
+    await asyncio.to_thread(analytics_cache.save_requests)
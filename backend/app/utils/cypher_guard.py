@@ -0,0 +1,148 @@
+"""
+Cost guardrails for LLM-generated Cypher.
+
+Before a generated query runs, CypherGuard
+1. rejects write clauses (the query also runs in a read transaction),
+2. runs EXPLAIN and inspects the plan: cartesian products estimated above
+   CYPHER_MAX_ESTIMATED_ROWS are rejected, as are all-node scans feeding an
+   eager operator (sort / aggregation) that a LIMIT cannot cut short,
+3. makes sure the final RETURN has a LIMIT no larger than the row cap,
+   injecting or lowering it when needed.
+"""
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from neo4j.exceptions import ClientError
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class CypherRejectedError(ValueError):
+    """A generated query was refused by the guard"""
+
+
+class CypherGuard:
+    """Checks and rewrites generated Cypher before it is executed"""
+
+    # Clauses a read-only query never needs
+    WRITE_CLAUSES = ["CREATE", "MERGE", "DELETE", "DETACH", "SET", "REMOVE", "DROP", "LOAD CSV", "FOREACH"]
+
+    # Plan operators that consume their whole input before producing a row
+    EAGER_OPERATORS = {"EagerAggregation", "Sort", "Eager"}
+
+    _STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`")
+    _COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+    _FINAL_LIMIT = re.compile(r"\bLIMIT\s+(\d+|\$\w+)\s*$", re.IGNORECASE)
+
+    def __init__(self, neo4j_handler, max_estimated_rows: Optional[int] = None):
+        self.neo4j = neo4j_handler
+        cypher_settings = settings.get("cypher", {})
+        self.max_estimated_rows = max_estimated_rows or cypher_settings.get("max_estimated_rows", 1000000)
+        self.timeout = cypher_settings.get("timeout", 30.0)
+
+    @classmethod
+    def _strip(cls, cypher: str) -> str:
+        """
+        Query text with comments and literal contents blanked, for keyword checks.
+        Lengths are preserved so match offsets apply to the original query.
+        """
+        cypher = cls._COMMENT.sub(lambda m: " " * len(m.group(0)), cypher)
+        return cls._STRING_LITERAL.sub(lambda m: m.group(0)[0] + " " * (len(m.group(0)) - 2) + m.group(0)[-1], cypher)
+
+    @classmethod
+    def write_clause(cls, cypher: str) -> Optional[str]:
+        """First write clause found in the query, None if it is read-only"""
+        text = cls._strip(cypher).upper()
+        for clause in cls.WRITE_CLAUSES:
+            if re.search(r"\b" + r"\s+".join(clause.split()) + r"\b", text):
+                return clause
+        return None
+
+    @staticmethod
+    def _plan_operators(plan: Optional[Dict]) -> List[Dict[str, Any]]:
+        """Flatten an EXPLAIN plan into [{"operator", "estimated_rows", "eager_above"}] (pre-order)"""
+        operators: List[Dict[str, Any]] = []
+
+        def walk(node: Dict, eager_above: bool):
+            # Newer servers suffix operators with the runtime, e.g. "CartesianProduct@neo4j"
+            name = str(node.get("operatorType", "")).split("@")[0]
+            operators.append({
+                "operator": name,
+                "estimated_rows": float(node.get("arguments", {}).get("EstimatedRows", 0) or 0),
+                "eager_above": eager_above,
+            })
+            for child in node.get("children", []):
+                walk(child, eager_above or name in CypherGuard.EAGER_OPERATORS)
+
+        if plan:
+            walk(plan, False)
+        return operators
+
+    def _with_limit(self, cypher: str, limit: int) -> tuple:
+        """Query whose final RETURN is capped at `limit` rows, and what was changed (or None)"""
+        text = self._strip(cypher)
+        match = self._FINAL_LIMIT.search(text)
+        if match:
+            value = match.group(1)
+            if value.startswith("$") or int(value) <= limit:
+                return cypher, None
+            return f"{cypher[:match.start(1)]}{limit}{cypher[match.end(1):]}", f"lowered LIMIT {value} to {limit}"
+
+        if not re.search(r"\bRETURN\b", text, re.IGNORECASE):
+            return cypher, None
+        if re.search(r"\bUNION\b", text, re.IGNORECASE):
+            # A trailing LIMIT would only bind the last branch
+            return f"CALL {{\n{cypher}\n}}\nRETURN *\nLIMIT {limit}", f"wrapped UNION with LIMIT {limit}"
+        return f"{cypher}\nLIMIT {limit}", f"added LIMIT {limit}"
+
+    def check(self, cypher: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Validate a generated query and return the query to run plus a report:
+        {"query", "rewritten", "notes", "estimated_rows", "operators"}.
+        Raises CypherRejectedError when the query must not run.
+        """
+        cypher = cypher.strip().rstrip(";").strip()
+        if not cypher:
+            raise CypherRejectedError("Empty Cypher query")
+
+        clause = self.write_clause(cypher)
+        if clause:
+            raise CypherRejectedError(f"Generated query contains a write clause ({clause})")
+
+        try:
+            plan = self.neo4j.explain_cypher(cypher, timeout=self.timeout)
+        except ClientError as e:
+            # Syntax / semantic errors; connection problems propagate as-is
+            raise CypherRejectedError(f"Generated query failed EXPLAIN: {e.message or e}")
+
+        operators = self._plan_operators(plan)
+        for op in operators:
+            if op["operator"] == "CartesianProduct" and op["estimated_rows"] > self.max_estimated_rows:
+                raise CypherRejectedError(
+                    f"Query plan has a cartesian product of ~{op['estimated_rows']:,.0f} rows "
+                    f"(limit {self.max_estimated_rows:,})"
+                )
+            if op["operator"] == "AllNodesScan" and op["eager_above"]:
+                raise CypherRejectedError(
+                    "Query plan scans every node into a sort/aggregation; anchor the MATCH on a label"
+                )
+
+        notes = []
+        if limit:
+            cypher, note = self._with_limit(cypher, limit)
+            if note:
+                notes.append(note)
+        if notes:
+            logger.info(f"Cypher guard rewrote query: {'; '.join(notes)}")
+
+        return {
+            "query": cypher,
+            "rewritten": bool(notes),
+            "notes": notes,
+            "estimated_rows": operators[0]["estimated_rows"] if operators else None,
+            "operators": sorted({op["operator"] for op in operators}),
+        }
@@ -0,0 +1,139 @@
+"""
+Graph backend selection (GRAPH_BACKEND) and the app-lifetime drivers.
+
+"neo4j" (default) connects to the configured Neo4j server; "memory" serves the
+same handler methods from the in-process MemoryGraphHandler, so the API runs
+without any external service.
+
+startup() / shutdown() run in the FastAPI lifespan hook: one sync and one
+async driver (each with its own connection pool) are created once, warmed
+with verify_connectivity, and shared by every handler. Routers receive the
+shared handlers through Depends(get_graph_handler) /
+Depends(get_async_graph_handler).
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.utils.pool_stats import PoolMonitor
+
+
+logger = logging.getLogger(__name__)
+
+# App-lifetime drivers and their monitors (None until startup() runs)
+_driver: Optional[Any] = None
+_async_driver: Optional[Any] = None
+_monitors: Dict[str, PoolMonitor] = {}
+
+# Shared handlers returned by the dependencies
+_handler: Optional[Any] = None
+_async_handler: Optional[Any] = None
+
+
+class CypherUnavailableError(NotImplementedError):
+    """The configured graph backend cannot run arbitrary Cypher (routers answer 501)"""
+
+
+def graph_backend() -> str:
+    return settings.get("graph", {}).get("backend", "neo4j")
+
+
+def create_graph_handler():
+    """
+    A new sync handler for the configured backend (Neo4jHandler or
+    MemoryGraphHandler). It uses the app-lifetime driver when one is running,
+    so it is cheap to create; outside the app (scripts) it opens its own.
+    """
+    if graph_backend() == "memory":
+        from app.utils.memory_graph import MemoryGraphHandler
+        return MemoryGraphHandler()
+
+    from app.utils.neo4j_handler import Neo4jHandler
+    return Neo4jHandler(
+        uri=settings["neo4j"]["uri"],
+        user=settings["neo4j"]["user"],
+        password=settings["neo4j"]["password"],
+        database=settings["neo4j"]["database"],
+        driver=_driver
+    )
+
+
+def create_async_graph_handler():
+    """A new async handler for the configured backend (AsyncNeo4jHandler or AsyncMemoryGraphHandler)"""
+    if graph_backend() == "memory":
+        from app.utils.memory_graph import AsyncMemoryGraphHandler
+        return AsyncMemoryGraphHandler()
+
+    from app.utils.async_neo4j_handler import AsyncNeo4jHandler
+    return AsyncNeo4jHandler(
+        uri=settings["neo4j"]["uri"],
+        user=settings["neo4j"]["user"],
+        password=settings["neo4j"]["password"],
+        database=settings["neo4j"]["database"],
+        driver=_async_driver
+    )
+
+
+def get_graph_handler():
+    """Dependency: the shared sync handler"""
+    global _handler
+    if _handler is None:
+        _handler = create_graph_handler()
+    return _handler
+
+
+def get_async_graph_handler():
+    """Dependency: the shared async handler"""
+    global _async_handler
+    if _async_handler is None:
+        _async_handler = create_async_graph_handler()
+    return _async_handler
+
+
+async def startup():
+    """Create the app-lifetime drivers and open their first connections"""
+    global _driver, _async_driver
+    if graph_backend() == "memory":
+        # Seeds the in-memory store now rather than on the first request
+        await asyncio.to_thread(get_graph_handler)
+        return
+
+    from neo4j import AsyncGraphDatabase, GraphDatabase
+    from app.utils.neo4j_handler import Neo4jQueryBuilder
+
+    auth = (settings["neo4j"]["user"], settings["neo4j"]["password"])
+    _driver = GraphDatabase.driver(settings["neo4j"]["uri"], auth=auth, **Neo4jQueryBuilder.DRIVER_KWARGS)
+    _async_driver = AsyncGraphDatabase.driver(settings["neo4j"]["uri"], auth=auth, **Neo4jQueryBuilder.DRIVER_KWARGS)
+    _monitors["sync"] = PoolMonitor(_driver, "sync")
+    _monitors["async"] = PoolMonitor(_async_driver, "async")
+
+    try:
+        # TCP + TLS + auth happen here instead of on the first requests
+        await asyncio.to_thread(_driver.verify_connectivity)
+        await _async_driver.verify_connectivity()
+        logger.info("Neo4j drivers connected")
+    except Exception as e:
+        # The API still starts; requests fail (and retry connecting) until Neo4j is reachable
+        logger.error(f"Neo4j not reachable at startup: {e}")
+
+
+async def shutdown():
+    """Close the app-lifetime drivers"""
+    global _driver, _async_driver, _handler, _async_handler
+    if _driver is not None:
+        await asyncio.to_thread(_driver.close)
+    if _async_driver is not None:
+        await _async_driver.close()
+    _driver = _async_driver = _handler = _async_handler = None
+    _monitors.clear()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics per app-lifetime driver"""
+    if graph_backend() == "memory":
+        return {"backend": "memory", "pools": {}}
+    return {
+        "backend": "neo4j",
+        "pools": {name: monitor.stats() for name, monitor in _monitors.items()},
+    }
@@ -0,0 +1,62 @@
+"""
+HTTP-level caching: conditional requests and response compression.
+
+Responses that are a function of (request parameters, data version) carry a
+strong ETag built from those, so a client that already holds the body gets a
+304 with no payload (and no serialization on the server).
+"""
+import hashlib
+import logging
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.middleware.gzip import GZipMiddleware
+
+from app.config import settings
+
+# Brotli is optional (pip install brotli-asgi); gzip is used without it
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts (cache key, data version, ...)"""
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """ETag plus Cache-Control: clients may keep the body but revalidate after max-age"""
+    max_age = settings["http"]["max_age"]
+    control = f"private, max-age={max_age}, must-revalidate" if max_age > 0 else "private, no-cache"
+    return {"ETag": etag, "Cache-Control": control}
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires (a W/ prefix is ignored)
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def add_compression(app: FastAPI):
+    """Brotli (with gzip fallback) when brotli-asgi is installed, otherwise gzip, above a size threshold"""
+    minimum_size = settings["http"]["compression_min_bytes"]
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=minimum_size, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=minimum_size)
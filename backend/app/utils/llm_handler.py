@@ -1,9 +1,10 @@
 import anthropic
 import openai
 import google.generativeai as genai
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import logging
 import requests
+import threading
 import json
 from urllib.parse import quote
 from bs4 import BeautifulSoup
@@ -22,6 +23,7 @@ except ImportError:
     GoogleSearch = None
 
 from app.utils.biomcp_client import BioMCPClient
+from app.utils.metrics import observe_llm
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,16 +47,107 @@ def safe_format_amount(amount):
         return "N/A"
 
 
+def _model_spec(model_name: str, secrets: Dict) -> Tuple[str, str, Optional[str], Optional[str]]:
+    """Provider, model id, API key and base URL for a display model name"""
+    if "Claude" in model_name:
+        model_id = "claude-sonnet-4-5" if "4.5" in model_name else "claude-3-5-sonnet-latest"
+        return "anthropic", model_id, secrets.get("anthropic", {}).get("api_key"), None
+
+    if "GPT" in model_name or "o3" in model_name:
+        model_id = "o3-mini" if "o3-mini" in model_name else "gpt-4o"
+        return "openai", model_id, secrets.get("openai", {}).get("api_key"), None
+
+    if "DeepSeek" in model_name:
+        api_key = secrets.get("deepseek", {}).get("api_key")
+        # Detect OpenRouter key format
+        if api_key and api_key.startswith("sk-or-"):
+            model_id = "deepseek/deepseek-r1" if "R1" in model_name else "deepseek/deepseek-v3.2"
+            return "deepseek", model_id, api_key, "https://openrouter.ai/api/v1"
+        model_id = "deepseek-reasoner" if "R1" in model_name else "deepseek-chat"
+        return "deepseek", model_id, api_key, "https://api.deepseek.com"
+
+    if "Gemini" in model_name:
+        model_id = "gemini-2.0-flash" if "2.0" in model_name else "gemini-1.5-pro"
+        return "google", model_id, secrets.get("google", {}).get("api_key"), None
+
+    # Default fallback to OpenAI (most reliable)
+    return "openai", "gpt-4o", secrets.get("openai", {}).get("api_key"), None
+
+
+class LLMClientRegistry:
+    """
+    Process-wide provider clients.
+
+    Each SDK client owns an HTTP connection pool, so one client per
+    (provider, key, endpoint) is built and shared by every handler: requests
+    reuse its keep-alive connections instead of opening (and TLS-handshaking)
+    new ones. Failed builds are not cached and are retried on the next request.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, provider: str, model_id: str, api_key: Optional[str], base_url: Optional[str]):
+        if provider == "anthropic":
+            return anthropic.Anthropic(api_key=api_key)
+        if provider == "google":
+            if not api_key:
+                logger.error("Google API key not found")
+                return None
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(model_id)
+        if base_url:
+            return openai.OpenAI(api_key=api_key, base_url=base_url)
+        return openai.OpenAI(api_key=api_key)
+
+    def get(self, model_name: str, secrets: Dict) -> Tuple[str, str, Any]:
+        """(provider, model_id, client) for a display model name; client is None if it cannot be built"""
+        provider, model_id, api_key, base_url = _model_spec(model_name, secrets)
+        # Gemini clients are bound to a model; the others serve every model on their endpoint
+        key = (provider, api_key, base_url, model_id if provider == "google" else None)
+
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    try:
+                        client = self._build(provider, model_id, api_key, base_url)
+                    except Exception as e:
+                        logger.error(f"Error initializing LLM client: {str(e)}")
+                        client = None
+                    if client is not None:
+                        self._clients[key] = client
+        return provider, model_id, client
+
+    def warm(self, model_names: Iterable[str], secrets: Dict):
+        """Build the clients for the given models and run the tool availability checks up front"""
+        for model_name in model_names:
+            self.get(model_name, secrets)
+        BioMCPClient.check_available()
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+llm_clients = LLMClientRegistry()
+
+
 class LLMHandler:
     """Handler for multiple LLM providers"""
     
-    def __init__(self, model_name: str, secrets: Dict):
-        """Initialize LLM handler with selected model"""
+    def __init__(self, model_name: str, secrets: Dict, registry: Optional[LLMClientRegistry] = None):
+        """
+        Initialize LLM handler with selected model.
+
+        Cheap to create per request: the provider client comes from the
+        process-wide registry and the BioMCP availability check is cached.
+        """
         self.model_name = model_name
         self.secrets = secrets
-        self.provider = "openai"  # Default to openai (Anthropic has API issues)
-        self.client = None
-        self.model_id = "claude-3-5-sonnet-latest" 
+        self.registry = registry or llm_clients
         
         # Initialize Google Search API credentials
         self.google_search_api_key = secrets.get("google", {}).get("search_api_key")
@@ -65,76 +158,8 @@ class LLMHandler:
         self._init_client()
     
     def _init_client(self):
-        """Initialize the appropriate client based on model"""
-        try:
-            if "Claude" in self.model_name:
-                self.provider = "anthropic"
-                self.client = anthropic.Anthropic(
-                    api_key=self.secrets.get("anthropic", {}).get("api_key")
-                )
-                if "4.5" in self.model_name:
-                    self.model_id = "claude-sonnet-4-5"
-                else:
-                    self.model_id = "claude-3-5-sonnet-latest"
-                    
-            elif "GPT" in self.model_name or "o3" in self.model_name:
-                self.provider = "openai"
-                self.client = openai.OpenAI(
-                    api_key=self.secrets.get("openai", {}).get("api_key")
-                )
-                if "o3-mini" in self.model_name:
-                    self.model_id = "o3-mini"
-                else:
-                    self.model_id = "gpt-4o"
-                
-            elif "DeepSeek" in self.model_name:
-                self.provider = "deepseek" 
-                api_key = self.secrets.get("deepseek", {}).get("api_key")
-                
-                # Detect OpenRouter key format
-                if api_key and api_key.startswith("sk-or-"):
-                    base_url = "https://openrouter.ai/api/v1"
-                    if "R1" in self.model_name:
-                        self.model_id = "deepseek/deepseek-r1"
-                    else:
-                        self.model_id = "deepseek/deepseek-v3.2"
-                else:
-                    base_url = "https://api.deepseek.com"
-                    if "R1" in self.model_name:
-                        self.model_id = "deepseek-reasoner"
-                    else:
-                        self.model_id = "deepseek-chat"
-                
-                self.client = openai.OpenAI(
-                    api_key=api_key,
-                    base_url=base_url
-                )
-                
-            elif "Gemini" in self.model_name:
-                self.provider = "google"
-                api_key = self.secrets.get("google", {}).get("api_key")
-                if api_key:
-                    genai.configure(api_key=api_key)
-                    if "2.0" in self.model_name:
-                        self.model_id = "gemini-2.0-flash"
-                    else:
-                        self.model_id = "gemini-1.5-pro"
-                    self.client = genai.GenerativeModel(self.model_id)
-                else:
-                    logger.error("Google API key not found")
-                    self.client = None
-                    
-            else:
-                # Default fallback to OpenAI (most reliable)
-                self.provider = "openai"
-                self.client = openai.OpenAI(
-                    api_key=self.secrets.get("openai", {}).get("api_key")
-                )
-                self.model_id = "gpt-4o"
-        except Exception as e:
-            logger.error(f"Error initializing LLM client: {str(e)}")
-            # Set to None if initialization fails
-            self.client = None
+        """Look up the shared client for the selected model"""
+        self.provider, self.model_id, self.client = self.registry.get(self.model_name, self.secrets)
     
     def _create_enhanced_search_query(self, original_query: str, results: list) -> str:
         """
@@ -368,24 +393,27 @@ Content: {content}
 Summary:"""
 
             if self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=self.model_id,
-                    max_tokens=200,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+                with observe_llm(self.provider, self.model_id, "summarize_webpage_content") as call:
+                    response = call.result = self.client.messages.create(
+                        model=self.model_id,
+                        max_tokens=200,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
                 return response.content[0].text.strip()
                 
             elif self.provider == "openai" or self.provider == "deepseek":
-                response = self.client.chat.completions.create(
-                    model=self.model_id,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=200,
-                    temperature=0.3
-                )
+                with observe_llm(self.provider, self.model_id, "summarize_webpage_content") as call:
+                    response = call.result = self.client.chat.completions.create(
+                        model=self.model_id,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=200,
+                        temperature=0.3
+                    )
                 return response.choices[0].message.content.strip()
                 
             elif self.provider == "google":
-                response = self.client.generate_content(prompt)
+                with observe_llm(self.provider, self.model_id, "summarize_webpage_content") as call:
+                    response = call.result = self.client.generate_content(prompt)
                 return response.text.strip()
                 
         except Exception as e:
@@ -539,14 +567,15 @@ Cypher Query:"""
             
             if self.provider == "anthropic" and self.client:
                 # Use type: ignore to bypass static analysis issues
-                response = self.client.messages.create(  # type: ignore
-                    model=self.model_id,
-                    max_tokens=1024,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
+                with observe_llm(self.provider, self.model_id, "generate_cypher") as call:
+                    response = call.result = self.client.messages.create(  # type: ignore
+                        model=self.model_id,
+                        max_tokens=1024,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }]
+                    )
                 if hasattr(response, 'content') and response.content:
                     raw_text = response.content[0].text  # type: ignore
                     if raw_text:
@@ -555,14 +584,15 @@ Cypher Query:"""
                         cypher = ' '.join(cypher.split())
                 
             elif (self.provider == "openai" or self.provider == "deepseek") and self.client:
-                response = self.client.chat.completions.create(  # type: ignore
-                    model=self.model_id,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }],
-                    max_tokens=1024
-                )
+                with observe_llm(self.provider, self.model_id, "generate_cypher") as call:
+                    response = call.result = self.client.chat.completions.create(  # type: ignore
+                        model=self.model_id,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }],
+                        max_tokens=1024
+                    )
                 if hasattr(response, 'choices') and response.choices:
                     content = response.choices[0].message.content
                     if content:
@@ -571,7 +601,8 @@ Cypher Query:"""
                         cypher = ' '.join(cypher.split())
                         
             elif self.provider == "google" and self.client:
-                response = self.client.generate_content(prompt)  # type: ignore
+                with observe_llm(self.provider, self.model_id, "generate_cypher") as call:
+                    response = call.result = self.client.generate_content(prompt)  # type: ignore
                 if hasattr(response, 'text') and response.text:
                     cypher = str(response.text).strip()
                     # Clean up any potential formatting issues
@@ -862,31 +893,34 @@ Format with clear Markdown headers and bullet points.
         try:
             if self.provider == "anthropic" and self.client:
                 # Use type: ignore to bypass static analysis issues
-                response = self.client.messages.create(  # type: ignore
-                    model=self.model_id,
-                    max_tokens=1024,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
+                with observe_llm(self.provider, self.model_id, "generate_summary") as call:
+                    response = call.result = self.client.messages.create(  # type: ignore
+                        model=self.model_id,
+                        max_tokens=1024,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }]
+                    )
                 if hasattr(response, 'content') and response.content:
                     return response.content[0].text  # type: ignore
                     
             elif (self.provider == "openai" or self.provider == "deepseek") and self.client:
-                response = self.client.chat.completions.create(  # type: ignore
-                    model=self.model_id,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }],
-                    max_tokens=1024
-                )
+                with observe_llm(self.provider, self.model_id, "generate_summary") as call:
+                    response = call.result = self.client.chat.completions.create(  # type: ignore
+                        model=self.model_id,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }],
+                        max_tokens=1024
+                    )
                 if hasattr(response, 'choices') and response.choices:
                     return response.choices[0].message.content
                     
             elif self.provider == "google" and self.client:
-                response = self.client.generate_content(prompt)  # type: ignore
+                with observe_llm(self.provider, self.model_id, "generate_summary") as call:
+                    response = call.result = self.client.generate_content(prompt)  # type: ignore
                 if hasattr(response, 'text') and response.text:
                     return response.text
                 
@@ -0,0 +1,617 @@
+"""
+In-process graph backend (GRAPH_BACKEND=memory).
+
+MemoryGraphHandler implements the Neo4jHandler methods the routers and the
+retrieval loader use, over plain Python indexes instead of a database:
+grant records keyed by application_id, grant -> PI / institution / research
+area maps and the reverse name -> grant id sets. Filters and aggregations go
+through the columnar engine's GrantProjection (rebuilt when the data version
+changes), so results follow the same semantics and shapes as the Cypher
+queries.
+
+The graph lives in one process-wide MemoryGraphStore shared by every
+handler, seeded from outcomes.csv on first use. Arbitrary Cypher (LLM
+queries, the collaboration and graph explorers) is not available and raises
+CypherUnavailableError. The async facade runs each call in a worker thread.
+Meant for benchmarks, tests and offline demos without a Neo4j server.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set
+
+from app.config import settings
+from app.utils.analytics_engine import GrantProjection
+from app.utils.bulk_loader import GrantBulkLoader
+from app.utils.graph_backend import CypherUnavailableError
+from app.utils.metrics import instrument_queries
+from app.utils.neo4j_handler import Neo4jQueryBuilder
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryGraphStore:
+    """Grant graph held in dicts, with a GrantProjection snapshot cached per data version"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.grants: Dict[str, Dict[str, Any]] = {}
+        # Grant -> dimension node name (the loader writes at most one of each)
+        self.pi_of: Dict[str, str] = {}
+        self.host_of: Dict[str, str] = {}
+        self.area_of: Dict[str, str] = {}
+        # Dimension node name -> grant ids; a name without grants is not a node
+        self.researcher_grants: Dict[str, Set[str]] = {}
+        self.institution_grants: Dict[str, Set[str]] = {}
+        self.area_grants: Dict[str, Set[str]] = {}
+        self._snapshot: Optional[tuple] = None
+
+    def bump(self) -> int:
+        """Stamp a new data version (strictly increasing millisecond timestamp)"""
+        with self.lock:
+            self.version = max(int(time.time() * 1000), self.version + 1)
+            return self.version
+
+    def clear(self):
+        with self.lock:
+            for index in (self.grants, self.pi_of, self.host_of, self.area_of,
+                          self.researcher_grants, self.institution_grants, self.area_grants):
+                index.clear()
+            self.bump()
+
+    def replace(self, other: "MemoryGraphStore"):
+        """Take over another store's grants and relationships in one step, under a new version"""
+        with self.lock:
+            self.grants, self.pi_of, self.host_of, self.area_of = other.grants, other.pi_of, other.host_of, other.area_of
+            self.researcher_grants = other.researcher_grants
+            self.institution_grants = other.institution_grants
+            self.area_grants = other.area_grants
+            self.bump()
+
+    @staticmethod
+    def _link(index: Dict[str, Set[str]], name: str, grant_id: str):
+        index.setdefault(name, set()).add(grant_id)
+
+    @staticmethod
+    def _unlink_name(index: Dict[str, Set[str]], name: Optional[str], grant_id: str):
+        if name is None or name not in index:
+            return
+        index[name].discard(grant_id)
+        if not index[name]:
+            del index[name]
+
+    def _unlink(self, grant_id: str):
+        """Drop a grant's relationships (and dimension nodes left without grants)"""
+        self._unlink_name(self.researcher_grants, self.pi_of.pop(grant_id, None), grant_id)
+        self._unlink_name(self.institution_grants, self.host_of.pop(grant_id, None), grant_id)
+        self._unlink_name(self.area_grants, self.area_of.pop(grant_id, None), grant_id)
+
+    def upsert(self, rows: List[Dict[str, Any]]):
+        """
+        Write GrantBulkLoader rows: Grant properties as GRANT_QUERY sets them,
+        relationships as the relationship stages create them, plus the
+        denormalized name properties. Records are replaced, never mutated,
+        so snapshots taken earlier stay consistent.
+        """
+        with self.lock:
+            for row in rows:
+                grant_id = row["application_id"]
+                self._unlink(grant_id)
+                institution = row["admin_institution"] or None
+                pi = row["cia_name"] or None
+                area = row["broad_research_area"] or None
+                self.grants[grant_id] = {
+                    "application_id": grant_id,
+                    "title": row["grant_title"],
+                    "amount": row["total_amount"],
+                    "broad_research_area": row["broad_research_area"],
+                    "description": row["plain_description"],
+                    "start_year": row["grant_start_year"],
+                    "grant_status": row["grant_status"],
+                    "grant_type": row["grant_type"],
+                    "funding_body": row["funding_body"],
+                    "field_of_research": row["field_of_research"],
+                    "content_hash": row["content_hash"],
+                    "institution_name": institution,
+                    "institution_name_sort": institution,
+                    "researcher_names": pi,
+                    "pi_name_sort": pi,
+                }
+                if institution:
+                    self.host_of[grant_id] = institution
+                    self._link(self.institution_grants, institution, grant_id)
+                if pi:
+                    self.pi_of[grant_id] = pi
+                    self._link(self.researcher_grants, pi, grant_id)
+                if area:
+                    self.area_of[grant_id] = area
+                    self._link(self.area_grants, area, grant_id)
+
+    def delete(self, grant_ids: List[str]):
+        with self.lock:
+            for grant_id in grant_ids:
+                self._unlink(grant_id)
+                self.grants.pop(grant_id, None)
+
+    def snapshot(self) -> tuple:
+        """(version, projection, records): records[k] is the grant at projection position k"""
+        import pandas as pd
+
+        with self.lock:
+            if self._snapshot is not None and self._snapshot[0] == self.version:
+                return self._snapshot
+
+            started = time.perf_counter()
+            records = list(self.grants.values())
+            columns = ["application_id", "title", "description", "grant_status", "funding_body", "grant_type",
+                       "broad_research_area", "field_of_research", "start_year", "end_year", "amount"]
+            grants = pd.DataFrame.from_records(records, columns=columns)
+            if grants.empty:
+                grants = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+            projection = GrantProjection(
+                grants,
+                pd.DataFrame({"name": pd.Series(list(self.researcher_grants), dtype=object)}),
+                pd.DataFrame({"name": pd.Series(list(self.institution_grants), dtype=object)}),
+                pd.DataFrame({"grant": pd.Series(list(self.pi_of), dtype=object),
+                              "researcher": pd.Series(list(self.pi_of.values()), dtype=object),
+                              "is_pi": pd.Series(True, index=range(len(self.pi_of)), dtype=bool)}),
+                pd.DataFrame({"grant": pd.Series(list(self.host_of), dtype=object),
+                              "institution": pd.Series(list(self.host_of.values()), dtype=object)}),
+            )
+            self._snapshot = (self.version, projection, records)
+            logger.info(f"In-memory graph projection built: {projection.size} grants "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return self._snapshot
+
+
+_store: Optional[MemoryGraphStore] = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryGraphStore:
+    """The process-wide store, seeded from outcomes.csv in the data directory when present"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = MemoryGraphStore()
+            path = os.path.join(settings["data_dir"], "outcomes.csv")
+            if os.path.exists(path):
+                import pandas as pd
+
+                started = time.perf_counter()
+                MemoryGraphHandler(store=store).load_grants_dataframe(pd.read_csv(path))
+                logger.info(f"In-memory graph seeded from {path} in {time.perf_counter() - started:.1f}s")
+            _store = store
+    return _store
+
+
+@instrument_queries
+class MemoryGraphHandler(Neo4jQueryBuilder):
+    """Neo4jHandler stand-in answering the same methods from a MemoryGraphStore"""
+
+    CYPHER_UNAVAILABLE = "Cypher queries are not available on the in-memory graph backend (GRAPH_BACKEND=memory)"
+
+    # Columns of a grants list row, as returned by _grants_list_query
+    GRANT_ROW_COLUMNS = ["title", "pi_name", "institution_name", "grant_status", "amount", "description",
+                         "start_year", "grant_type", "funding_body", "field_of_research", "application_id"]
+
+    # Sort key per GRANT_SORT_FIELDS entry: (record property, value used for nulls)
+    SORT_PROPERTIES = {
+        "title": ("title", ""),
+        "amount": ("amount", -1),
+        "start_year": ("start_year", -1),
+        "funding_body": ("funding_body", ""),
+        "application_id": ("application_id", ""),
+        "pi_name": ("pi_name_sort", ""),
+        "institution_name": ("institution_name_sort", ""),
+        "grant_status": ("grant_status", ""),
+        "grant_type": ("grant_type", ""),
+        "field_of_research": ("field_of_research", ""),
+        "broad_research_area": ("broad_research_area", ""),
+        "description": ("description", ""),
+    }
+
+    def __init__(self, store: Optional[MemoryGraphStore] = None, database: str = "memory",
+                 search_mode: Optional[str] = None):
+        super().__init__(database=database, search_mode=search_mode)
+        self.store = store if store is not None else get_memory_store()
+
+    # -- connection / Cypher surface ---------------------------------------------------------
+
+    def verify_connection(self):
+        logger.info("In-memory graph backend in use")
+
+    def close(self):
+        pass
+
+    def execute_cypher(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+        raise CypherUnavailableError(self.CYPHER_UNAVAILABLE)
+
+    def execute_cypher_df(self, query: str, parameters: Optional[Dict] = None) -> Any:
+        raise CypherUnavailableError(self.CYPHER_UNAVAILABLE)
+
+    def explain_cypher(self, query: str, parameters: Optional[Dict] = None,
+                       timeout: Optional[float] = None) -> Optional[Dict]:
+        raise CypherUnavailableError(self.CYPHER_UNAVAILABLE)
+
+    def stream_cypher(self, query: str, parameters: Optional[Dict] = None, **kwargs) -> Iterator[Dict]:
+        raise CypherUnavailableError(self.CYPHER_UNAVAILABLE)
+
+    def get_schema(self) -> Dict[str, Any]:
+        """Labels, relationship types and property keys present in the store"""
+        store = self.store
+        with store.lock:
+            labels = [label for label, present in (
+                ("Grant", store.grants), ("Researcher", store.researcher_grants),
+                ("Institution", store.institution_grants), ("ResearchArea", store.area_grants),
+                ("FundingBody", any(g["funding_body"] for g in store.grants.values())),
+            ) if present]
+            relationships = [rel for rel, present in (
+                ("PRINCIPAL_INVESTIGATOR", store.pi_of), ("HOSTED_BY", store.host_of), ("IN_AREA", store.area_of),
+            ) if present]
+            properties = sorted(set().union(*(g.keys() for g in store.grants.values())) | {"name"}) \
+                if store.grants else []
+        return {"node_labels": labels, "relationships": relationships, "properties": properties}
+
+    def get_schema_text(self) -> str:
+        schema = self.get_schema()
+        text = "In-memory Graph Schema:\n\nNode Labels:\n"
+        text += "".join(f"  - {label}\n" for label in schema["node_labels"])
+        text += "\nRelationship Types:\n"
+        text += "".join(f"  - {rel}\n" for rel in schema["relationships"])
+        return text
+
+    # -- data version --------------------------------------------------------------------------
+
+    def get_data_version(self) -> str:
+        return str(self.store.version)
+
+    def bump_data_version(self, rollup_current: bool = False) -> Optional[int]:
+        return self.store.bump()
+
+    # -- filtering helpers -----------------------------------------------------------------------
+
+    def _selection(self, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """(projection, records, mask) for the filters; search is matched per term like the contains mode"""
+        _version, projection, records = self.store.snapshot()
+        search_terms = self._search_terms((filters or {}).get("search"))
+        return projection, records, projection.filter_mask(filters, search_terms)
+
+    def _selected_records(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        import numpy as np
+
+        _projection, records, mask = self._selection(filters)
+        return [records[k] for k in np.flatnonzero(mask)]
+
+    def _grant_row(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        A grants list row (see GRANT_ROW_COLUMNS). PI and institution come from
+        the record's denormalized names, so they match the snapshot it was taken from.
+        """
+        row = {col: record.get(col) for col in self.GRANT_ROW_COLUMNS}
+        row["pi_name"] = record.get("researcher_names")
+        return row
+
+    def _sorted_records(self, records: List[Dict[str, Any]], sort_by: str, order: str) -> List[Dict[str, Any]]:
+        """Records in grants grid order (GRANT_SORT_FIELDS; relevance falls back to start_year)"""
+        prop, null_value = self.SORT_PROPERTIES.get(sort_by, ("start_year", -1))
+        return sorted(
+            records,
+            key=lambda g: null_value if g.get(prop) is None else g[prop],
+            reverse=order.upper() == "DESC",
+        )
+
+    # -- analytics -----------------------------------------------------------------------------
+
+    def get_database_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        projection, _records, mask = self._selection(filters)
+        return projection.stats(mask, bool(self._filter_params(filters)))
+
+    def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection, _records, mask = self._selection(filters)
+        return projection.top_institutions(mask, limit)
+
+    def get_funding_trends(self, start_year: int = 2000, end_year: int = 2024,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection, _records, mask = self._selection(filters)
+        return projection.funding_trends(mask, start_year, end_year)
+
+    def get_institution_map_data(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        projection, _records, mask = self._selection(filters)
+        return self._dedupe_funders(projection.institution_map(mask))
+
+    def get_research_area_distribution(self) -> List[Dict]:
+        areas: Dict[str, Dict[str, Any]] = {}
+        with self.store.lock:
+            for grant_id, area in self.store.area_of.items():
+                amount = self.store.grants[grant_id]["amount"]
+                if amount is None or not amount > 0:
+                    continue
+                entry = areas.setdefault(area, {"research_area": area, "grant_count": 0, "total_funding": 0.0})
+                entry["grant_count"] += 1
+                entry["total_funding"] += amount
+        return sorted(areas.values(), key=lambda entry: -entry["grant_count"])
+
+    def get_grants_list(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None,
+                        search: Optional[str] = None, sort_by: str = "start_year",
+                        order: str = "DESC") -> List[Dict]:
+        records = self._sorted_records(self._selected_records(self._with_search(filters, search)), sort_by, order)
+        return [self._grant_row(record) for record in records[skip:skip + limit]]
+
+    def get_grants_frame(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None,
+                         search: Optional[str] = None, sort_by: str = "start_year",
+                         order: str = "DESC") -> Any:
+        import pandas as pd
+
+        rows = self.get_grants_list(limit, skip, filters, search, sort_by, order)
+        return pd.DataFrame(rows, columns=self.GRANT_ROW_COLUMNS)
+
+    def iter_grants_json(self, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None,
+                         sort_by: str = "start_year", order: str = "DESC",
+                         max_rows: Optional[int] = None, fmt: str = "ndjson") -> Iterator[str]:
+        """The full filtered, sorted grants list in the stream_json body format"""
+        limit = self._row_limit(max_rows)
+        records = self._sorted_records(self._selected_records(self._with_search(filters, search)), sort_by, order)
+        truncated = limit is not None and len(records) > limit
+        rows = [self._grant_row(record) for record in (records[:limit] if truncated else records)]
+
+        if fmt == "json":
+            yield '{"rows":['
+            for count, row in enumerate(rows):
+                yield ("," if count else "") + self._json_line(row)
+            yield f'],"count":{len(rows)},"truncated":{"true" if truncated else "false"}}}'
+            return
+        for row in rows:
+            yield self._json_line(row) + "\n"
+        if truncated:
+            yield self._json_line({"_truncated": True, "max_rows": limit}) + "\n"
+
+    def get_grants_page(self, limit: int = 50, cursor: Optional[str] = None,
+                        filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None,
+                        sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """Keyset-paginated grants list, ordered as the Neo4j segments are (nulls smallest)"""
+        sort_order, after, _segments, _start = self._keyset_plan(cursor, sort_by, order)
+        prop = self.KEYSET_SORT_PROPERTIES[sort_by]
+
+        def key(record: Dict[str, Any]) -> tuple:
+            value = record.get(prop)
+            return (0, 0, record["application_id"]) if value is None else (1, value, record["application_id"])
+
+        descending = sort_order == "DESC"
+        records = sorted(self._selected_records(self._with_search(filters, search)), key=key, reverse=descending)
+        if after:
+            bound = (0, 0, after["id"]) if after["null"] else (1, after["value"], after["id"])
+            records = [r for r in records if (key(r) < bound if descending else key(r) > bound)]
+
+        items = [{**self._grant_row(record), "sort_key": record.get(prop)} for record in records[:limit]]
+        return self._keyset_page(items, len(records) > limit, sort_by, sort_order)
+
+    def get_dashboard_data(self, filters: Optional[Dict[str, Any]] = None,
+                           panels: Optional[List[str]] = None,
+                           start_year_min: int = 2000, start_year_max: int = 2030,
+                           institutions_limit: int = 10,
+                           limit: int = 50, skip: int = 0,
+                           sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """The get_dashboard_data panels; trends ignore the start_year filter, as in _dashboard_query"""
+        panels = self._dashboard_panels(panels)
+        if not panels:
+            return {"timings": {}}
+
+        started = time.perf_counter()
+        data: Dict[str, Any] = {}
+        if "stats" in panels:
+            data["stats"] = self.get_database_stats(filters)
+        if "institutions" in panels:
+            data["institutions"] = self.get_top_institutions(institutions_limit, filters)
+        if "trends" in panels:
+            trend_filters = {k: v for k, v in (filters or {}).items() if k != "start_year"}
+            data["trends"] = self.get_funding_trends(start_year_min, start_year_max, trend_filters)
+        if "map" in panels:
+            data["map"] = self.get_institution_map_data(filters)
+        if "grants" in panels:
+            data["grants"] = self.get_grants_list(limit, skip, filters, None, sort_by, order)
+        data["timings"] = {"query_ms": round((time.perf_counter() - started) * 1000, 2)}
+        return data
+
+    def get_filter_options(self) -> Dict[str, List[str]]:
+        with self.store.lock:
+            grants = list(self.store.grants.values())
+            institutions = sorted(self.store.institution_grants)
+        options = {}
+        for prop, _label in self.FILTER_OPTION_PROPERTIES:
+            values = sorted({g[prop] for g in grants if g.get(prop) is not None})
+            options[prop] = [str(value) for value in values[:self.FACET_LIMIT] if value]
+        options["institution"] = institutions[:self.FACET_LIMIT]
+        return options
+
+    def get_facets(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
+        """Facet values with grant counts and funding over the filtered grants (see _facets_query)"""
+        selected = self._selected_records(filters)
+        record = {}
+        for prop in [prop for prop, _label in self.FILTER_OPTION_PROPERTIES] + ["institution"]:
+            groups: Dict[Any, Dict[str, Any]] = {}
+            for grant in selected:
+                value = grant.get("institution_name" if prop == "institution" else prop)
+                if value is None:
+                    continue
+                entry = groups.setdefault(value, {"value": value, "grant_count": 0, "total_funding": 0.0})
+                entry["grant_count"] += 1
+                entry["total_funding"] += grant["amount"] or 0.0
+            record[f"facet_{prop}"] = [groups[value] for value in sorted(groups)[:self.FACET_LIMIT]]
+        return self._shape_facets(record)
+
+    # -- lookups -------------------------------------------------------------------------------
+
+    def get_grant_by_id(self, application_id: str) -> Dict:
+        grant_id = str(application_id)
+        with self.store.lock:
+            grant = self.store.grants.get(grant_id)
+            if grant is None:
+                return {}
+            pi = self.store.pi_of.get(grant_id)
+            institution = self.store.host_of.get(grant_id)
+            area = self.store.area_of.get(grant_id)
+        return {
+            "g": dict(grant),
+            "pi": {"name": pi} if pi else None,
+            "investigators": [],
+            "i": {"name": institution} if institution else None,
+            "areas": [area] if area else [],
+        }
+
+    def _grants_of(self, index: Dict[str, Set[str]], name: str, key: str, extra: Optional[Dict] = None) -> List[Dict]:
+        """Grants linked to every node whose name CONTAINS `name` (case-sensitive, like Cypher)"""
+        with self.store.lock:
+            return [
+                {"g": dict(self.store.grants[grant_id]), key: {"name": node}, **(extra or {})}
+                for node, grant_ids in index.items() if name in node
+                for grant_id in sorted(grant_ids)
+            ]
+
+    def get_grants_by_researcher(self, researcher_name: str) -> List[Dict]:
+        return self._grants_of(self.store.researcher_grants, researcher_name, "r", {"role": "PRINCIPAL_INVESTIGATOR"})
+
+    def get_grants_by_institution(self, institution_name: str) -> List[Dict]:
+        return self._grants_of(self.store.institution_grants, institution_name, "i")
+
+    def get_grants_by_research_area(self, area_name: str) -> List[Dict]:
+        return self._grants_of(self.store.area_grants, area_name, "a")
+
+    # -- loading -------------------------------------------------------------------------------
+
+    def generation_databases(self) -> List[str]:
+        return []
+
+    def clear_database(self, batch_size: int = 10000):
+        self.store.clear()
+
+    def load_grants_blue_green(self, df: Any, progress_callback=None) -> Dict[str, Any]:
+        """Full reload built in a separate store and swapped in at once (see Neo4jHandler.load_grants_blue_green)"""
+        started = time.perf_counter()
+        records = GrantBulkLoader.prepare_records(df)
+        staged = MemoryGraphStore()
+        staged.upsert(GrantBulkLoader._to_rows(records[records["application_id"] != ""]))
+        self.store.replace(staged)
+        if progress_callback:
+            progress_callback(f"In-memory graph replaced. {len(staged.grants)} grants loaded.")
+        return {"generation": self.store.version, "grants": len(staged.grants),
+                "seconds": round(time.perf_counter() - started, 2)}
+
+    def load_grants_from_dataframe(self, df: Any, progress_callback=None) -> int:
+        """Alias for load_grants_dataframe for compatibility"""
+        return self.load_grants_dataframe(df, progress_callback)
+
+    def load_grants_dataframe(self, df: Any, progress_callback=None) -> int:
+        """Load grants with the bulk loader's typing rules; returns the number of source rows"""
+        if df.empty:
+            return 0
+        records = GrantBulkLoader.prepare_records(df)
+        self.store.upsert(GrantBulkLoader._to_rows(records[records["application_id"] != ""]))
+        self.store.bump()
+        if progress_callback:
+            progress_callback(f"In-memory graph load complete. {len(df)} grants processed.")
+        return len(df)
+
+    def apply_grants_delta(self, df: Any, progress_callback=None) -> Dict[str, Any]:
+        """Write only inserted / updated / deleted grants (see Neo4jHandler.apply_grants_delta)"""
+        started = time.perf_counter()
+        records = GrantBulkLoader.prepare_records(df)
+        records = records[records["application_id"] != ""]
+        with self.store.lock:
+            existing = {grant_id: g.get("content_hash") for grant_id, g in self.store.grants.items()}
+            changed = records[records["application_id"].map(existing.get) != records["content_hash"]]
+            incoming = set(records["application_id"])
+            deleted = [grant_id for grant_id in existing if grant_id not in incoming]
+            inserted = int((~changed["application_id"].isin(existing)).sum())
+            stats = {
+                "inserted": inserted,
+                "updated": len(changed) - inserted,
+                "deleted": len(deleted),
+                "unchanged": len(records) - len(changed),
+            }
+            if len(changed) or deleted:
+                self.store.delete(deleted)
+                self.store.upsert(GrantBulkLoader._to_rows(changed))
+                self.store.bump()
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        if progress_callback:
+            progress_callback(
+                f"In-memory delta load complete: {stats['inserted']} inserted, {stats['updated']} updated, "
+                f"{stats['deleted']} deleted, {stats['unchanged']} unchanged."
+            )
+        return stats
+
+
+class AsyncMemoryGraphHandler:
+    """
+    Coroutine facade over MemoryGraphHandler with the AsyncNeo4jHandler method
+    names. Calls run in a worker thread (snapshot rebuilds and full-list sorts
+    are CPU work), so concurrent requests are not serialized on the event loop.
+    """
+
+    DASHBOARD_PANELS = Neo4jQueryBuilder.DASHBOARD_PANELS
+    frame_to_json = staticmethod(Neo4jQueryBuilder.frame_to_json)
+
+    # Body chunks pulled per worker-thread hop in stream_grants
+    STREAM_BATCH = 1000
+
+    def __init__(self, handler: Optional[MemoryGraphHandler] = None):
+        self.handler = handler or MemoryGraphHandler()
+        self.max_rows = self.handler.max_rows
+
+    async def verify_connection(self):
+        self.handler.verify_connection()
+
+    async def close(self):
+        self.handler.close()
+
+    async def get_schema(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.handler.get_schema)
+
+    async def get_data_version(self) -> str:
+        return self.handler.get_data_version()
+
+    async def get_database_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        return await asyncio.to_thread(self.handler.get_database_stats, filters)
+
+    async def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.handler.get_top_institutions, limit, filters)
+
+    async def get_funding_trends(self, start_year: int = 2000, end_year: int = 2024,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.handler.get_funding_trends, start_year, end_year, filters)
+
+    async def get_institution_map_data(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.handler.get_institution_map_data, filters)
+
+    async def get_grants_list(self, *args, **kwargs) -> List[Dict]:
+        return await asyncio.to_thread(self.handler.get_grants_list, *args, **kwargs)
+
+    async def get_grants_frame(self, *args, **kwargs) -> Any:
+        return await asyncio.to_thread(self.handler.get_grants_frame, *args, **kwargs)
+
+    async def get_grants_page(self, *args, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.handler.get_grants_page, *args, **kwargs)
+
+    async def get_dashboard_data(self, *args, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.handler.get_dashboard_data, *args, **kwargs)
+
+    async def get_filter_options(self) -> Dict[str, List[str]]:
+        return await asyncio.to_thread(self.handler.get_filter_options)
+
+    async def get_facets(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
+        return await asyncio.to_thread(self.handler.get_facets, filters)
+
+    async def stream_grants(self, *args, **kwargs) -> AsyncIterator[str]:
+        chunks = self.handler.iter_grants_json(*args, **kwargs)
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(chunks, self.STREAM_BATCH)))
+            if not batch:
+                return
+            for chunk in batch:
+                yield chunk
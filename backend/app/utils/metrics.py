@@ -0,0 +1,241 @@
+"""
+Prometheus metrics, served at /metrics.
+
+- http_request_duration_seconds: per route template, method and status
+- graph_query_duration_seconds: per handler class and method (@instrument_queries)
+- llm_request_duration_seconds / llm_tokens_total: per provider, model and operation
+- pipeline_stage_duration_seconds: retrieval, load and warm-up stages
+- neo4j_pool_* and analytics_cache_*: read from graph_backend / analytics_cache at scrape time
+
+prometheus_client is optional (pip install prometheus-client); without it
+every helper here is a no-op and /metrics answers 503.
+"""
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    REGISTRY = None
+
+logger = logging.getLogger(__name__)
+
+# Bucket bounds in seconds: sub-millisecond cache hits up to slow Cypher / LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+STAGE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+if REGISTRY is not None:
+    HTTP_LATENCY = Histogram(
+        "http_request_duration_seconds", "HTTP request latency by route template",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS
+    )
+    QUERY_LATENCY = Histogram(
+        "graph_query_duration_seconds", "Graph handler method duration",
+        ["handler", "method", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    LLM_LATENCY = Histogram(
+        "llm_request_duration_seconds", "LLM provider call latency",
+        ["provider", "model", "operation", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    LLM_TOKENS = Counter(
+        "llm_tokens_total", "LLM tokens used",
+        ["provider", "model", "operation", "direction"]
+    )
+    STAGE_LATENCY = Histogram(
+        "pipeline_stage_duration_seconds", "Retrieval / load / warm-up stage duration",
+        ["pipeline", "stage"], buckets=STAGE_BUCKETS
+    )
+
+
+def instrument_queries(cls):
+    """
+    Class decorator: time every public method defined on a graph handler
+    class (sync or async). Generators (streams) and close/verify_connection
+    are left alone.
+    """
+    if REGISTRY is None:
+        return cls
+
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or name in ("close", "verify_connection") or not inspect.isfunction(member):
+            continue
+        if inspect.isgeneratorfunction(member) or inspect.isasyncgenfunction(member):
+            continue
+        setattr(cls, name, _timed(member, cls.__name__, name))
+    return cls
+
+
+def _timed(method, handler: str, name: str):
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                QUERY_LATENCY.labels(handler, name, outcome).observe(time.perf_counter() - started)
+    else:
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                QUERY_LATENCY.labels(handler, name, outcome).observe(time.perf_counter() - started)
+    return timed
+
+
+class LLMCall:
+    """Set .result to the provider response so its token usage is counted"""
+    result: Any = None
+
+
+def _token_usage(response: Any) -> Dict[str, Optional[int]]:
+    """Input/output tokens from an Anthropic, OpenAI-compatible or Gemini response"""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return {
+            "input": getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None),
+            "output": getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None),
+        }
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        return {
+            "input": getattr(usage, "prompt_token_count", None),
+            "output": getattr(usage, "candidates_token_count", None),
+        }
+    return {}
+
+
+@contextmanager
+def observe_llm(provider: str, model: str, operation: str) -> Iterator[LLMCall]:
+    """Time one LLM call and count the tokens of the response assigned to .result"""
+    call = LLMCall()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield call
+        outcome = "ok"
+    finally:
+        if REGISTRY is not None:
+            LLM_LATENCY.labels(provider, model, operation, outcome).observe(time.perf_counter() - started)
+            for direction, tokens in _token_usage(call.result).items():
+                if isinstance(tokens, int):
+                    LLM_TOKENS.labels(provider, model, operation, direction).inc(tokens)
+
+
+class StageTimer:
+    """
+    Times consecutive stages of a pipeline: start("x") ends the previous
+    stage and begins x; finish() ends the last one.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.stage: Optional[str] = None
+        self.started = 0.0
+
+    def start(self, stage: str):
+        self.finish()
+        self.stage = stage
+        self.started = time.perf_counter()
+
+    def finish(self):
+        if self.stage is not None and REGISTRY is not None:
+            STAGE_LATENCY.labels(self.pipeline, self.stage).observe(time.perf_counter() - self.started)
+        self.stage = None
+
+
+_collector = None
+
+
+class _StateCollector:
+    """Pool and cache figures, read when Prometheus scrapes"""
+
+    def collect(self):
+        from app.utils import graph_backend
+        from app.utils.cache import analytics_cache
+
+        in_use = GaugeMetricFamily("neo4j_pool_connections_in_use", "Connections checked out", labels=["pool"])
+        idle = GaugeMetricFamily("neo4j_pool_connections_idle", "Idle pooled connections", labels=["pool"])
+        size = GaugeMetricFamily("neo4j_pool_max_size", "Configured pool size", labels=["pool"])
+        acquisitions = CounterMetricFamily("neo4j_pool_acquisitions", "Connection acquisitions", labels=["pool"])
+        failures = CounterMetricFamily("neo4j_pool_acquisition_failures", "Failed acquisitions", labels=["pool"])
+        wait = GaugeMetricFamily("neo4j_pool_acquire_wait_p95_seconds", "p95 connection acquisition wait (recent window)", labels=["pool"])
+        for name, stats in graph_backend.pool_stats()["pools"].items():
+            p95_ms = stats["acquire_wait_ms"]["p95"]
+            for family, value in ((in_use, stats["in_use"]), (idle, stats["idle"]), (size, stats["max_size"]),
+                                  (acquisitions, stats["acquisitions"]), (failures, stats["acquisition_failures"]),
+                                  (wait, p95_ms / 1000 if p95_ms is not None else None)):
+                if value is not None:
+                    family.add_metric([name], value)
+        yield from (in_use, idle, size, acquisitions, failures, wait)
+
+        cache = analytics_cache.stats()
+        lookups = CounterMetricFamily("analytics_cache_lookups", "Cache lookups by result", labels=["result"])
+        for result in ("memory_hits", "disk_hits", "misses", "coalesced"):
+            lookups.add_metric([result], cache[result])
+        evictions = CounterMetricFamily("analytics_cache_evictions", "Evicted entries", labels=["tier"])
+        evictions.add_metric(["memory"], cache["memory_evictions"])
+        evictions.add_metric(["disk"], cache["disk_evictions"])
+        yield lookups
+        yield evictions
+        yield GaugeMetricFamily("analytics_cache_hit_ratio", "Hits / lookups since start", value=cache["hit_ratio"] or 0)
+        yield GaugeMetricFamily("analytics_cache_memory_entries", "Entries in the memory tier", value=cache["memory_entries"])
+        yield GaugeMetricFamily("analytics_cache_disk_bytes", "Bytes in the disk tier", value=cache["disk_bytes"] or 0)
+
+
+def _route_template(request: Request) -> Optional[str]:
+    """
+    Route template (/api/analytics/grants/{id}) rather than the raw path, to
+    bound label cardinality. Newer FastAPI keeps included routers unflattened,
+    so scope["route"].path lacks the prefix; its effective route context has it.
+    """
+    context = (request.scope.get("fastapi") or {}).get("effective_route_context")
+    return getattr(context, "path", None) or getattr(request.scope.get("route"), "path", None)
+
+
+def add_metrics(app: FastAPI):
+    """Request latency middleware and the /metrics endpoint"""
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        if REGISTRY is None:
+            return Response("prometheus_client is not installed", status_code=503, media_type="text/plain")
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+    if REGISTRY is None:
+        logger.warning("prometheus_client not installed: /metrics disabled")
+        return
+
+    global _collector
+    if _collector is None:
+        _collector = _StateCollector()
+        REGISTRY.register(_collector)
+
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            path = _route_template(request) or "unmatched"
+            if path != "/metrics":
+                HTTP_LATENCY.labels(request.method, path, str(status)).observe(time.perf_counter() - started)
@@ -1,32 +1,1056 @@
-from neo4j import GraphDatabase
-from typing import List, Dict, Any, Optional
+from neo4j import GraphDatabase, Query, READ_ACCESS, WRITE_ACCESS
+from typing import List, Dict, Any, Optional, Iterator
+import json
 import logging
 import time
+from app.config import settings
+from app.utils.rollup_cube import FundingRollupCube, SKETCH_LOG_GAMMA
+from app.utils.bulk_loader import GrantBulkLoader
+from app.utils.metrics import instrument_queries
+from app.utils.statement_stats import TrackedDriver
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class Neo4jHandler:
-    """Handler for Neo4j database operations"""
-    
-    def __init__(self, uri: str, user: str, password: str, database: str = "neo4j"):
-        """Initialize Neo4j connection"""
-        kwargs = {
-            "connection_timeout": 15.0,
-            "max_connection_lifetime": 600,
-            "max_connection_pool_size": 100,
-            "keep_alive": True
-        }
-        self.driver = GraphDatabase.driver(uri, auth=(user, password), **kwargs)
+class Neo4jQueryBuilder:
+    """
+    Cypher construction and result shaping shared by the sync Neo4jHandler
+    and the asyncio AsyncNeo4jHandler. Subclasses own the driver and run
+    the queries built here.
+    """
+
+    # Driver settings shared by the sync and async drivers
+    DRIVER_KWARGS = {
+        "connection_timeout": 15.0,
+        "max_connection_lifetime": 600,
+        "max_connection_pool_size": 100,
+        "keep_alive": True
+    }
+
+    # Lucene full-text index backing the "fulltext" search mode
+    FULLTEXT_INDEX = "grant_fulltext"
+    FULLTEXT_PROPERTIES = [
+        "title", "description", "field_of_research", "broad_research_area",
+        "grant_type", "funding_body", "application_id",
+        "researcher_names", "institution_name"
+    ]
+
+    # Words ignored when splitting a free-text search into terms
+    SEARCH_STOPWORDS = {"and", "or", "&", "with"}
+
+    # Researcher filters that can anchor a query on the Researcher label
+    RESEARCHER_FILTER_KEYS = ["pi_name", "researcher_name", "researcher"]
+
+    # Singleton node stamped by every load path (see bump_data_version);
+    # get_data_version reads it with one lookup on the data_version_key constraint
+    DATA_VERSION_QUERY = "OPTIONAL MATCH (v:DataVersion {key: 'graph'}) RETURN v.version AS version"
+
+    # Millisecond timestamp, but strictly increasing even if two loads land in
+    # the same millisecond or the server clock goes backwards
+    BUMP_DATA_VERSION_QUERY = """
+    MERGE (v:DataVersion {key: 'graph'})
+    SET v.version = CASE WHEN timestamp() > coalesce(v.version, 0) THEN timestamp() ELSE v.version + 1 END,
+        v.updated_at = datetime()
+    RETURN v.version AS version
+    """
+
+    # Stamp that also marks the rollup cube as built for the new version
+    ROLLUP_STAMP = "SET v.rollup_version = v.version"
+
+    # Fallback for graphs loaded before the DataVersion stamp existed
+    LEGACY_DATA_VERSION_QUERY = """
+    CALL { MATCH (g:Grant) RETURN count(g) AS gc }
+    CALL { MATCH (r:Researcher) RETURN count(r) AS rc }
+    RETURN gc, rc
+    """
+
+    # Bookkeeping labels hidden from schema descriptions
+    INTERNAL_LABELS = {"DataVersion", "FundingRollup", "FacetDictionary"}
+
+    # Labels whose nodes belong to a load generation (their `generation` property).
+    # DataVersion.generation names the generation readers see; a blue/green
+    # reload stages the next one beside it and flips the pointer.
+    GENERATION_LABELS = ["Grant", "Researcher", "Institution", "ResearchArea", "FundingBody",
+                         "FundingRollup", "FacetDictionary"]
+
+    # Binds `generation` to the active generation (null on graphs that predate generations)
+    ACTIVE_GENERATION = "CALL { OPTIONAL MATCH (gv:DataVersion {key: 'graph'}) RETURN gv.generation AS generation }"
+
+    # Rollup cube cell a grant belongs to (see refresh_funding_rollup)
+    ROLLUP_KEY_EXPR = (
+        "toString(coalesce(g.start_year, '')) + '|' + coalesce(g.funding_body, '') + '|' + "
+        "coalesce(g.grant_type, '') + '|' + coalesce(g.broad_research_area, '') + '|' + "
+        "coalesce(g.institution_name, '')"
+    )
+
+    # Builds rollup cells from grants with a positive amount; {scope} narrows the grants,
+    # {generation_scope} binds the generation the cells are built for
+    ROLLUP_BUILD_QUERY = """
+    {generation_scope}
+    MATCH (g:Grant)
+    WHERE g.amount IS NOT NULL AND g.amount > 0 AND (generation IS NULL OR g.generation = generation) {scope}
+    WITH generation, g.rollup_key AS key, g.start_year AS start_year, g.funding_body AS funding_body,
+         g.grant_type AS grant_type, g.broad_research_area AS broad_research_area,
+         g.institution_name AS institution,
+         toInteger(ceil(log(g.amount) / $log_gamma)) AS bucket,
+         count(*) AS n, sum(g.amount) AS total
+    ORDER BY bucket
+    WITH generation, key, start_year, funding_body, grant_type, broad_research_area, institution,
+         collect(bucket) AS sketch_keys, collect(n) AS sketch_counts,
+         sum(n) AS grant_count, sum(total) AS total_funding
+    CREATE (:FundingRollup {{key: key, start_year: start_year, funding_body: funding_body,
+                             grant_type: grant_type, broad_research_area: broad_research_area,
+                             institution: institution, grant_count: grant_count,
+                             total_funding: total_funding, sketch_keys: sketch_keys,
+                             sketch_counts: sketch_counts, generation: generation}})
+    """
+
+    # Rollup cells, only when they were built for the current data version
+    ROLLUP_LOAD_QUERY = """
+    MATCH (v:DataVersion {key: 'graph'}) WHERE v.rollup_version = v.version
+    MATCH (c:FundingRollup) WHERE v.generation IS NULL OR c.generation = v.generation
+    RETURN v.version AS version, c.start_year AS start_year, c.funding_body AS funding_body,
+           c.grant_type AS grant_type, c.broad_research_area AS broad_research_area,
+           c.institution AS institution, c.grant_count AS grant_count,
+           c.total_funding AS total_funding, c.sketch_keys AS sketch_keys,
+           c.sketch_counts AS sketch_counts
+    """
+
+    # Unfiltered map rows precomputed on Institution nodes by refresh_institution_summaries,
+    # only when they were built for the current data version
+    INSTITUTION_SUMMARY_QUERY = """
+    MATCH (v:DataVersion {key: 'graph'}) WHERE v.summary_version = v.version
+    MATCH (i:Institution) WHERE i.map_project_count IS NOT NULL
+      AND (v.generation IS NULL OR i.generation = v.generation)
+    RETURN i.name AS institution_name, i.map_total_funding AS total_funding,
+           i.map_project_count AS project_count, i.map_researcher_count AS researcher_count,
+           i.map_top_funders AS raw_funders
+    ORDER BY total_funding DESC
+    LIMIT 100
+    """
+
+    # Dashboard panels the rollup cube can answer
+    ROLLUP_PANELS = ("institutions", "trends")
+
+    # (property, label) pairs offered as filter dropdowns
+    FILTER_OPTION_PROPERTIES = [
+        ("grant_type", "Grant"),
+        ("funding_body", "Grant"),
+        ("broad_research_area", "Grant"),
+        ("field_of_research", "Grant"),
+        ("start_year", "Grant")
+    ]
+
+    # Most values returned per facet (matches the old filter dropdown limit)
+    FACET_LIMIT = 1000
+
+    # Unfiltered facets stored by refresh_facet_dictionary, only when built for the current data version
+    FACET_DICTIONARY_QUERY = """
+    MATCH (v:DataVersion {key: 'graph'}), (f:FacetDictionary {key: 'graph'})
+    WHERE f.version = v.version AND (v.generation IS NULL OR f.generation = v.generation)
+    RETURN f.facets AS facets
+    """
+
+    def __init__(self, database: str = "neo4j", search_mode: Optional[str] = None):
         self.database = database
-        
+        self.search_mode = search_mode or settings.get("search", {}).get("mode", "contains")
+
+        # Streaming defaults (see stream_cypher)
+        cypher_settings = settings.get("cypher", {})
+        self.fetch_size = cypher_settings.get("fetch_size", 1000)
+        self.max_rows = cypher_settings.get("max_rows", 10000)
+        self.timeout = cypher_settings.get("timeout", 30.0)
+
         # Internal cache for version string
         self._version_cache = None
         self._version_expiry = 0
         self._version_ttl = 300 # 5 minutes
-    
+
+        # In-memory rollup cube and the data version it was loaded for
+        self._rollup = None
+        self._rollup_version = None
+
+        # Generation a blue/green reload is staging; while set, this handler's
+        # loader writes and refreshes (and queries) target it instead of the active one
+        self.target_generation: Optional[int] = None
+
+    def _generation_scope(self) -> str:
+        """Cypher clause binding `generation` to the generation this handler reads and writes"""
+        if self.target_generation is not None:
+            return f"WITH {int(self.target_generation)} AS generation"
+        return self.ACTIVE_GENERATION
+
+    @staticmethod
+    def _in_generation(var: str) -> str:
+        """Predicate keeping `var` to the bound generation (everything on unstamped graphs)"""
+        return f"(generation IS NULL OR {var}.generation = generation)"
+
+    def reset_version_cache(self):
+        """Force version re-check on next call"""
+        self._version_cache = None
+        self._version_expiry = 0
+
+    def _cached_version(self) -> Optional[str]:
+        """Legacy count-based version from the last check, while it is still fresh"""
+        if self._version_cache and time.time() < self._version_expiry:
+            return self._version_cache
+        return None
+
+    @staticmethod
+    def _stamped_version(record: Optional[Dict]) -> Optional[str]:
+        """Version string from a DATA_VERSION_QUERY record, None if the graph was never stamped"""
+        if record and record.get("version") is not None:
+            return f"v{record['version']}"
+        return None
+
+    def _store_version(self, record: Optional[Dict]) -> str:
+        """Build and cache the count-based version from a LEGACY_DATA_VERSION_QUERY record"""
+        record = record or {}
+        version = f"g{record.get('gc') or 0}_r{record.get('rc') or 0}"
+        self._version_cache = version
+        self._version_expiry = time.time() + self._version_ttl
+        return version
+
+    def _store_rollup(self, version: str, records: List[Dict]) -> Optional[FundingRollupCube]:
+        """Keep the cube loaded for `version`; no records means the cube is not current"""
+        if records:
+            version = self._stamped_version(records[0]) or version
+        self._rollup = FundingRollupCube(records) if records else None
+        self._rollup_version = version
+        return self._rollup
+
+    def _rollup_panels(self, cube: FundingRollupCube, panels: List[str], filters: Optional[Dict[str, Any]],
+                       start_year_min: int, start_year_max: int, institutions_limit: int) -> Dict[str, Any]:
+        """Dashboard panels answered from the rollup cube (trends ignore start_year, like /trends)"""
+        data: Dict[str, Any] = {}
+        if "institutions" in panels:
+            data["institutions"] = cube.top_institutions(institutions_limit, filters)
+        if "trends" in panels:
+            trend_filters = {k: v for k, v in (filters or {}).items() if k != "start_year"}
+            data["trends"] = cube.funding_trends(start_year_min, start_year_max, trend_filters)
+        return data
+
+    def _row_limit(self, max_rows: Optional[int] = None) -> Optional[int]:
+        """Effective row cap for a stream: the explicit value, else the configured one (0 = none)"""
+        limit = self.max_rows if max_rows is None else max_rows
+        return limit or None
+
+    @staticmethod
+    def _json_line(row: Dict) -> str:
+        """One record as compact JSON; temporal and other driver types fall back to str"""
+        return json.dumps(row, default=str, separators=(",", ":"))
+
+    @staticmethod
+    def _values_to_frame(keys: List[str], values: List[List[Any]]) -> Any:
+        """
+        Build a pandas DataFrame straight from record values (one column per key).
+        Sanitization is done per column: +/-Inf become NaN in float columns,
+        integral columns with nulls become nullable Int64, and only object
+        columns holding nodes/relationships are mapped to property dicts.
+        """
+        import numpy as np
+        import pandas as pd
+        from neo4j.graph import Node, Relationship
+
+        df = pd.DataFrame(values, columns=list(keys))
+        for col in df.columns:
+            series = df[col]
+            if series.dtype.kind == "f":
+                df[col] = series.mask(np.isinf(series))
+            elif series.dtype == object:
+                sample = series.dropna()
+                if not sample.empty and isinstance(sample.iloc[0], (Node, Relationship)):
+                    df[col] = series.map(lambda v: dict(v) if v is not None else None)
+        return df.convert_dtypes(convert_string=False, convert_boolean=False, convert_floating=False)
+
+    @staticmethod
+    def frame_to_json(df: Any) -> str:
+        """
+        Encode a result DataFrame as a JSON array of records using pandas'
+        C encoder. NaN/NA become null; other driver types fall back to str.
+        """
+        return df.to_json(orient="records", double_precision=15, date_format="iso", default_handler=str)
+
+    @staticmethod
+    def _frame_to_arrow(df: Any) -> Any:
+        """Convert a result DataFrame to a pyarrow Table (pyarrow is optional)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Arrow results: pip install pyarrow")
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    @staticmethod
+    def _record_to_dict(record: Any) -> Dict:
+        """Convert a driver record to a JSON-friendly dictionary"""
+        record_dict = {}
+        for key in record.keys():
+            value = record[key]
+
+            # Sanitize floats for JSON compliance
+            if isinstance(value, float):
+                if value != value:  # NaN check
+                    value = None
+                elif value == float('inf') or value == float('-inf'):
+                    value = None
+
+            # Convert Neo4j nodes/relationships to dictionaries
+            if hasattr(value, '__dict__'):
+                record_dict[key] = dict(value)
+            elif hasattr(value, '_properties'):
+                record_dict[key] = dict(value._properties)
+            else:
+                record_dict[key] = value
+        return record_dict
+
+    def _search_terms(self, search: Optional[str]) -> List[str]:
+        """Split a free-text search into lower-cased terms"""
+        import re
+        terms = []
+        for term in re.findall(r"\w+", search or ""):
+            term_lower = term.lower().strip()
+            if term_lower and term_lower not in self.SEARCH_STOPWORDS:
+                terms.append(term_lower)
+        return terms
+
+    def _build_filter_clause(self, filters: Optional[Dict[str, Any]] = None, prefix: str = "g",
+                             skip_keys: Optional[List[str]] = None) -> str:
+        """
+        Helper to build WHERE clause from filters.
+        Every value is referenced as a parameter, so the clause text depends only
+        on which filter keys are present. Use _filter_params for the parameters.
+        """
+        if not filters:
+            return ""
+        
+        clauses = []
+        # Sorted so the same set of keys always yields the same query text
+        for key, value in sorted(filters.items()):
+            if value is None or value == "" or key in (skip_keys or []):
+                continue
+            
+            if key == "institution":
+                # Strict Match (Dropdown)
+                clauses.append(f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE i.name = $institution }}")
+            
+            elif key == "institution_name":
+                # Partial Match (Column Search)
+                clauses.append(f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE toLower(i.name) CONTAINS toLower($institution_name) }}")
+                
+            elif key in self.RESEARCHER_FILTER_KEYS:
+                # Partial Match on Researcher
+                clauses.append(f"EXISTS {{ MATCH ({prefix})<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(p:Researcher) WHERE toLower(p.name) CONTAINS toLower(${key}) }}")
+
+            elif key == "start_year":
+                clauses.append(f"{prefix}.{key} = toInteger($start_year)")
+                
+            elif key == "search":
+                # Every term must match a grant property, a researcher or the institution.
+                # Terms are passed as the $search_terms list (see _filter_params).
+                clauses.append(
+                    f"ALL(t IN $search_terms WHERE "
+                    f"toLower({prefix}.title) CONTAINS t OR toLower({prefix}.description) CONTAINS t OR "
+                    f"toLower({prefix}.application_id) CONTAINS t OR toLower({prefix}.field_of_research) CONTAINS t OR "
+                    f"toLower({prefix}.broad_research_area) CONTAINS t OR toLower({prefix}.grant_type) CONTAINS t OR "
+                    f"toLower({prefix}.funding_body) CONTAINS t OR "
+                    f"EXISTS {{ MATCH ({prefix})<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(p:Researcher) WHERE toLower(p.name) CONTAINS t }} OR "
+                    f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE toLower(i.name) CONTAINS t }})"
+                )
+            
+            elif key in ["title", "grant_status", "funding_body", "application_id", "grant_type", "broad_research_area", "field_of_research", "description"]:
+                 # Generic Partial Match for Text Properties
+                clauses.append(f"toLower({prefix}.{key}) CONTAINS toLower(${key})")
+
+            elif key.isidentifier():
+                # Default Match
+                clauses.append(f"{prefix}.{key} = ${key}")
+        
+        return " AND ".join(clauses) if clauses else ""
+
+    def _filter_params(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Query parameters matching _build_filter_clause"""
+        params = {k: v for k, v in (filters or {}).items() if v is not None and v != ""}
+        if "search" in params:
+            params["search_terms"] = self._search_terms(params.pop("search"))
+        return params
+
+    def _compile_filters(self, filters: Optional[Dict[str, Any]] = None,
+                         conditions: Optional[List[str]] = None) -> tuple:
+        """
+        Compile filters into a Cypher fragment that binds the filtered grants to `g`,
+        plus its parameters.
+
+        The fragment starts from the cheapest anchor available: the Institution
+        name index for an exact institution filter, the Researcher label for a
+        researcher filter, a partial institution name, and otherwise all Grant
+        nodes. `conditions` are extra predicates on `g` (e.g. amount checks).
+        The fragment binds `generation` first and keeps `g` to that load
+        generation (see _generation_scope).
+        """
+        active = {k: v for k, v in (filters or {}).items() if v is not None and v != ""}
+        researcher_key = next((k for k in self.RESEARCHER_FILTER_KEYS if k in active), None)
+
+        if self._uses_fulltext(active):
+            # Binds `score` as well, for relevance ordering
+            anchor_key = "search"
+            match = f"CALL db.index.fulltext.queryNodes('{self.FULLTEXT_INDEX}', $search_query) YIELD node AS g, score"
+        elif "institution" in active:
+            anchor_key = "institution"
+            match = "MATCH (anchor:Institution {name: $institution})<-[:HOSTED_BY]-(g:Grant)"
+        elif researcher_key:
+            anchor_key = researcher_key
+            match = (
+                f"MATCH (anchor:Researcher) WHERE toLower(anchor.name) CONTAINS toLower(${researcher_key})\n"
+                f"        MATCH (anchor)-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant)\n"
+                f"        WITH DISTINCT g, generation"
+            )
+        elif "institution_name" in active:
+            anchor_key = "institution_name"
+            match = (
+                "MATCH (anchor:Institution) WHERE toLower(anchor.name) CONTAINS toLower($institution_name)\n"
+                "        MATCH (anchor)<-[:HOSTED_BY]-(g:Grant)\n"
+                "        WITH DISTINCT g, generation"
+            )
+        else:
+            anchor_key = None
+            match = "MATCH (g:Grant)"
+
+        predicates = [self._in_generation("g")] + list(conditions or [])
+        where_clause = self._build_filter_clause(active, skip_keys=[anchor_key] if anchor_key else None)
+        if where_clause:
+            predicates.append(where_clause)
+
+        fragment = f"{self._generation_scope()}\n        {match}"
+        fragment += f"\n        WHERE {' AND '.join(predicates)}"
+
+        params = self._filter_params(active)
+        if anchor_key == "search":
+            params["search_query"] = self._fulltext_query(params.pop("search_terms"))
+        return fragment, params
+
+    def _uses_fulltext(self, filters: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether the search filter is answered from the full-text index"""
+        search = (filters or {}).get("search")
+        return self.search_mode == "fulltext" and bool(self._search_terms(search))
+
+    @staticmethod
+    def _fulltext_query(terms: List[str]) -> str:
+        """
+        Lucene query requiring every term. Each term matches as a whole word
+        (scored) or as a prefix. Terms are already \\w+ tokens, so no escaping is needed.
+        """
+        return " ".join(f"+({term} {term}*)" for term in terms)
+
+    @staticmethod
+    def _with_search(filters: Optional[Dict[str, Any]], search: Optional[str]) -> Dict[str, Any]:
+        """Copy of filters with the free-text search folded in"""
+        local_filters = (filters or {}).copy()
+        if search:
+            local_filters['search'] = search
+        return local_filters
+
+    # Stats over a collected `grants` list (shared by stats and the dashboard)
+    STATS_SUBQUERIES = """
+            CALL {
+                WITH grants
+                RETURN size(grants) AS stat_grants,
+                       reduce(total = 0.0, g IN grants | total + coalesce(g.amount, 0.0)) AS stat_funding
+            }
+            CALL {
+                WITH grants
+                UNWIND grants AS g
+                MATCH (g)<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
+                RETURN count(DISTINCT r) AS stat_researchers
+            }
+            CALL {
+                WITH grants
+                UNWIND grants AS g
+                MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(r:Researcher)
+                RETURN count(DISTINCT r) AS stat_unique_pi
+            }
+            CALL {
+                WITH grants
+                UNWIND grants AS g
+                MATCH (g)-[:HOSTED_BY]->(i:Institution)
+                RETURN count(DISTINCT i) AS stat_institutions
+            }
+            """
+
+    STATS_RETURN = "stat_grants, stat_funding, stat_researchers, stat_unique_pi, stat_institutions"
+
+    def _stats_query(self, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        Single query for get_database_stats. Unfiltered stats count the
+        nodes of the active generation per label; filtered stats collect the
+        grant set once and aggregate it in subqueries.
+        """
+        grant_source, params = self._compile_filters(filters)
+        if not params:
+            cypher = f"""
+            {self._generation_scope()}
+            CALL {{ WITH generation MATCH (g:Grant) WHERE {self._in_generation("g")} RETURN count(g) AS stat_grants }}
+            CALL {{ WITH generation MATCH (g:Grant) WHERE g.amount IS NOT NULL AND {self._in_generation("g")} RETURN sum(g.amount) AS stat_funding }}
+            CALL {{ WITH generation MATCH (r:Researcher) WHERE {self._in_generation("r")} RETURN count(r) AS stat_researchers }}
+            CALL {{ WITH generation MATCH (r:Researcher)-[:PRINCIPAL_INVESTIGATOR]->() WHERE {self._in_generation("r")} RETURN count(DISTINCT r) AS stat_unique_pi }}
+            CALL {{ WITH generation MATCH (i:Institution) WHERE {self._in_generation("i")} RETURN count(i) AS stat_institutions }}
+            RETURN {self.STATS_RETURN}
+            """
+            return cypher, params
+
+        cypher = f"""
+        {grant_source}
+        WITH collect(g) AS grants
+        {self.STATS_SUBQUERIES}
+        RETURN {self.STATS_RETURN}
+        """
+        return cypher, params
+
+    @staticmethod
+    def _shape_stats(record: Optional[Dict]) -> Dict[str, int]:
+        """Stats dict from a record carrying the STATS_RETURN columns"""
+        record = record or {}
+        total_funding = record.get("stat_funding") or 0
+        return {
+            "grants": record.get("stat_grants") or 0,
+            "researchers": record.get("stat_researchers") or 0,
+            "institutions": record.get("stat_institutions") or 0,
+            "total_funding": 0 if total_funding != total_funding else total_funding,  # NaN check
+            "unique_pi": record.get("stat_unique_pi") or 0,
+        }
+
+    def _top_institutions_query(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """Query for get_top_institutions"""
+        grant_source, params = self._compile_filters(filters, conditions=["g.amount IS NOT NULL", "g.amount > 0"])
+
+        cypher = f"""
+        {grant_source}
+        MATCH (g)-[:HOSTED_BY]->(i:Institution)
+        RETURN i.name as institution,
+               count(g) as grant_count,
+               sum(g.amount) as total_funding
+        ORDER BY total_funding DESC
+        LIMIT $limit
+        """
+
+        params['limit'] = limit
+        return cypher, params
+
+    def _funding_trends_query(self, start_year: int = 2000, end_year: int = 2024,
+                              filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """Query for get_funding_trends"""
+        grant_source, params = self._compile_filters(filters, conditions=[
+            "g.start_year >= $year_min", "g.start_year <= $year_max",
+            "g.amount IS NOT NULL", "g.amount > 0"
+        ])
+
+        cypher = f"""
+        {grant_source}
+        RETURN g.start_year as year,
+               count(g) as grant_count,
+               sum(g.amount) as total_funding,
+               avg(g.amount) as avg_funding,
+               percentileCont(g.amount, 0.5) as median_funding
+        ORDER BY year
+        """
+
+        params.update({
+            'year_min': start_year,
+            'year_max': end_year
+        })
+        return cypher, params
+
+    # Sort expressions for the grants grid (whitelist to prevent injection)
+    GRANT_SORT_FIELDS = {
+        "title": "coalesce(g.title, '')",
+        "amount": "coalesce(g.amount, -1)",
+        "start_year": "coalesce(g.start_year, -1)",
+        "funding_body": "coalesce(g.funding_body, '')",
+        "application_id": "coalesce(g.application_id, '')",
+        "pi_name": "coalesce(g.pi_name_sort, '')",
+        "institution_name": "coalesce(g.institution_name_sort, '')",
+        "grant_status": "coalesce(g.grant_status, '')",
+        "grant_type": "coalesce(g.grant_type, '')",
+        "field_of_research": "coalesce(g.field_of_research, '')",
+        "broad_research_area": "coalesce(g.broad_research_area, '')",
+        "description": "coalesce(g.description, '')"
+    }
+
+    def _grants_list_query(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None,
+                           search: Optional[str] = None, sort_by: str = "start_year", order: str = "DESC") -> tuple:
+        """Query for get_grants_list"""
+        # Ensure search is handled via the smart filter builder
+        local_filters = self._with_search(filters, search)
+
+        grant_source, params = self._compile_filters(local_filters)
+        uses_fulltext = self._uses_fulltext(local_filters)
+
+        # Allowed sort fields to prevent injection
+        sort_field = self.GRANT_SORT_FIELDS.get(sort_by, "g.start_year")
+        if sort_by == "relevance" and uses_fulltext:
+            # Full-text relevance score
+            sort_field = "score"
+        sort_order = "DESC" if order.upper() == "DESC" else "ASC"
+
+        # Filter -> order -> skip/limit -> expand. PI and institution sorts use the
+        # pi_name_sort / institution_name_sort keys denormalized onto each grant.
+        cypher = f"""
+        {grant_source}
+        WITH g{', score' if uses_fulltext else ''}
+        ORDER BY {sort_field} {sort_order}
+        SKIP $skip
+        LIMIT $limit
+        OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
+        OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
+        RETURN g.title as title,
+               pi.name as pi_name,
+               i.name as institution_name,
+               g.grant_status as grant_status,
+               g.amount as amount,
+               g.description as description,
+               g.start_year as start_year,
+               g.grant_type as grant_type,
+               g.funding_body as funding_body,
+               g.field_of_research as field_of_research,
+               g.application_id as application_id
+        """
+
+        params.update({'limit': limit, 'skip': skip})
+        return cypher, params
+
+    # Sort columns usable as keyset (cursor) sort keys -> Grant property
+    KEYSET_SORT_PROPERTIES = {
+        "title": "title",
+        "amount": "amount",
+        "start_year": "start_year",
+        "funding_body": "funding_body",
+        "application_id": "application_id",
+        "grant_status": "grant_status",
+        "grant_type": "grant_type",
+        "field_of_research": "field_of_research",
+        "broad_research_area": "broad_research_area",
+        "description": "description",
+        "pi_name": "pi_name_sort",
+        "institution_name": "institution_name_sort",
+    }
+
+    def _keyset_plan(self, cursor: Optional[str], sort_by: str, order: str) -> tuple:
+        """
+        Validate a get_grants_page request.
+        Returns (sort_order, after, segments, start): the decoded cursor, the
+        segments in page order (nulls are the smallest value) and the index
+        of the segment the page starts in.
+        """
+        if sort_by not in self.KEYSET_SORT_PROPERTIES:
+            raise ValueError(f"Cursor pagination is not supported for sort_by={sort_by}")
+        sort_order = "DESC" if order.upper() == "DESC" else "ASC"
+
+        after = self._decode_cursor(cursor, sort_by, sort_order) if cursor else None
+        segments = ["value", "null"] if sort_order == "DESC" else ["null", "value"]
+        start = segments.index("null" if after and after["null"] else "value") if after else 0
+        return sort_order, after, segments, start
+
+    def _keyset_segment_query(self, filters: Dict[str, Any], prop: str, sort_order: str,
+                              segment: str, after: Optional[Dict[str, Any]], limit: int) -> tuple:
+        """Query for one page of a keyset segment (non-null or null sort keys)"""
+        cmp = "<" if sort_order == "DESC" else ">"
+        if segment == "value":
+            conditions = [f"g.{prop} IS NOT NULL"]
+            if after:
+                # First predicate is a plain range, so the property index can seek on it
+                conditions.append(f"g.{prop} {cmp}= $after_value")
+                conditions.append(f"(g.{prop} {cmp} $after_value OR g.application_id {cmp} $after_id)")
+            order_by = f"g.{prop} {sort_order}, g.application_id {sort_order}"
+        else:
+            conditions = [f"g.{prop} IS NULL"]
+            if after:
+                conditions.append(f"g.application_id {cmp} $after_id")
+            order_by = f"g.application_id {sort_order}"
+
+        grant_source, params = self._compile_filters(filters, conditions=conditions)
+        cypher = f"""
+        {grant_source}
+        WITH g
+        ORDER BY {order_by}
+        LIMIT $limit
+        OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
+        OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
+        RETURN g.title as title,
+               pi.name as pi_name,
+               i.name as institution_name,
+               g.grant_status as grant_status,
+               g.amount as amount,
+               g.description as description,
+               g.start_year as start_year,
+               g.grant_type as grant_type,
+               g.funding_body as funding_body,
+               g.field_of_research as field_of_research,
+               g.application_id as application_id,
+               g.{prop} as sort_key
+        ORDER BY sort_key {sort_order}, application_id {sort_order}
+        """
+        params['limit'] = limit
+        if after:
+            params['after_value'] = after["value"]
+            params['after_id'] = after["id"]
+        return cypher, params
+
+    def _keyset_page(self, items: List[Dict], has_more: bool, sort_by: str, sort_order: str) -> Dict[str, Any]:
+        """Build the get_grants_page response from the collected rows"""
+        next_cursor = None
+        if has_more and items:
+            last = items[-1]
+            next_cursor = self._encode_cursor(sort_by, sort_order, last["sort_key"], last["application_id"])
+        for item in items:
+            item.pop("sort_key", None)
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _encode_cursor(sort_by: str, order: str, value: Any, application_id: str) -> str:
+        """Opaque cursor token for get_grants_page"""
+        import base64
+        import json
+        payload = {"s": sort_by, "o": order, "v": value, "id": application_id, "n": value is None}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_by: str, order: str) -> Dict[str, Any]:
+        """Decode a cursor token, checking it belongs to the requested ordering"""
+        import base64
+        import json
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if payload.get("s") != sort_by or payload.get("o") != order:
+            raise ValueError("Cursor does not match the requested sort order")
+        return {"value": payload.get("v"), "id": payload.get("id"), "null": bool(payload.get("n"))}
+
+    DASHBOARD_PANELS = ("stats", "institutions", "trends", "map", "grants")
+
+    def _dashboard_panels(self, panels: Optional[List[str]] = None) -> List[str]:
+        """Requested dashboard panels, restricted to the known ones"""
+        return [p for p in (panels or self.DASHBOARD_PANELS) if p in self.DASHBOARD_PANELS]
+
+    def _dashboard_query(self, filters: Optional[Dict[str, Any]], panels: List[str],
+                         start_year_min: int, start_year_max: int, institutions_limit: int,
+                         limit: int, skip: int, sort_by: str, order: str) -> tuple:
+        """
+        Query for get_dashboard_data. The filtered grant set is matched once
+        and every panel is a CALL subquery over that set. Trends ignore the
+        start_year filter (like /trends) and use the year range instead. The
+        map panel runs the /map aggregation (_institution_map_body) itself.
+        """
+        local_filters = {k: v for k, v in (filters or {}).items() if v is not None and v != ""}
+        base_filters = {k: v for k, v in local_filters.items() if k != "start_year"}
+        grant_source, params = self._compile_filters(base_filters)
+
+        if "start_year" in local_filters:
+            grants_expr = "[g IN trend_grants WHERE g.start_year = toInteger($start_year)]"
+        else:
+            grants_expr = "trend_grants"
+
+        subqueries = {
+            "stats": self.STATS_SUBQUERIES,
+            "institutions": """
+            CALL {
+                WITH grants
+                UNWIND grants AS g
+                WITH g WHERE g.amount IS NOT NULL AND g.amount > 0
+                MATCH (g)-[:HOSTED_BY]->(i:Institution)
+                WITH i.name AS institution, count(g) AS grant_count, sum(g.amount) AS total_funding
+                ORDER BY total_funding DESC
+                LIMIT $institutions_limit
+                RETURN collect({institution: institution, grant_count: grant_count, total_funding: total_funding}) AS institutions
+            }
+            """,
+            "trends": """
+            CALL {
+                WITH trend_grants
+                UNWIND trend_grants AS g
+                WITH g WHERE g.start_year >= $start_year_min AND g.start_year <= $start_year_max
+                     AND g.amount IS NOT NULL AND g.amount > 0
+                WITH g.start_year AS year,
+                     count(g) AS grant_count,
+                     sum(g.amount) AS total_funding,
+                     avg(g.amount) AS avg_funding,
+                     percentileCont(g.amount, 0.5) AS median_funding
+                ORDER BY year
+                RETURN collect({year: year, grant_count: grant_count, total_funding: total_funding,
+                                avg_funding: avg_funding, median_funding: median_funding}) AS trends
+            }
+            """,
+            "map": self._dashboard_map_subquery(local_filters, params) if "map" in panels else "",
+            "grants": self._dashboard_grants_subquery(sort_by, order),
+        }
+
+        returns = {
+            "stats": self.STATS_RETURN,
+            "institutions": "institutions",
+            "trends": "trends",
+            "map": "map",
+            "grants": "grants_page",
+        }
+
+        cypher = f"""
+        {grant_source}
+        WITH collect(g) AS trend_grants
+        WITH trend_grants, {grants_expr} AS grants
+        {''.join(subqueries[p] for p in panels)}
+        RETURN {', '.join(returns[p] for p in panels)}
+        """
+
+        if "start_year" in local_filters:
+            params['start_year'] = local_filters['start_year']
+        params.update({
+            'start_year_min': start_year_min,
+            'start_year_max': start_year_max,
+            'institutions_limit': institutions_limit,
+            'limit': limit,
+            'skip': skip,
+        })
+        return cypher, params
+
+    def _dashboard_map_subquery(self, filters: Dict[str, Any], params: Dict[str, Any]) -> str:
+        """
+        Map panel subquery for get_dashboard_data: the same aggregation as
+        get_institution_map_data, so the panel and /map agree. Adds its
+        parameters to `params`.
+        """
+        body, map_params = self._institution_map_body(filters)
+        params.update(map_params)
+        # Imports `grants` only so the body's own WITH clauses are not the importing one
+        return f"""
+            CALL {{
+                WITH grants
+                {body}
+                WITH i, total_funding, project_count, researcher_count, raw_funders
+                ORDER BY total_funding DESC
+                LIMIT 100
+                RETURN collect({{institution_name: i.name, total_funding: total_funding,
+                                 project_count: project_count, researcher_count: researcher_count,
+                                 raw_funders: raw_funders}}) AS map
+            }}
+            """
+
+    def _shape_dashboard(self, record: Optional[Dict], panels: List[str],
+                         query_ms: float, summary: Any) -> Dict[str, Any]:
+        """Split the dashboard record into panels and attach query timings"""
+        data: Dict[str, Any] = {}
+        record = record or {}
+        if "stats" in panels:
+            data["stats"] = self._shape_stats(record)
+        if "institutions" in panels:
+            data["institutions"] = record.get("institutions") or []
+        if "trends" in panels:
+            data["trends"] = record.get("trends") or []
+        if "map" in panels:
+            data["map"] = self._dedupe_funders(record.get("map") or [])
+        if "grants" in panels:
+            data["grants"] = record.get("grants_page") or []
+
+        data["timings"] = {
+            "query_ms": round(query_ms, 2),
+            "server_available_ms": summary.result_available_after,
+            "server_consumed_ms": summary.result_consumed_after,
+        }
+        return data
+
+    def _dashboard_grants_subquery(self, sort_by: str, order: str) -> str:
+        """Grants page subquery for get_dashboard_data, mirroring get_grants_list sorting"""
+        sort_field = self.GRANT_SORT_FIELDS.get(sort_by, "g.start_year")
+        sort_order = "DESC" if order.upper() == "DESC" else "ASC"
+
+        page = f"""
+                WITH g
+                ORDER BY {sort_field} {sort_order}
+                SKIP $skip
+                LIMIT $limit
+                OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
+                OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
+                WITH g, pi, i
+                ORDER BY {sort_field} {sort_order}
+            """
+
+        return f"""
+            CALL {{
+                WITH grants
+                UNWIND grants AS g
+                {page}
+                RETURN collect({{
+                    title: g.title,
+                    pi_name: pi.name,
+                    institution_name: i.name,
+                    grant_status: g.grant_status,
+                    amount: g.amount,
+                    description: g.description,
+                    start_year: g.start_year,
+                    grant_type: g.grant_type,
+                    funding_body: g.funding_body,
+                    field_of_research: g.field_of_research,
+                    application_id: g.application_id
+                }}) AS grants_page
+            }}
+            """
+
+    def _institution_map_body(self, filters: Optional[Dict[str, Any]] = None,
+                              institutions: Optional[List[str]] = None) -> tuple:
+        """
+        Per-institution map aggregates in one pass over the filtered grants
+        (those with an amount): funded grant count and total, funders of the
+        largest grants, and distinct researchers. Binds i, total_funding,
+        project_count, researcher_count and raw_funders.
+        `institutions` restricts the pass to those institutions' grants.
+        """
+        if institutions is not None:
+            grant_source = (
+                f"{self._generation_scope()}\n"
+                "        MATCH (anchor:Institution) WHERE anchor.name IN $institutions\n"
+                "        MATCH (anchor)<-[:HOSTED_BY]-(g:Grant)\n"
+                f"        WHERE g.amount IS NOT NULL AND {self._in_generation('g')}"
+            )
+            params = {"institutions": institutions}
+        else:
+            grant_source, params = self._compile_filters(filters, conditions=["g.amount IS NOT NULL"])
+
+        cypher = f"""
+        {grant_source}
+        MATCH (g)-[:HOSTED_BY]->(i:Institution)
+        WITH i, g
+        ORDER BY g.amount DESC
+        WITH i,
+             sum(CASE WHEN g.amount > 0 THEN 1 ELSE 0 END) AS project_count,
+             sum(CASE WHEN g.amount > 0 THEN g.amount ELSE 0 END) AS total_funding,
+             collect(CASE WHEN g.amount > 0 THEN g.funding_body END)[0..50] AS raw_funders,
+             collect(g) AS inst_grants
+        WHERE project_count > 0
+        CALL {{
+            WITH inst_grants
+            UNWIND inst_grants AS g
+            MATCH (g)<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
+            RETURN count(DISTINCT r) AS researcher_count
+        }}
+        WITH i, total_funding, project_count, researcher_count, raw_funders
+        WHERE researcher_count > 0
+        """
+        return cypher, params
+
+    def _institution_map_query(self, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """Query for get_institution_map_data"""
+        body, params = self._institution_map_body(filters)
+        cypher = f"""
+        {body}
+        RETURN i.name as institution_name,
+               total_funding,
+               project_count,
+               researcher_count,
+               raw_funders
+        ORDER BY total_funding DESC
+        LIMIT 100
+        """
+        return cypher, params
+
+    def _facets_query(self, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        Query for get_facets: the filtered grant set is collected once and each
+        facet (FILTER_OPTION_PROPERTIES plus institution) is a CALL subquery
+        counting grants and summing funding per value.
+        """
+        grant_source, params = self._compile_filters(filters)
+
+        subqueries = []
+        for prop, _label in self.FILTER_OPTION_PROPERTIES:
+            subqueries.append(f"""
+            CALL {{
+                WITH grants
+                UNWIND grants AS g
+                WITH g.{prop} AS value, count(*) AS grant_count, sum(coalesce(g.amount, 0.0)) AS total_funding
+                WHERE value IS NOT NULL
+                ORDER BY value
+                LIMIT $facet_limit
+                RETURN collect({{value: value, grant_count: grant_count, total_funding: total_funding}}) AS facet_{prop}
+            }}
+            """)
+        subqueries.append("""
+            CALL {
+                WITH grants
+                UNWIND grants AS g
+                MATCH (g)-[:HOSTED_BY]->(i:Institution)
+                WITH i.name AS value, count(g) AS grant_count, sum(coalesce(g.amount, 0.0)) AS total_funding
+                WHERE value IS NOT NULL
+                ORDER BY value
+                LIMIT $facet_limit
+                RETURN collect({value: value, grant_count: grant_count, total_funding: total_funding}) AS facet_institution
+            }
+            """)
+
+        facets = [prop for prop, _label in self.FILTER_OPTION_PROPERTIES] + ["institution"]
+        cypher = f"""
+        {grant_source}
+        WITH collect(g) AS grants
+        {''.join(subqueries)}
+        RETURN {', '.join(f'facet_{facet}' for facet in facets)}
+        """
+        params['facet_limit'] = self.FACET_LIMIT
+        return cypher, params
+
+    @staticmethod
+    def _shape_facets(record: Optional[Dict]) -> Dict[str, List[Dict]]:
+        """
+        {facet: [{"value", "grant_count", "total_funding"}]} from a facets record.
+        Values are strings, as in get_filter_options; empty values are dropped.
+        """
+        facets = {}
+        for key, entries in (record or {}).items():
+            if not key.startswith("facet_"):
+                continue
+            facets[key[len("facet_"):]] = [
+                {
+                    "value": str(entry["value"]),
+                    "grant_count": entry["grant_count"],
+                    "total_funding": entry["total_funding"] or 0,
+                }
+                for entry in entries or [] if entry["value"] not in ("", None)
+            ]
+        return facets
+
+    @staticmethod
+    def _dedupe_funders(results: List[Dict]) -> List[Dict]:
+        """Replace raw_funders with the first three distinct funders"""
+        for record in results:
+            seen = set()
+            unique_funders = []
+            for funder in record.get('raw_funders', []):
+                if funder and funder not in seen:
+                    unique_funders.append(funder)
+                    seen.add(funder)
+                    if len(unique_funders) >= 3:
+                        break
+            record['top_funders'] = unique_funders
+            # Remove raw field
+            if 'raw_funders' in record:
+                del record['raw_funders']
+                
+        return results
+
+
+
+@instrument_queries
+class Neo4jHandler(Neo4jQueryBuilder):
+    """Handler for Neo4j database operations"""
+
+    def __init__(self, uri: str, user: str, password: str, database: str = "neo4j",
+                 search_mode: Optional[str] = None, driver: Optional[Any] = None):
+        """
+        Initialize Neo4j connection. Pass `driver` to share an existing driver
+        (and its connection pool); the handler then leaves closing it to the owner.
+        Every statement run through the driver is recorded in statement_stats.
+        """
+        super().__init__(database=database, search_mode=search_mode)
+        self._owns_driver = driver is None
+        self.driver = TrackedDriver.wrap(driver or GraphDatabase.driver(uri, auth=(user, password), **self.DRIVER_KWARGS))
+
     def verify_connection(self):
         """Verify database connection"""
         try:
@@ -36,18 +1060,11 @@ class Neo4jHandler:
             logger.error(f"Neo4j connection failed: {str(e)}")
             raise
 
-    
-    def reset_version_cache(self):
-        """Force version re-check on next call"""
-        self._version_cache = None
-        self._version_expiry = 0
-        
     def close(self):
-
-        """Close the driver connection"""
-        if self.driver:
+        """Close the driver connection (only when this handler created it)"""
+        if self.driver and self._owns_driver:
             self.driver.close()
-    
+
     def get_schema(self) -> Dict[str, Any]:
         """
         Get database schema information
@@ -56,7 +1073,7 @@ class Neo4jHandler:
         with self.driver.session(database=self.database) as session:
             # Get node labels
             node_result = session.run("CALL db.labels()")
-            node_labels = [record["label"] for record in node_result]
+            node_labels = [record["label"] for record in node_result if record["label"] not in self.INTERNAL_LABELS]
             
             # Get relationship types
             rel_result = session.run("CALL db.relationshipTypes()")
@@ -106,331 +1123,435 @@ class Neo4jHandler:
         try:
             with self.driver.session(database=self.database) as session:
                 result = session.run(query, parameters or {})  # type: ignore
-                records = []
-                for record in result:
-                    record_dict = {}
-                    for key in record.keys():
-                        value = record[key]
-                        
-                        # Sanitize floats for JSON compliance
-                        if isinstance(value, float):
-                            if value != value:  # NaN check
-                                value = None
-                            elif value == float('inf') or value == float('-inf'):
-                                value = None
-                                
-                        # Convert Neo4j nodes/relationships to dictionaries
-                        if hasattr(value, '__dict__'):
-                            record_dict[key] = dict(value)
-                        elif hasattr(value, '_properties'):
-                            record_dict[key] = dict(value._properties)
-                        else:
-                            record_dict[key] = value
-                    records.append(record_dict)
+                records = [self._record_to_dict(record) for record in result]
                 return records
         except Exception as e:
             logger.error(f"Cypher execution error: {str(e)}")
             logger.error(f"Query: {query}")
             raise
-    
-    def _build_filter_clause(self, filters: Optional[Dict[str, Any]] = None, prefix: str = "g") -> str:
-        """Helper to build WHERE clause from filters"""
-        if not filters:
-            return ""
-        
-        clauses = []
-        for key, value in filters.items():
-            if value is None or value == "":
-                continue
-            
-            if key == "institution":
-                # Strict Match (Dropdown)
-                clauses.append(f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE i.name = $institution }}")
-            
-            elif key == "institution_name":
-                # Partial Match (Column Search)
-                clauses.append(f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE toLower(i.name) CONTAINS toLower($institution_name) }}")
-                
-            elif key in ["pi_name", "researcher_name", "researcher"]:
-                # Partial Match on Researcher
-                clauses.append(f"EXISTS {{ MATCH ({prefix})<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(p:Researcher) WHERE toLower(p.name) CONTAINS toLower(${key}) }}")
 
-            elif key == "start_year":
-                clauses.append(f"{prefix}.{key} = toInteger($start_year)")
-                
-            elif key == "search":
-                import re
-                terms = re.findall(r"\w+", value)
-                
-                search_subclauses = []
-                for term in terms:
-                    term_lower = term.lower().strip()
-                    if not term_lower or term_lower in ["and", "or", "&", "with"]: 
-                        continue
-                    
-                    # Sanitize input for Cypher string injection (basic)
-                    term_clean = term_lower.replace("'", "\\'")
-                    
-                    # 1. Check Grant Properties
-                    grant_check = f"(toLower({prefix}.title) CONTAINS '{term_clean}' OR toLower({prefix}.description) CONTAINS '{term_clean}' OR toLower({prefix}.application_id) CONTAINS '{term_clean}' OR toLower({prefix}.field_of_research) CONTAINS '{term_clean}' OR toLower({prefix}.broad_research_area) CONTAINS '{term_clean}' OR toLower({prefix}.grant_type) CONTAINS '{term_clean}' OR toLower({prefix}.funding_body) CONTAINS '{term_clean}')"
-                    
-                    # 2. Check Researcher Name (via relationship)
-                    pi_check = f"EXISTS {{ MATCH ({prefix})<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(p:Researcher) WHERE toLower(p.name) CONTAINS '{term_clean}' }}"
-                    
-                    # 3. Check Institution Name (via relationship)
-                    inst_check = f"EXISTS {{ MATCH ({prefix})-[:HOSTED_BY]->(i:Institution) WHERE toLower(i.name) CONTAINS '{term_clean}' }}"
-                    
-                    search_subclauses.append(f"({grant_check} OR {pi_check} OR {inst_check})")
-                
-                if search_subclauses:
-                    clauses.append(f"({' AND '.join(search_subclauses)})")
-            
-            elif key in ["title", "grant_status", "funding_body", "application_id", "grant_type", "broad_research_area", "field_of_research", "description"]:
-                 # Generic Partial Match for Text Properties
-                clauses.append(f"toLower({prefix}.{key}) CONTAINS toLower(${key})")
+    def execute_cypher_df(self, query: str, parameters: Optional[Dict] = None) -> Any:
+        """
+        Execute a Cypher query and return a pandas DataFrame, built column-wise
+        from the raw record values (see _values_to_frame)
+        """
+        try:
+            with self.driver.session(database=self.database) as session:
+                result = session.run(query, parameters or {})  # type: ignore
+                keys = result.keys()
+                values = result.values()
+        except Exception as e:
+            logger.error(f"Cypher execution error: {str(e)}")
+            logger.error(f"Query: {query}")
+            raise
+        return self._values_to_frame(keys, values)
+
+    def execute_cypher_arrow(self, query: str, parameters: Optional[Dict] = None) -> Any:
+        """Execute a Cypher query and return a pyarrow Table (requires pyarrow)"""
+        return self._frame_to_arrow(self.execute_cypher_df(query, parameters))
+
+    def explain_cypher(self, query: str, parameters: Optional[Dict] = None,
+                       timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Plan of a query from EXPLAIN (nothing is executed), as the driver's plan dict.
+        Planning is bounded by `timeout` seconds (default: CYPHER_TIMEOUT).
+        """
+        explain = Query(f"EXPLAIN {query}", timeout=timeout if timeout is not None else self.timeout)
+        with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            result = session.run(explain, parameters or {})  # type: ignore
+            return result.consume().plan
+
+    def stream_cypher(self, query: str, parameters: Optional[Dict] = None,
+                      max_rows: Optional[int] = None, fetch_size: Optional[int] = None,
+                      timeout: Optional[float] = None, read_only: bool = False) -> Iterator[Dict]:
+        """
+        Execute a Cypher query and yield records lazily as dictionaries.
+        Records are pulled from the server `fetch_size` at a time. Once
+        `max_rows` records have been yielded (default: CYPHER_MAX_ROWS) the
+        transaction is rolled back, so the rest of the result is never fetched.
+        `timeout` (seconds) is enforced by the server; `read_only` runs the
+        query in a read transaction so writes are refused.
+        """
+        limit = self._row_limit(max_rows)
+        with self.driver.session(database=self.database, fetch_size=fetch_size or self.fetch_size,
+                                 default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS) as session:
+            tx = session.begin_transaction(timeout=timeout)
+            try:
+                result = tx.run(query, parameters or {})  # type: ignore
+                count = 0
+                for record in result:
+                    if limit is not None and count >= limit:
+                        logger.warning(f"Cypher stream stopped at max_rows={limit}")
+                        break
+                    yield self._record_to_dict(record)
+                    count += 1
+                else:
+                    tx.commit()
+            except Exception as e:
+                logger.error(f"Cypher execution error: {str(e)}")
+                logger.error(f"Query: {query}")
+                raise
+            finally:
+                # Rolls back if the stream stopped early or the consumer went away
+                tx.close()
+
+    def ensure_fulltext_index(self):
+        """Create the grant full-text index used by the "fulltext" search mode"""
+        properties = ", ".join(f"g.{prop}" for prop in self.FULLTEXT_PROPERTIES)
+        with self.driver.session(database=self.database) as session:
+            session.run(f"CREATE FULLTEXT INDEX {self.FULLTEXT_INDEX} IF NOT EXISTS FOR (g:Grant) ON EACH [{properties}]")
+        logger.info(f"Full-text index {self.FULLTEXT_INDEX} ensured")
+
+    def ensure_indexes(self):
+        """Create the indexes on properties the loader maintains (sort keys, data version, rollup keys)"""
+        indexes = [
+            "CREATE INDEX grant_pi_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.pi_name_sort)",
+            "CREATE INDEX grant_institution_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.institution_name_sort)",
+            "CREATE CONSTRAINT data_version_key IF NOT EXISTS FOR (v:DataVersion) REQUIRE v.key IS UNIQUE",
+            "CREATE INDEX grant_rollup_key IF NOT EXISTS FOR (g:Grant) ON (g.rollup_key)",
+            "CREATE INDEX funding_rollup_key IF NOT EXISTS FOR (c:FundingRollup) ON (c.key)",
+            "CREATE INDEX grant_funding_body IF NOT EXISTS FOR (g:Grant) ON (g.funding_body)",
+        ]
+        with self.driver.session(database=self.database) as session:
+            for index in indexes:
+                session.run(index)
+
+    def refresh_denormalized_properties(self, application_ids: Optional[List[str]] = None,
+                                        stale_rollup_keys: Optional[List[str]] = None,
+                                        institutions: Optional[List[str]] = None):
+        """
+        Recompute the Grant properties copied from its relationships:
+        researcher_names / institution_name (full-text search) and
+        pi_name_sort / institution_name_sort (grid sorting).
+        Run after PI or institution relationships change. `stale_rollup_keys`
+        and `institutions` scope the rollup and map summary refreshes (see
+        refresh_funding_rollup and refresh_institution_summaries).
+        """
+        # Checked before the rollup refresh bumps the data version
+        if institutions is not None and not self._summaries_current():
+            institutions = None
+
+        scope = "AND g.application_id IN $ids" if application_ids is not None else ""
+        with self.driver.session(database=self.database) as session:
+            session.run(f"""
+                {self._generation_scope()}
+                MATCH (g:Grant)
+                WHERE {self._in_generation("g")} {scope}
+                CALL {{
+                    WITH g
+                    OPTIONAL MATCH (g)<-[rel:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
+                    WITH g, collect(DISTINCT r.name) AS researchers,
+                         min(CASE WHEN type(rel) = 'PRINCIPAL_INVESTIGATOR' THEN r.name END) AS pi_name
+                    OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
+                    WITH g, researchers, pi_name, min(i.name) AS institution
+                    SET g.researcher_names = reduce(s = '', n IN researchers | s + CASE WHEN s = '' THEN '' ELSE '; ' END + n),
+                        g.institution_name = institution,
+                        g.pi_name_sort = pi_name,
+                        g.institution_name_sort = institution
+                }} IN TRANSACTIONS OF 5000 ROWS
+            """, ids=application_ids or [])
+        # institution_name is a rollup dimension; HOSTED_BY feeds the map summaries and facets
+        self.refresh_funding_rollup(application_ids, stale_rollup_keys)
+        self.refresh_institution_summaries(institutions)
+        self.refresh_facet_dictionary()
 
-            else:
-                # Default Match
-                clauses.append(f"{prefix}.{key} = ${key}")
-        
-        return " AND ".join(clauses) if clauses else ""
 
     def get_database_stats(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
         """Get database statistics with optional filtering"""
-        stats = {}
-        where_clause = self._build_filter_clause(filters)
-        where_str = f"WHERE {where_clause}" if where_clause else ""
-        
-        with self.driver.session(database=self.database) as session:
-            # Count grants
-            result = session.run(f"MATCH (g:Grant) {where_str} RETURN count(g) as count", filters or {})
-            record = result.single()
-            stats['grants'] = record['count'] if record else 0
-            
-            # Count researchers
-            # If filtered by grant properties, we need to join researchers to grants
-            if where_clause:
-                researcher_query = f"MATCH (r:Researcher)-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant) {where_str} RETURN count(DISTINCT r) as count"
-            else:
-                researcher_query = "MATCH (r:Researcher) RETURN count(r) as count"
-            result = session.run(researcher_query, filters or {})
-            record = result.single()
-            stats['researchers'] = record['count'] if record else 0
-            
-            # Count institutions
-            if where_clause:
-                institution_query = f"MATCH (g:Grant)-[:HOSTED_BY]->(i:Institution) {where_str} RETURN count(DISTINCT i) as count"
-            else:
-                institution_query = "MATCH (i:Institution) RETURN count(i) as count"
-            result = session.run(institution_query, filters or {})
-            record = result.single()
-            stats['institutions'] = record['count'] if record else 0
-            
-            # Sum total funding
-            result = session.run(f"MATCH (g:Grant) {where_str} {'AND' if where_clause else 'WHERE'} g.amount IS NOT NULL RETURN sum(g.amount) as total", filters or {})
-            record = result.single()
-            total_funding = record['total'] if record and record['total'] is not None else 0
-            # Handle NaN values that can occur with empty result sets
-            stats['total_funding'] = 0 if total_funding != total_funding else total_funding  # NaN check
-
-            # Count unique PIs
-            if where_clause:
-                pi_query = f"MATCH (r:Researcher)-[:PRINCIPAL_INVESTIGATOR]->(g:Grant) {where_str} RETURN count(DISTINCT r) as count"
-            else:
-                pi_query = "MATCH (r:Researcher)-[:PRINCIPAL_INVESTIGATOR]->() RETURN count(DISTINCT r) as count"
-            result = session.run(pi_query, filters or {})
-            record = result.single()
-            stats['unique_pi'] = record['count'] if record else 0
-        
-        return stats
+        cypher, params = self._stats_query(filters)
+        records = self.execute_cypher(cypher, params)
+        return self._shape_stats(records[0] if records else None)
 
     def get_data_version(self) -> str:
-        """Get a version string based on node counts to detect changes"""
-        now = time.time()
-        if self._version_cache and now < self._version_expiry:
-            return self._version_cache
-
+        """
+        Get the version string used to invalidate cached analytics.
+        Reads the stamp written by bump_data_version on every call, so all
+        workers see a reload immediately. Only graphs that were never stamped
+        fall back to node counts, cached per handler for a few minutes.
+        """
         try:
             with self.driver.session(database=self.database) as session:
-                # Optimized count check - metadata based in most Neo4j versions
-                result = session.run("""
-                    MATCH (g:Grant) RETURN count(g) as gc
-                """).single()
-                gc = result['gc'] if result else 0
-                
-                # We mainly care about Grant changes to invalidate analytics
-                # but let's add Researcher for completeness if it's fast
-                result = session.run("MATCH (r:Researcher) RETURN count(r) as rc").single()
-                rc = result['rc'] if result else 0
-                
-                version = f"g{gc}_r{rc}"
-                
-                self._version_cache = version
-                self._version_expiry = now + self._version_ttl
-                return version
+                record = session.run(self.DATA_VERSION_QUERY).single()
+                version = self._stamped_version(dict(record) if record else None)
+                if version:
+                    return version
+
+                cached = self._cached_version()
+                if cached:
+                    return cached
+                record = session.run(self.LEGACY_DATA_VERSION_QUERY).single()
+                return self._store_version(dict(record) if record else None)
         except Exception as e:
             logger.warning(f"Error getting data version: {e}")
             return "error"
 
+    def bump_data_version(self, rollup_current: bool = False) -> Optional[int]:
+        """
+        Stamp a new data version; call after any write that changes analytics results.
+        `rollup_current` marks the rollup cube as built for the new version,
+        otherwise analytics fall back to live queries until it is refreshed.
+        """
+        query = self.BUMP_DATA_VERSION_QUERY
+        if rollup_current:
+            query = query.replace("RETURN", f"{self.ROLLUP_STAMP}\n    RETURN")
+        with self.driver.session(database=self.database) as session:
+            record = session.run(query).single()
+        self.reset_version_cache()
+        version = record["version"] if record else None
+        logger.info(f"Data version bumped to {version}")
+        return version
 
-    
-    def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    def refresh_funding_rollup(self, application_ids: Optional[List[str]] = None,
+                               stale_keys: Optional[List[str]] = None):
         """
-        Get top institutions by funding with optional filtering
+        Rebuild the (:FundingRollup) cube cells and stamp them as current.
+        With application_ids only the cells those grants belonged to before
+        and after the load are recomputed, provided the cube was current
+        beforehand; otherwise the whole cube is rebuilt. `stale_keys` adds the
+        cells of grants that were deleted.
+        The cube is marked stale before any cell is touched, so readers fall
+        back to live queries until bump_data_version re-stamps it. While a
+        blue/green reload stages a generation, that generation's whole cube is
+        built and nothing is stamped; activate_generation stamps it.
         """
-        where_clause = self._build_filter_clause(filters)
-        where_str = f"AND {where_clause}" if where_clause else ""
-        
-        cypher = f"""
-        MATCH (g:Grant)-[:HOSTED_BY]->(i:Institution)
-        WHERE g.amount IS NOT NULL AND g.amount \u003e 0 {where_str}
-        RETURN i.name as institution,
-               count(g) as grant_count,
-               sum(g.amount) as total_funding
-        ORDER BY total_funding DESC
-        LIMIT $limit
+        generation_scope = self._generation_scope()
+        staging = self.target_generation is not None
+        with self.driver.session(database=self.database) as session:
+            if staging:
+                application_ids = None
+            else:
+                record = session.run(
+                    "OPTIONAL MATCH (v:DataVersion {key: 'graph'}) "
+                    "WITH v, v IS NOT NULL AND v.rollup_version = v.version AS current "
+                    "FOREACH (_ IN CASE WHEN v IS NULL THEN [] ELSE [1] END | REMOVE v.rollup_version) "
+                    "RETURN current"
+                ).single()
+                if not (record and record["current"]):
+                    application_ids = None
+
+            if application_ids is None:
+                session.run(f"""
+                    {generation_scope}
+                    MATCH (g:Grant) WHERE {self._in_generation("g")}
+                    CALL {{ WITH g SET g.rollup_key = {self.ROLLUP_KEY_EXPR} }} IN TRANSACTIONS OF 10000 ROWS
+                """)
+                session.run(f"""
+                    {generation_scope}
+                    MATCH (c:FundingRollup) WHERE {self._in_generation("c")}
+                    CALL {{ WITH c DELETE c }} IN TRANSACTIONS OF 10000 ROWS
+                """)
+                session.run(self.ROLLUP_BUILD_QUERY.format(generation_scope=generation_scope, scope=""),
+                            log_gamma=SKETCH_LOG_GAMMA)
+            else:
+                record = session.run(f"""
+                    {generation_scope}
+                    MATCH (g:Grant) WHERE g.application_id IN $ids AND {self._in_generation("g")}
+                    WITH g, g.rollup_key AS old_key
+                    SET g.rollup_key = {self.ROLLUP_KEY_EXPR}
+                    RETURN collect(DISTINCT old_key) + collect(DISTINCT g.rollup_key) AS keys
+                """, ids=application_ids).single()
+                keys = list(set(record["keys"] if record else []) | set(stale_keys or []))
+                session.run(f"""
+                    {generation_scope}
+                    MATCH (c:FundingRollup) WHERE c.key IN $keys AND {self._in_generation("c")}
+                    DELETE c
+                """, keys=keys)
+                session.run(self.ROLLUP_BUILD_QUERY.format(generation_scope=generation_scope,
+                                                           scope="AND g.rollup_key IN $keys"),
+                            keys=keys, log_gamma=SKETCH_LOG_GAMMA)
+
+        if not staging:
+            self.bump_data_version(rollup_current=True)
+        logger.info("Funding rollup cube refreshed")
+
+    def _funding_rollup(self) -> Optional[FundingRollupCube]:
+        """Rollup cube for the current data version, None when it is not built or current"""
+        try:
+            version = self.get_data_version()
+            if version != self._rollup_version:
+                self._store_rollup(version, self.execute_cypher(self.ROLLUP_LOAD_QUERY))
+            return self._rollup
+        except Exception as e:
+            logger.warning(f"Funding rollup unavailable, using live queries: {e}")
+            return None
+
+    def get_top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
-        
-        params = (filters or {}).copy()
-        params['limit'] = limit
+        Get top institutions by funding with optional filtering.
+        Categorical filters are answered from the rollup cube when it is current.
+        """
+        cube = self._funding_rollup() if FundingRollupCube.supports(filters) else None
+        if cube is not None:
+            return cube.top_institutions(limit, filters)
+
+        cypher, params = self._top_institutions_query(limit, filters)
         return self.execute_cypher(cypher, params)
 
     def get_funding_trends(self, start_year: int = 2000, end_year: int = 2024, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
-        Analyze funding trends over time with optional filtering
+        Analyze funding trends over time with optional filtering.
+        Categorical filters are answered from the rollup cube when it is current
+        (median_funding is then a sketch estimate within 1%).
         """
-        where_clause = self._build_filter_clause(filters)
-        where_str = f"AND {where_clause}" if where_clause else ""
-        
-        cypher = f"""
-        MATCH (g:Grant)
-        WHERE g.start_year >= $start_year AND g.start_year <= $end_year
-        AND g.amount IS NOT NULL AND g.amount \u003e 0 {where_str}
-        RETURN g.start_year as year, 
-               count(g) as grant_count,
-               sum(g.amount) as total_funding,
-               avg(g.amount) as avg_funding,
-               percentileCont(g.amount, 0.5) as median_funding
-        ORDER BY year
-        """
-        
-        params = (filters or {}).copy()
-        params.update({
-            'start_year': start_year,
-            'end_year': end_year
-        })
+        cube = self._funding_rollup() if FundingRollupCube.supports(filters) else None
+        if cube is not None:
+            return cube.funding_trends(start_year, end_year, filters)
+
+        cypher, params = self._funding_trends_query(start_year, end_year, filters)
         return self.execute_cypher(cypher, params)
 
     def get_grants_list(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None, sort_by: str = "start_year", order: str = "DESC") -> List[Dict]:
         """Get paginated list of grants with search and dynamic sorting"""
-        # Ensure search is handled via the smart filter builder
-        local_filters = (filters or {}).copy()
-        if search:
-            local_filters['search'] = search
-            
-        where_clause = self._build_filter_clause(local_filters)
-        where_str = f"WHERE {where_clause}" if where_clause else ""
-        
-        # Allowed sort fields to prevent injection
-        allowed_sorts = {
-            "title": "coalesce(g.title, '')",
-            "amount": "coalesce(g.amount, -1)",
-            "start_year": "coalesce(g.start_year, -1)",
-            "funding_body": "coalesce(g.funding_body, '')",
-            "application_id": "coalesce(g.application_id, '')",
-            "pi_name": "coalesce(pi.name, '')",
-            "institution_name": "coalesce(i.name, '')",
-            "grant_status": "coalesce(g.grant_status, '')",
-            "grant_type": "coalesce(g.grant_type, '')",
-            "field_of_research": "coalesce(g.field_of_research, '')",
-            "broad_research_area": "coalesce(g.broad_research_area, '')",
-            "description": "coalesce(g.description, '')"
-        }
-        sort_field = allowed_sorts.get(sort_by, "g.start_year")
-        sort_order = "DESC" if order.upper() == "DESC" else "ASC"
-        
-        # Optimization: Move OPTIONAL MATCH after filtering IF not sorting by related entity
-        sort_requires_rel = sort_by in ["pi_name", "institution_name"]
-        
-        if not sort_requires_rel:
-            cypher = f"""
-            MATCH (g:Grant)
-            {where_str}
-            WITH g
-            ORDER BY {sort_field} {sort_order}
-            SKIP $skip
-            LIMIT $limit
-            OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
-            OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
-            RETURN g.title as title,
-                   pi.name as pi_name,
-                   i.name as institution_name,
-                   g.grant_status as grant_status,
-                   g.amount as amount,
-                   g.description as description,
-                   g.start_year as start_year,
-                   g.grant_type as grant_type,
-                   g.funding_body as funding_body,
-                   g.field_of_research as field_of_research,
-                   g.application_id as application_id
-            """
-        else:
-            # Fallback to slower query if sorting by PI/Institution
-            cypher = f"""
-            MATCH (g:Grant)
-            OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
-            OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
-            WITH g, pi, i
-            {where_str}
-            RETURN g.title as title,
-                   pi.name as pi_name,
-                   i.name as institution_name,
-                   g.grant_status as grant_status,
-                   g.amount as amount,
-                   g.description as description,
-                   g.start_year as start_year,
-                   g.grant_type as grant_type,
-                   g.funding_body as funding_body,
-                   g.field_of_research as field_of_research,
-                   g.application_id as application_id
-            ORDER BY {sort_field} {sort_order}
-            SKIP $skip
-            LIMIT $limit
-            """
-        
-        params = local_filters.copy()
-        params.update({'limit': limit, 'skip': skip, 'search': search})
+        cypher, params = self._grants_list_query(limit, skip, filters, search, sort_by, order)
         return self.execute_cypher(cypher, params)
 
+    def get_grants_page(self, limit: int = 50, cursor: Optional[str] = None,
+                        filters: Optional[Dict[str, Any]] = None, search: Optional[str] = None,
+                        sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """
+        Keyset-paginated grants list. Returns {"items": [...], "next_cursor": str|None}.
+
+        The cursor encodes the last sort key plus application_id as a tie-breaker,
+        so each page is a range seek on the sort property instead of SKIP over the
+        whole prefix. Null sort keys sort as the smallest value (last for DESC,
+        first for ASC) and are paged as a separate segment by application_id.
+        """
+        sort_order, after, segments, start = self._keyset_plan(cursor, sort_by, order)
+        local_filters = self._with_search(filters, search)
+
+        items: List[Dict] = []
+        has_more = False
+        for idx in range(start, len(segments)):
+            remaining = limit - len(items)
+            cypher, params = self._keyset_segment_query(
+                local_filters, self.KEYSET_SORT_PROPERTIES[sort_by], sort_order, segments[idx],
+                after if idx == start else None, remaining + 1
+            )
+            rows = self.execute_cypher(cypher, params)
+            if len(rows) > remaining:
+                items.extend(rows[:remaining])
+                has_more = True
+                break
+            items.extend(rows)
+
+        return self._keyset_page(items, has_more, sort_by, sort_order)
+
+    def get_dashboard_data(self, filters: Optional[Dict[str, Any]] = None,
+                           panels: Optional[List[str]] = None,
+                           start_year_min: int = 2000, start_year_max: int = 2030,
+                           institutions_limit: int = 10,
+                           limit: int = 50, skip: int = 0,
+                           sort_by: str = "start_year", order: str = "DESC") -> Dict[str, Any]:
+        """
+        Compute several analytics panels in a single Cypher execution
+        (see _dashboard_query).
+        """
+        panels = self._dashboard_panels(panels)
+        if not panels:
+            return {"timings": {}}
+
+        # Institutions / trends come from the rollup cube when the filters allow it
+        rollup_data: Dict[str, Any] = {}
+        if set(panels) & set(self.ROLLUP_PANELS) and FundingRollupCube.supports(filters):
+            cube = self._funding_rollup()
+            if cube is not None:
+                started = time.perf_counter()
+                rollup_data = self._rollup_panels(cube, panels, filters, start_year_min,
+                                                  start_year_max, institutions_limit)
+                rollup_ms = (time.perf_counter() - started) * 1000
+                panels = [p for p in panels if p not in rollup_data]
+
+        # Unfiltered, the map panel reads the institution summaries like /map
+        summary_data: Dict[str, Any] = {}
+        if "map" in panels and not self._filter_params(filters):
+            summaries = self.execute_cypher(self.INSTITUTION_SUMMARY_QUERY)
+            if summaries:
+                summary_data["map"] = self._dedupe_funders(summaries)
+                panels = [p for p in panels if p != "map"]
+
+        data: Dict[str, Any] = {"timings": {}}
+        if panels:
+            cypher, params = self._dashboard_query(
+                filters, panels, start_year_min, start_year_max, institutions_limit,
+                limit, skip, sort_by, order
+            )
+
+            started = time.perf_counter()
+            try:
+                with self.driver.session(database=self.database) as session:
+                    result = session.run(cypher, params)  # type: ignore
+                    record = result.single()
+                    summary = result.consume()
+            except Exception as e:
+                logger.error(f"Dashboard query failed: {e}")
+                raise
+            query_ms = (time.perf_counter() - started) * 1000
+            data = self._shape_dashboard(record, panels, query_ms, summary)
+
+        if rollup_data:
+            data.update(rollup_data)
+            data["timings"]["rollup_ms"] = round(rollup_ms, 2)
+        data.update(summary_data)
+        return data
+
     def get_filter_options(self) -> Dict[str, List[str]]:
         """Get unique values for filters"""
         options = {}
-        properties = [
-            ("grant_type", "Grant"),
-            ("funding_body", "Grant"),
-            ("broad_research_area", "Grant"),
-            ("field_of_research", "Grant"),
-            ("start_year", "Grant")
-        ]
-        
+
+        scope = self._generation_scope()
         with self.driver.session(database=self.database) as session:
-            for prop, label in properties:
-                result = session.run(f"MATCH (n:{label}) WHERE n.{prop} IS NOT NULL RETURN DISTINCT n.{prop} as value ORDER BY value LIMIT 1000")
+            for prop, label in self.FILTER_OPTION_PROPERTIES:
+                result = session.run(f"{scope} MATCH (n:{label}) WHERE n.{prop} IS NOT NULL AND {self._in_generation('n')} RETURN DISTINCT n.{prop} as value ORDER BY value LIMIT 1000")
                 options[prop] = [str(record["value"]) for record in result if record["value"]]
-            
+
             # Special case for institutions
-            result = session.run("MATCH (i:Institution) RETURN DISTINCT i.name as value ORDER BY value LIMIT 1000")
+            result = session.run(f"{scope} MATCH (i:Institution) WHERE {self._in_generation('i')} RETURN DISTINCT i.name as value ORDER BY value LIMIT 1000")
             options["institution"] = [record["value"] for record in result if record["value"]]
-            
+
         return options
 
+    def refresh_facet_dictionary(self):
+        """
+        Store the unfiltered facets (values with grant counts and funding) on
+        the generation's (:FacetDictionary) node for the current data version.
+        Run after a load has bumped the data version.
+        """
+        cypher, params = self._facets_query()
+        records = self.execute_cypher(cypher, params)
+        facets = self._shape_facets(records[0] if records else None)
+        with self.driver.session(database=self.database) as session:
+            session.run(f"""
+                {self._generation_scope()}
+                MATCH (v:DataVersion {{key: 'graph'}})
+                MERGE (f:FacetDictionary {{key: 'graph', generation: generation}})
+                SET f.facets = $facets, f.version = v.version
+            """, facets=json.dumps(facets))
+        logger.info("Facet dictionary refreshed")
+
+    def get_facets(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
+        """
+        Filter facets for the current filter set: each facet's values with the
+        number of matching grants and their total funding, in one query.
+        Values without matching grants are omitted. Unfiltered requests read
+        the facet dictionary stored at load time when it is current.
+        """
+        if not self._filter_params(filters):
+            records = self.execute_cypher(self.FACET_DICTIONARY_QUERY)
+            if records and records[0].get("facets"):
+                return json.loads(records[0]["facets"])
+
+        cypher, params = self._facets_query(filters)
+        records = self.execute_cypher(cypher, params)
+        return self._shape_facets(records[0] if records else None)
+
     def get_research_area_distribution(self) -> List[Dict]:
         """
         Get distribution of grants across research areas
         """
-        cypher = """
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
         MATCH (g:Grant)-[:IN_AREA]->(a:ResearchArea)
-        WHERE g.amount IS NOT NULL AND g.amount > 0
+        WHERE g.amount IS NOT NULL AND g.amount > 0 AND {self._in_generation("g")}
         RETURN a.name as research_area,
                count(g) as grant_count,
                sum(g.amount) as total_funding
@@ -444,9 +1565,11 @@ class Neo4jHandler:
         Perform vector similarity search
         Requires vector index to be created on Grant nodes
         """
-        cypher = """
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
         CALL db.index.vector.queryNodes('grant_embeddings', $limit, $embedding)
         YIELD node, score
+        WHERE {self._in_generation("node")}
         RETURN node, score
         ORDER BY score DESC
         """
@@ -468,19 +1591,22 @@ class Neo4jHandler:
         if cypher_filter:
             # Combine vector search with Cypher filtering
             cypher = f"""
+            {self.ACTIVE_GENERATION}
             CALL db.index.vector.queryNodes('grant_embeddings', $limit * 3, $embedding)
             YIELD node, score
-            WITH node, score
-            WHERE {cypher_filter}
+            WITH node, score, generation
+            WHERE {self._in_generation("node")} AND ({cypher_filter})
             RETURN node, score
             ORDER BY score DESC
             LIMIT $limit
             """
         else:
             # Just vector search
-            cypher = """
+            cypher = f"""
+            {self.ACTIVE_GENERATION}
             CALL db.index.vector.queryNodes('grant_embeddings', $limit, $embedding)
             YIELD node, score
+            WHERE {self._in_generation("node")}
             RETURN node, score
             ORDER BY score DESC
             """
@@ -496,8 +1622,10 @@ class Neo4jHandler:
     
     def get_grant_by_id(self, application_id: str) -> Dict:
         """Get a specific grant by ID"""
-        cypher = """
-        MATCH (g:Grant {application_id: $id})
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
+        MATCH (g:Grant {{application_id: $id}})
+        WHERE {self._in_generation("g")}
         OPTIONAL MATCH (g)<-[:PRINCIPAL_INVESTIGATOR]-(pi:Researcher)
         OPTIONAL MATCH (g)<-[:INVESTIGATOR]-(inv:Researcher)
         OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
@@ -510,9 +1638,10 @@ class Neo4jHandler:
     
     def get_grants_by_researcher(self, researcher_name: str) -> List[Dict]:
         """Get all grants for a researcher (as PI or investigator)"""
-        cypher = """
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
         MATCH (r:Researcher)-[rel:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant)
-        WHERE r.name CONTAINS $name
+        WHERE r.name CONTAINS $name AND {self._in_generation("g")}
         RETURN g, r, type(rel) as role
         """
         
@@ -520,92 +1649,315 @@ class Neo4jHandler:
     
     def get_grants_by_institution(self, institution_name: str) -> List[Dict]:
         """Get all grants for an institution"""
-        cypher = """
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
         MATCH (g:Grant)-[:HOSTED_BY]->(i:Institution)
-        WHERE i.name CONTAINS $name
+        WHERE i.name CONTAINS $name AND {self._in_generation("g")}
         RETURN g, i
         """
         
         return self.execute_cypher(cypher, {'name': institution_name})
     
+    def _summaries_current(self) -> bool:
+        """Whether the institution map summaries were built for the current data version"""
+        records = self.execute_cypher(
+            "OPTIONAL MATCH (v:DataVersion {key: 'graph'}) "
+            "RETURN v IS NOT NULL AND v.summary_version = v.version AS current"
+        )
+        return bool(records and records[0]["current"])
+
+    def refresh_institution_summaries(self, institutions: Optional[List[str]] = None):
+        """
+        Precompute the unfiltered map row of every institution onto its node
+        (map_total_funding, map_project_count, map_researcher_count,
+        map_top_funders) and stamp them as current for this data version.
+        Run after a load has bumped the data version. With `institutions` only
+        those rows are recomputed; the caller must know the others are current.
+        A generation staged by a blue/green reload is not stamped here (see
+        activate_generation).
+        """
+        body, params = self._institution_map_body(institutions=institutions)
+        scope = "AND i.name IN $institutions" if institutions is not None else ""
+        with self.driver.session(database=self.database) as session:
+            session.run(f"""
+                {self._generation_scope()}
+                MATCH (i:Institution) WHERE i.map_project_count IS NOT NULL AND {self._in_generation("i")} {scope}
+                REMOVE i.map_total_funding, i.map_project_count, i.map_researcher_count, i.map_top_funders
+            """, params)  # type: ignore
+            session.run(f"""
+                {body}
+                SET i.map_total_funding = total_funding,
+                    i.map_project_count = project_count,
+                    i.map_researcher_count = researcher_count,
+                    i.map_top_funders = reduce(top = [], f IN raw_funders |
+                        CASE WHEN f IN top OR size(top) >= 3 THEN top ELSE top + f END)
+            """, params)  # type: ignore
+            if self.target_generation is None:
+                session.run("MATCH (v:DataVersion {key: 'graph'}) SET v.summary_version = v.version")
+        logger.info("Institution map summaries refreshed")
+
     def get_institution_map_data(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
         Get aggregated stats for all institutions for map visualization.
         Returns: list of dicts with name, funding, counts, etc.
+        Unfiltered requests read the precomputed institution summaries when current.
+        Query errors propagate, so a failure is never cached as an empty map.
         """
-        where_clause = self._build_filter_clause(filters)
-        where_str = f"AND {where_clause}" if where_clause else ""
-        
-        # We need to filter the Grants (g) first
-        cypher = f"""
-        MATCH (g:Grant)-[:HOSTED_BY]->(i:Institution)
-        WHERE g.amount IS NOT NULL AND g.amount > 0 {where_str}
-        
-        WITH i, g
-        ORDER BY g.amount DESC
-        
-        WITH i, 
-             count(g) as project_count, 
-             sum(g.amount) as total_funding,
-             collect(g.funding_body)[0..50] as raw_funders
-             
-        MATCH (i)<-[:HOSTED_BY]-(g2:Grant)<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
-        
-        // Apply filters to the second match too? Usually map stats show "filtered view"
-        // But researcher count might be tricky if we don't filter g2.
-        // For consistency, let's filter g2 as well so stats match the dashboard.
-        WHERE g2.amount IS NOT NULL {where_str.replace('g.', 'g2.')}
-        
-        WITH i, project_count, total_funding, raw_funders, count(DISTINCT r) as researcher_count
-        
-        RETURN i.name as institution_name,
-               total_funding,
-               project_count,
-               researcher_count,
-               raw_funders
-        ORDER BY total_funding DESC
-        LIMIT 100
-        """
-        params = (filters or {}).copy()
-        try:
-            results = self.execute_cypher(cypher, params)
-        except Exception as e:
-            logger.error(f"Map data query failed: {e}")
-            return []
-        
-        # Post-process to deduplicate funders
-        for record in results:
-            seen = set()
-            unique_funders = []
-            for funder in record.get('raw_funders', []):
-                if funder and funder not in seen:
-                    unique_funders.append(funder)
-                    seen.add(funder)
-                    if len(unique_funders) >= 3:
-                        break
-            record['top_funders'] = unique_funders
-            # Remove raw field
-            if 'raw_funders' in record:
-                del record['raw_funders']
-                
-        return results
+        if not self._filter_params(filters):
+            results = self.execute_cypher(self.INSTITUTION_SUMMARY_QUERY)
+            if results:
+                return self._dedupe_funders(results)
+
+        cypher, params = self._institution_map_query(filters)
+        results = self.execute_cypher(cypher, params)
+        return self._dedupe_funders(results)
 
     def get_grants_by_research_area(self, area_name: str) -> List[Dict]:
         """Get all grants in a research area"""
-        cypher = """
+        cypher = f"""
+        {self.ACTIVE_GENERATION}
         MATCH (g:Grant)-[:IN_AREA]->(a:ResearchArea)
-        WHERE a.name CONTAINS $name
+        WHERE a.name CONTAINS $name AND {self._in_generation("g")}
         RETURN g, a
         """
         
         return self.execute_cypher(cypher, {'name': area_name})
 
-    def clear_database(self):
-        """Clear all nodes and relationships from the database"""
+    def clear_database(self, batch_size: int = 10000):
+        """
+        Clear all nodes and relationships from the database (the data version node is kept and bumped).
+        Deletes run in batches of `batch_size`, each in its own transaction, so
+        heap use stays bounded however large the graph is.
+        """
         with self.driver.session(database=self.database) as session:
-            # Delete all nodes and relationships
-            session.run("MATCH (n) DETACH DELETE n")
+            # Relationships first, so no single node deletion has to detach a huge fan-out
+            session.run(f"MATCH ()-[r]->() CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF {int(batch_size)} ROWS").consume()
+            session.run(f"""
+                MATCH (n) WHERE NOT n:DataVersion
+                CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+            """).consume()
             logger.info("Neo4j database cleared")
+        self.bump_data_version()
+
+    def generation_databases(self) -> List[str]:
+        """Databases that take turns holding the graph in alias mode (empty when disabled)"""
+        return settings.get("graph", {}).get("generations", [])
+
+    def active_generation(self) -> Optional[int]:
+        """Load generation readers see, None on graphs loaded before generations existed"""
+        records = self.execute_cypher("OPTIONAL MATCH (v:DataVersion {key: 'graph'}) RETURN v.generation AS generation")
+        return records[0]["generation"] if records else None
+
+    def write_generation(self) -> int:
+        """Generation the loader writes: the one being staged, else the active one"""
+        if self.target_generation is not None:
+            return self.target_generation
+        generation = self.active_generation()
+        return 0 if generation is None else generation
+
+    def ensure_generations(self, batch_size: int = 10000):
+        """
+        Move a graph loaded before generations existed into generation 0:
+        every node of GENERATION_LABELS without a generation is stamped in
+        batches, then DataVersion.generation is set. Readers see the whole
+        graph until the pointer is set, and generation 0 after.
+        """
+        if self.active_generation() is not None:
+            return
+        with self.driver.session(database=self.database) as session:
+            for label in self.GENERATION_LABELS:
+                session.run(f"""
+                    MATCH (n:{label}) WHERE n.generation IS NULL
+                    CALL {{ WITH n SET n.generation = 0 }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+                """).consume()
+            session.run("MERGE (v:DataVersion {key: 'graph'}) SET v.generation = 0").consume()
+        logger.info("Existing graph stamped as generation 0")
+
+    def drop_generations(self, keep: int, batch_size: int = 10000):
+        """
+        Delete the nodes of every generation except `keep` (a retired one, or a
+        staging one that was abandoned). Runs in batches of `batch_size`,
+        relationships first, like clear_database.
+        """
+        with self.driver.session(database=self.database) as session:
+            # Every loader relationship has exactly one Grant end
+            session.run(f"""
+                MATCH (g:Grant)-[r]-() WHERE g.generation <> $keep
+                CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+            """, keep=keep).consume()
+            for label in self.GENERATION_LABELS:
+                session.run(f"""
+                    MATCH (n:{label}) WHERE n.generation <> $keep
+                    CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+                """, keep=keep).consume()
+        logger.info(f"Dropped every generation but {keep}")
+
+    def validate_generation(self, generation: int, expected_grants: int) -> Dict[str, int]:
+        """
+        Check a freshly loaded generation before it is activated: every grant
+        is present and its rollup cube and facet dictionary were built.
+        Raises RuntimeError otherwise.
+        """
+        record = self.execute_cypher("""
+            CALL { MATCH (g:Grant) WHERE g.generation = $generation RETURN count(g) AS grants }
+            CALL { MATCH (g:Grant) WHERE g.generation = $generation AND g.amount > 0 RETURN count(g) AS funded }
+            CALL { MATCH (c:FundingRollup) WHERE c.generation = $generation RETURN count(c) AS rollup_cells }
+            CALL {
+                OPTIONAL MATCH (f:FacetDictionary {key: 'graph', generation: $generation})
+                RETURN f IS NOT NULL AS facets_built
+            }
+            RETURN grants, funded, rollup_cells, facets_built
+        """, {"generation": generation})[0]
+        if record["grants"] != expected_grants or expected_grants == 0:
+            raise RuntimeError(f"Staged generation has {record['grants']} grants, expected {expected_grants}")
+        missing = []
+        if record["funded"] and not record["rollup_cells"]:
+            missing.append("rollup cube")
+        if not record["facets_built"]:
+            missing.append("facet dictionary")
+        if missing:
+            raise RuntimeError(f"Staged generation is not ready: no {', '.join(missing)}")
+        return {"grants": record["grants"]}
+
+    # Flips readers to a staged generation under a new data version, marking
+    # the rollup cube, map summaries and facet dictionary built for it as current
+    ACTIVATE_GENERATION_QUERY = """
+    MATCH (v:DataVersion {key: 'graph'})
+    SET v.generation = $generation,
+        v.version = CASE WHEN timestamp() > coalesce(v.version, 0) THEN timestamp() ELSE v.version + 1 END,
+        v.updated_at = datetime()
+    SET v.rollup_version = v.version, v.summary_version = v.version
+    WITH v
+    OPTIONAL MATCH (f:FacetDictionary {key: 'graph', generation: $generation})
+    SET f.version = v.version
+    RETURN v.version AS version
+    """
+
+    def activate_generation(self, generation: int) -> Optional[int]:
+        """Point readers at `generation` in one transaction; returns the new data version"""
+        with self.driver.session(database=self.database) as session:
+            record = session.run(self.ACTIVATE_GENERATION_QUERY, generation=generation).single()
+        self.reset_version_cache()
+        self._rollup = self._rollup_version = None
+        version = record["version"] if record else None
+        logger.info(f"Generation {generation} active at data version {version}")
+        return version
+
+    def load_grants_blue_green(self, df: Any, progress_callback=None) -> Dict[str, Any]:
+        """
+        Full reload without downtime. The grants are loaded as a new generation
+        beside the one readers use (every query keeps to DataVersion.generation),
+        validated, and activated by flipping that pointer in one transaction.
+        Readers see either the old graph or the new one, never a partial load.
+        The old generation is then deleted in batches. Works on Neo4j Community;
+        with NEO4J_GENERATIONS set, uses database aliases instead (see
+        load_grants_alias_swap).
+        Returns {"generation", "grants", "seconds"}.
+        """
+        if self.generation_databases():
+            return self.load_grants_alias_swap(df, progress_callback)
+
+        def report(msg):
+            if progress_callback:
+                try:
+                    progress_callback(msg)
+                except Exception:
+                    pass
+
+        started = time.perf_counter()
+        GrantBulkLoader(self, progress_callback=report).ensure_constraints()
+        active = self.active_generation()
+        report("Neo4j: Removing leftovers of earlier staged generations...")
+        self.drop_generations(keep=active)
+
+        staging = active + 1
+        expected = int((GrantBulkLoader.prepare_records(df)["application_id"] != "").sum())
+        self.target_generation = staging
+        try:
+            self.load_grants_dataframe(df, progress_callback=progress_callback)
+            counts = self.validate_generation(staging, expected)
+        except Exception:
+            report(f"Neo4j: Discarding staged generation {staging}...")
+            self.drop_generations(keep=active)
+            raise
+        finally:
+            self.target_generation = None
+
+        report(f"Neo4j: Activating generation {staging}...")
+        self.activate_generation(staging)
+        report(f"Neo4j: Removing generation {active}...")
+        self.drop_generations(keep=staging)
+        return {"generation": staging, **counts, "seconds": round(time.perf_counter() - started, 2)}
+
+    def alias_target(self) -> Optional[str]:
+        """Database the handler's alias currently points at, None when it is not an alias"""
+        with self.driver.session(database="system") as session:
+            record = session.run(
+                "SHOW ALIASES FOR DATABASE YIELD name, database WHERE name = $alias RETURN database",
+                alias=self.database
+            ).single()
+        return record["database"] if record else None
+
+    def staging_database(self) -> str:
+        """The NEO4J_GENERATIONS database that readers are not using"""
+        generations = self.generation_databases()
+        if len(generations) < 2:
+            raise ValueError("Alias blue/green loads need two databases in NEO4J_GENERATIONS")
+        active = self.alias_target()
+        if active is None:
+            raise ValueError(
+                f"NEO4J_DATABASE ({self.database}) must be a database alias for alias blue/green loads; "
+                f"create it first, e.g. CREATE ALIAS `{self.database}` FOR DATABASE `{generations[0]}`"
+            )
+        return next(name for name in generations if name != active)
+
+    def repoint_alias(self, database: str):
+        """Point the handler's alias at `database`; every new session reads it from then on"""
+        with self.driver.session(database="system") as session:
+            session.run(f"CREATE OR REPLACE ALIAS `{self.database}` FOR DATABASE `{database}`").consume()
+        self.reset_version_cache()
+        logger.info(f"Alias {self.database} now points at {database}")
+
+    def load_grants_alias_swap(self, df: Any, progress_callback=None) -> Dict[str, Any]:
+        """
+        Full reload through database aliases (Neo4j Enterprise, NEO4J_GENERATIONS).
+        NEO4J_DATABASE must already be an alias for one of the two databases.
+        The grants are loaded into the database readers are not using, which is
+        first recreated empty, so the old copy costs no delete transactions.
+        The copy is validated, then the alias is repointed in a single system
+        transaction. The previous database stays as it is until the next reload.
+        Returns {"generation", "grants", "seconds"}.
+        """
+        def report(msg):
+            if progress_callback:
+                try:
+                    progress_callback(msg)
+                except Exception:
+                    pass
+
+        started = time.perf_counter()
+        staging = self.staging_database()
+        report(f"Neo4j: Recreating staging database {staging}...")
+        with self.driver.session(database="system") as session:
+            session.run(f"CREATE OR REPLACE DATABASE `{staging}` WAIT").consume()
+
+        expected = int((GrantBulkLoader.prepare_records(df)["application_id"] != "").sum())
+        alias = self.database
+        # This handler writes to the staging database directly; readers keep using the alias
+        self.database = staging
+        self.reset_version_cache()
+        self._rollup = self._rollup_version = None
+        try:
+            self.load_grants_dataframe(df, progress_callback=progress_callback)
+            counts = self.validate_generation(self.write_generation(), expected)
+        finally:
+            self.database = alias
+            self.reset_version_cache()
+            self._rollup = self._rollup_version = None
+
+        report(f"Neo4j: Repointing {alias} at {staging}...")
+        self.repoint_alias(staging)
+        return {"generation": staging, **counts, "seconds": round(time.perf_counter() - started, 2)}
 
     def load_grants_from_dataframe(self, df: Any, progress_callback=None) -> int:
         """Alias for load_grants_dataframe for compatibility"""
@@ -613,13 +1965,13 @@ class Neo4jHandler:
 
     def load_grants_dataframe(self, df: Any, progress_callback=None) -> int:
         """
-        Load grants into Neo4j using batched UNWIND.
+        Load grants into Neo4j using batched UNWIND (see GrantBulkLoader),
+        then refresh the derived analytics structures.
         Adapted to the Destination Schema:
           - Grant keyed on application_id
           - Organization -> Institution ([:HOSTED_BY])
           - Researcher ([:PRINCIPAL_INVESTIGATOR], [:INVESTIGATOR])
         """
-        import pandas as pd
         if df.empty:
             return 0
 
@@ -630,149 +1982,61 @@ class Neo4jHandler:
                 except Exception:
                     pass
 
-        # Helper to clean strings
-        def _clean(val):
-            if val is None or (isinstance(val, float) and pd.isna(val)):
-                return ""
-            return str(val).strip()
-
-        # Helper to safe float
-        def _to_float_safe(val):
-            s = _clean(val)
-            if not s: return None
-            try:
-                s = s.replace(",", "").replace("$", "").replace(" ", "")
-                return float(s)
-            except: return None
-
-        # Helper to safe int
-        def _to_int_safe(val):
-            s = _clean(val)
-            if not s: return None
-            try:
-                return int(float(s))
-            except: return None
-            
         total = len(df)
         report(f"Loading {total} grants into Neo4j...")
-        
-        # Prepare records
-        records = []
-        for _, row in df.iterrows():
-            records.append({
-                "application_id": _clean(row.get("Application_ID")),
-                "grant_title": _clean(row.get("Grant_Title")),
-                "total_amount": _to_float_safe(row.get("Total_Amount")),
-                "broad_research_area": _clean(row.get("Broad_Research_Area")),
-                "plain_description": _clean(row.get("Plain_Description")),
-                "grant_start_year": _to_int_safe(row.get("Grant_Start_Year")),
-                "grant_status": _clean(row.get("Grant_Status")),
-                "admin_institution": _clean(row.get("Admin_Institution")),
-                "field_of_research": _clean(row.get("Field_of_Research")),
-                "grant_type": _clean(row.get("Grant_Type")),
-                "funding_body": _clean(row.get("Funding_Body")),
-                "cia_name": _clean(row.get("CIA_Name")),
-                "investigators": _clean(row.get("Investigators")),
-            })
 
-        BATCH_SIZE = 2000
-        
-        with self.driver.session(database=self.database) as session:
-            
-            # 1. Dimension Nodes
-            report("Neo4j: Creating dimension nodes...")
-            
-            # Create Institutions
-            unique_institutions = list({r["admin_institution"] for r in records if r["admin_institution"]})
-            for i in range(0, len(unique_institutions), BATCH_SIZE):
-                batch = [{"name": v} for v in unique_institutions[i:i+BATCH_SIZE]]
-                session.run("""
-                    UNWIND $batch AS row
-                    MERGE (i:Institution {name: row.name})
-                """, batch=batch)
-                
-            # Create Researchers (CIA)
-            unique_researchers = list({r["cia_name"] for r in records if r["cia_name"]})
-            for i in range(0, len(unique_researchers), BATCH_SIZE):
-                batch = [{"name": v} for v in unique_researchers[i:i+BATCH_SIZE]]
-                session.run("""
-                    UNWIND $batch AS row
-                    MERGE (r:Researcher {name: row.name})
-                """, batch=batch)
-
-            # Create Funding Bodies (Optional - if node exists provided by old schema)
-            # Schema suggests Funding_Body is a property or separate node. 
-            # In source it was a node. In destination, we might just keep as property or new node.
-            # Let's create node to be safe and rich.
-            unique_funders = list({r["funding_body"] for r in records if r["funding_body"]})
-            for i in range(0, len(unique_funders), BATCH_SIZE):
-                batch = [{"name": v} for v in unique_funders[i:i+BATCH_SIZE]]
-                session.run("""
-                    UNWIND $batch AS row
-                    MERGE (f:FundingBody {name: row.name})
-                """, batch=batch)
-                
-            # Create Broad Research Area (Source has this)
-            unique_broad_areas = list({r["broad_research_area"] for r in records if r["broad_research_area"]})
-            for i in range(0, len(unique_broad_areas), BATCH_SIZE):
-                batch = [{"name": v} for v in unique_broad_areas[i:i+BATCH_SIZE]]
-                session.run("""
-                    UNWIND $batch AS row
-                    MERGE (a:ResearchArea {name: row.name})
-                """, batch=batch)
-
-            # 2. Grant Nodes
-            report("Neo4j: Creating Grant nodes...")
-            for i in range(0, total, BATCH_SIZE):
-                batch = records[i:i+BATCH_SIZE]
-                session.run("""
-                    UNWIND $batch AS row
-                    MERGE (g:Grant {application_id: row.application_id})
-                    SET g.title = row.grant_title,
-                        g.amount = row.total_amount,
-                        g.broad_research_area = row.broad_research_area,
-                        g.description = row.plain_description,
-                        g.start_year = row.grant_start_year,
-                        g.grant_status = row.grant_status,
-                        g.grant_type = row.grant_type,
-                        g.funding_body = row.funding_body,
-                        g.field_of_research = row.field_of_research
-                """, batch=batch)
-                
-            # 3. Relationships
-            report("Neo4j: Creating relationships...")
-            for i in range(0, total, BATCH_SIZE):
-                batch = records[i:i+BATCH_SIZE]
-                
-                # HOSTED_BY (Institution)
-                session.run("""
-                    UNWIND $batch AS row
-                    WITH row WHERE row.admin_institution <> '' AND row.application_id <> ''
-                    MATCH (g:Grant {application_id: row.application_id})
-                    MATCH (i:Institution {name: row.admin_institution})
-                    MERGE (g)-[:HOSTED_BY]->(i)
-                """, batch=batch)
-                
-                # PRINCIPAL_INVESTIGATOR (Researcher)
-                session.run("""
-                    UNWIND $batch AS row
-                    WITH row WHERE row.cia_name <> '' AND row.application_id <> ''
-                    MATCH (g:Grant {application_id: row.application_id})
-                    MATCH (r:Researcher {name: row.cia_name})
-                    MERGE (r)-[:PRINCIPAL_INVESTIGATOR]->(g)
-                """, batch=batch)
-
-                # IN_AREA (ResearchArea)
-                session.run("""
-                    UNWIND $batch AS row
-                    WITH row WHERE row.broad_research_area <> '' AND row.application_id <> ''
-                    MATCH (g:Grant {application_id: row.application_id})
-                    MATCH (a:ResearchArea {name: row.broad_research_area})
-                    MERGE (g)-[:IN_AREA]->(a)
-                """, batch=batch)
+        # Typed columns, constraints, adaptive batches and parallel relationship stages
+        loader = GrantBulkLoader(self, progress_callback=report)
+        application_ids = loader.load(df)
                 
+        if self.search_mode == "fulltext":
+            report("Neo4j: Ensuring full-text search index...")
+            self.ensure_fulltext_index()
+
+        report("Neo4j: Refreshing funding rollup cube...")
+        self.refresh_funding_rollup(application_ids)
+        report("Neo4j: Refreshing institution map summaries...")
+        self.refresh_institution_summaries()
+        self.refresh_facet_dictionary()
         report(f"Neo4j load complete. {total} grants processed.")
         return total
+
+    def apply_grants_delta(self, df: Any, progress_callback=None) -> Dict[str, Any]:
+        """
+        Bring the graph in line with the grants frame by writing only what
+        changed (see GrantBulkLoader.load_delta), then refresh the derived
+        analytics structures for the touched grants and institutions.
+        Returns {"inserted", "updated", "deleted", "unchanged", "seconds"}.
+        Nothing is refreshed, and the data version is kept, when nothing changed.
+        """
+        def report(msg):
+            if progress_callback:
+                try:
+                    progress_callback(msg)
+                except Exception:
+                    pass
+
+        started = time.perf_counter()
+        loader = GrantBulkLoader(self, progress_callback=report)
+        delta = loader.load_delta(df)
+        stats = {key: delta[key] for key in ("inserted", "updated", "deleted", "unchanged")}
+
+        if delta["inserted"] or delta["updated"] or delta["deleted"]:
+            if self.search_mode == "fulltext":
+                self.ensure_fulltext_index()
+            report("Neo4j: Refreshing derived properties, rollup cube and map summaries...")
+            self.refresh_denormalized_properties(
+                delta["application_ids"],
+                stale_rollup_keys=delta["stale_rollup_keys"],
+                institutions=delta["institutions"],
+            )
+
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        report(
+            f"Neo4j delta load complete: {stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, {stats['unchanged']} unchanged."
+        )
+        return stats
     
     def __del__(self):
         """Cleanup on deletion"""
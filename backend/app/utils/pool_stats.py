@@ -0,0 +1,111 @@
+"""
+Connection pool statistics for the app-lifetime Neo4j drivers.
+
+The driver has no public pool API, so PoolMonitor reads the pool's
+connection table defensively (any missing internals just yield None) and
+times connection acquisition by wrapping the pool's acquire method.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor:
+    """Tracks connection acquisition wait and reports pool occupancy for one driver"""
+
+    def __init__(self, driver: Any, name: str, window: int = 1000):
+        self.name = name
+        self.pool = getattr(driver, "_pool", None)
+        self.acquisitions = 0
+        self.failures = 0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._instrument()
+
+    def _record(self, seconds: float, failed: bool):
+        with self._lock:
+            self.acquisitions += 1
+            self.failures += int(failed)
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent.append(seconds)
+
+    def _instrument(self):
+        """Time every acquire call on the pool (sync or async)"""
+        acquire = getattr(self.pool, "acquire", None)
+        if acquire is None:
+            logger.warning(f"Pool monitor ({self.name}): driver pool not found, acquisition wait not tracked")
+            return
+
+        if asyncio.iscoroutinefunction(acquire):
+            async def timed_acquire(*args, **kwargs):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    connection = await acquire(*args, **kwargs)
+                    failed = False
+                    return connection
+                finally:
+                    self._record(time.perf_counter() - started, failed)
+        else:
+            def timed_acquire(*args, **kwargs):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    connection = acquire(*args, **kwargs)
+                    failed = False
+                    return connection
+                finally:
+                    self._record(time.perf_counter() - started, failed)
+
+        self.pool.acquire = timed_acquire
+
+    def _occupancy(self) -> Dict[str, Any]:
+        """In-use / idle connections per server address"""
+        connections = getattr(self.pool, "connections", None)
+        if connections is None:
+            return {"in_use": None, "idle": None, "addresses": {}}
+
+        addresses = {}
+        for address, conns in list(connections.items()):
+            conns = list(conns)
+            in_use = sum(1 for conn in conns if getattr(conn, "in_use", False))
+            addresses[str(address)] = {"in_use": in_use, "idle": len(conns) - in_use}
+        return {
+            "in_use": sum(entry["in_use"] for entry in addresses.values()),
+            "idle": sum(entry["idle"] for entry in addresses.values()),
+            "addresses": addresses,
+        }
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 3) if seconds is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size limits, occupancy and acquisition wait (ms; p95 over the recent window)"""
+        config = getattr(self.pool, "pool_config", None)
+        with self._lock:
+            recent = sorted(self._recent)
+            acquisitions, failures = self.acquisitions, self.failures
+            total_wait, max_wait = self.total_wait, self.max_wait
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else None
+        return {
+            "max_size": getattr(config, "max_connection_pool_size", None),
+            "acquisition_timeout_s": getattr(config, "connection_acquisition_timeout", None),
+            **self._occupancy(),
+            "acquisitions": acquisitions,
+            "acquisition_failures": failures,
+            "acquire_wait_ms": {
+                "avg": self._ms(total_wait / acquisitions) if acquisitions else None,
+                "p95": self._ms(p95),
+                "max": self._ms(max_wait) if acquisitions else None,
+            },
+        }
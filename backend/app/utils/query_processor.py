@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 import logging
 import math
+from app.utils.cypher_guard import CypherGuard
 
 logger = logging.getLogger(__name__)
 
@@ -11,14 +12,16 @@ class QueryProcessor:
     def __init__(self, neo4j_handler, llm_handler):
         self.neo4j = neo4j_handler
         self.llm = llm_handler
+        self.guard = CypherGuard(neo4j_handler)
     
     def process_query(self, natural_query: str, include_search: bool = True) -> dict:
         """
         Process a natural language query through the complete pipeline:
         1. Convert to Cypher using LLM
-        2. Execute against Neo4j
-        3. Format results
-        4. Generate summary and insights
+        2. Check it with the cost guard (EXPLAIN, LIMIT injection)
+        3. Execute against Neo4j in a read transaction with a timeout
+        4. Format results
+        5. Generate summary and insights
         
         Args:
             natural_query: The natural language query
@@ -31,16 +34,29 @@ class QueryProcessor:
             # Step 2: Generate Cypher query
             cypher_query = self.llm.generate_cypher(natural_query, schema_text)
             
-            # Step 3: Execute query
-            results = self.neo4j.execute_cypher(cypher_query)
+            # Step 3: Guard the generated query; raises CypherRejectedError for
+            # plans that must not run, caps the final RETURN with a LIMIT
+            # (one extra row is allowed through to detect truncation)
+            max_rows = self.neo4j.max_rows
+            guard_report = self.guard.check(cypher_query, limit=max_rows + 1 if max_rows else None)
+            cypher_query = guard_report.pop("query")
             
-            # Step 4: Format results for display
+            # Step 4: Execute query, streamed and capped at the configured max_rows
+            results = list(self.neo4j.stream_cypher(
+                cypher_query, max_rows=max_rows + 1 if max_rows else 0,
+                timeout=self.neo4j.timeout, read_only=True
+            ))
+            truncated = bool(max_rows) and len(results) > max_rows
+            if truncated:
+                results = results[:max_rows]
+            
+            # Step 5: Format results for display
             formatted_data = self._format_results(results)
             
-            # Step 5: Generate summary
+            # Step 6: Generate summary
             summary = self.llm.generate_summary(natural_query, results, include_search)
             
-            # Step 6: Extract insights
+            # Step 7: Extract insights
             insights = self.llm.extract_insights(results)
             
 
@@ -52,7 +68,9 @@ class QueryProcessor:
                 'raw_results': results,
                 'summary': summary,
                 'insights': insights,
-                'count': len(results)
+                'count': len(results),
+                'truncated': truncated,
+                'cypher_guard': guard_report
             }
             
             return self._sanitize_response(response)
@@ -95,16 +113,13 @@ class QueryProcessor:
     
     def validate_cypher(self, cypher: str) -> bool:
         """
-        Basic validation of Cypher query
+        Basic validation of Cypher query (no write clauses; see CypherGuard.check
+        for the full plan-based guard)
         """
-        # Check for dangerous operations
-        dangerous_keywords = ['DELETE', 'DROP', 'CREATE CONSTRAINT', 'CREATE INDEX']
-        cypher_upper = cypher.upper()
-        
-        for keyword in dangerous_keywords:
-            if keyword in cypher_upper:
-                logger.warning(f"Dangerous keyword detected: {keyword}")
-                return False
+        keyword = CypherGuard.write_clause(cypher)
+        if keyword:
+            logger.warning(f"Dangerous keyword detected: {keyword}")
+            return False
         
         return True
     
@@ -131,9 +146,10 @@ class QueryProcessor:
         """
         Find similar grants based on research area and keywords
         """
-        cypher = """
-        MATCH (g1:Grant {application_id: $id})-[:IN_AREA]->(a:ResearchArea)<-[:IN_AREA]-(g2:Grant)
-        WHERE g1 <> g2
+        cypher = f"""
+        {self.neo4j.ACTIVE_GENERATION}
+        MATCH (g1:Grant {{application_id: $id}})-[:IN_AREA]->(a:ResearchArea)<-[:IN_AREA]-(g2:Grant)
+        WHERE g1 <> g2 AND (generation IS NULL OR g1.generation = generation)
         RETURN g2, a
         LIMIT $limit
         """
@@ -145,11 +161,13 @@ class QueryProcessor:
         Get collaboration network for a researcher (includes both PIs and investigators)
         Uses case-insensitive partial matching for researcher names
         """
-        cypher = """
+        cypher = f"""
+        {self.neo4j.ACTIVE_GENERATION}
         MATCH (r1:Researcher)-[rel1:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant)
               <-[rel2:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r2:Researcher)
         WHERE r1 <> r2 
           AND toLower(r1.name) CONTAINS toLower($name)
+          AND (generation IS NULL OR g.generation = generation)
         RETURN r1, r2, g, type(rel1) as r1_role, type(rel2) as r2_role
         """
         
@@ -159,9 +177,11 @@ class QueryProcessor:
         """
         Get researcher name suggestions based on partial name match
         """
-        cypher = """
+        cypher = f"""
+        {self.neo4j.ACTIVE_GENERATION}
         MATCH (r:Researcher) 
         WHERE toLower(r.name) CONTAINS toLower($name)
+          AND (generation IS NULL OR r.generation = generation)
         RETURN r.name as name 
         LIMIT $limit
         """
@@ -231,12 +251,14 @@ class QueryProcessor:
             'University of Canberra': {'lat': -35.2386, 'lon': 149.0906, 'city': 'Canberra', 'state': 'ACT'}
         }
         
-        cypher = """
+        cypher = f"""
+        {self.neo4j.ACTIVE_GENERATION}
         MATCH (r1:Researcher)-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]->(g:Grant)
               <-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r2:Researcher)
         MATCH (g)-[:HOSTED_BY]->(i:Institution)
         WHERE r1 <> r2 
           AND toLower(r1.name) CONTAINS toLower($name)
+          AND (generation IS NULL OR g.generation = generation)
         RETURN DISTINCT r2.name as collaborator, i.name as institution, 
                count(g) as collaboration_count
         ORDER BY collaboration_count DESC
@@ -0,0 +1,141 @@
+"""
+In-memory view of the (:FundingRollup) cube maintained by the loader.
+
+Each rollup cell holds the grants with a positive amount that share
+(start_year, funding_body, grant_type, broad_research_area, institution):
+their count, summed amount and a log-bucketed quantile sketch of the
+amounts. Requests whose filters only touch those dimensions are answered
+here with vectorized pandas operations instead of scanning Grant nodes.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+# Relative accuracy of the amount quantile sketch: every amount is counted in
+# bucket ceil(log_gamma(amount)), whose representative value is within 1%.
+SKETCH_ALPHA = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+SKETCH_LOG_GAMMA = math.log(SKETCH_GAMMA)
+
+
+class FundingRollupCube:
+    """Funding rollup cells loaded from Neo4j, queryable by categorical filters"""
+
+    DIMENSIONS = ("start_year", "funding_body", "grant_type", "broad_research_area", "institution")
+
+    # Filters matched like _build_filter_clause does: case-insensitive substring
+    PARTIAL_MATCH_DIMENSIONS = ("funding_body", "grant_type", "broad_research_area")
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        import pandas as pd
+
+        self.cells = pd.DataFrame.from_records(
+            records,
+            columns=list(self.DIMENSIONS) + ["grant_count", "total_funding", "sketch_keys", "sketch_counts"]
+        )
+        for dim in self.DIMENSIONS[1:]:
+            self.cells[dim] = self.cells[dim].astype("category")
+
+        # Sketches exploded to one row per (cell, bucket) so merges are a groupby
+        sketch = self.cells[["sketch_keys", "sketch_counts"]].explode(["sketch_keys", "sketch_counts"])
+        sketch = sketch.dropna()
+        self.sketch = pd.DataFrame({
+            "cell": sketch.index.to_numpy(),
+            "bucket": sketch["sketch_keys"].astype("int64").to_numpy(),
+            "count": sketch["sketch_counts"].astype("int64").to_numpy(),
+        })
+        self.cells = self.cells.drop(columns=["sketch_keys", "sketch_counts"])
+
+    @classmethod
+    def supports(cls, filters: Optional[Dict[str, Any]]) -> bool:
+        """Whether every active filter is a cube dimension"""
+        active = [k for k, v in (filters or {}).items() if v is not None and v != ""]
+        return all(k in cls.DIMENSIONS for k in active)
+
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> Any:
+        """Boolean mask over cells matching the filters"""
+        import numpy as np
+
+        mask = np.ones(len(self.cells), dtype=bool)
+        for key, value in (filters or {}).items():
+            if value is None or value == "":
+                continue
+            column = self.cells[key]
+            if key == "start_year":
+                mask &= (column == int(value)).to_numpy()
+            elif key in self.PARTIAL_MATCH_DIMENSIONS:
+                # Match against the (few) distinct values, then select by category
+                categories = column.cat.categories
+                matched = categories[categories.str.lower().str.contains(str(value).lower(), regex=False)]
+                mask &= column.isin(matched).to_numpy()
+            else:
+                mask &= (column == value).to_numpy()
+        return mask
+
+    @staticmethod
+    def _quantile(buckets: Any, counts: Any, q: float) -> Optional[float]:
+        """
+        Quantile estimate from merged sketch buckets (sorted by bucket).
+        Interpolates between the values at the floor and ceiling ranks, as
+        percentileCont does, so the median of an even count matches the live query.
+        """
+        import numpy as np
+
+        total = counts.sum()
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        lower, upper = np.floor(rank), np.ceil(rank)
+        indexes = np.searchsorted(np.cumsum(counts), [lower, upper], side="right")
+        values = 2 * SKETCH_GAMMA ** buckets[np.minimum(indexes, len(buckets) - 1)] / (SKETCH_GAMMA + 1)
+        return float(values[0] + (rank - lower) * (values[1] - values[0]))
+
+    def funding_trends(self, start_year: int, end_year: int,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Same rows as the live funding trends query; median_funding is a sketch estimate"""
+        mask = self._mask(filters)
+        years = self.cells["start_year"]
+        mask &= (years >= start_year).to_numpy() & (years <= end_year).to_numpy()
+        cells = self.cells[mask]
+        if cells.empty:
+            return []
+
+        grouped = cells.groupby("start_year", observed=True).agg(
+            grant_count=("grant_count", "sum"), total_funding=("total_funding", "sum")
+        ).sort_index()
+
+        sketch = self.sketch[self.sketch["cell"].isin(cells.index)]
+        sketch = sketch.assign(year=self.cells["start_year"].to_numpy()[sketch["cell"].to_numpy()])
+        merged = sketch.groupby(["year", "bucket"], observed=True)["count"].sum()
+
+        trends = []
+        for year, row in grouped.iterrows():
+            year_buckets = merged.loc[year] if year in merged.index.get_level_values(0) else None
+            median = None
+            if year_buckets is not None:
+                median = self._quantile(year_buckets.index.to_numpy(), year_buckets.to_numpy(), 0.5)
+            grant_count = int(row["grant_count"])
+            total_funding = float(row["total_funding"])
+            trends.append({
+                "year": int(year),
+                "grant_count": grant_count,
+                "total_funding": total_funding,
+                "avg_funding": total_funding / grant_count if grant_count else None,
+                "median_funding": median,
+            })
+        return trends
+
+    def top_institutions(self, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Same rows as the live top institutions query"""
+        cells = self.cells[self._mask(filters)]
+        cells = cells[cells["institution"].notna()]
+        if cells.empty:
+            return []
+
+        grouped = cells.groupby("institution", observed=True).agg(
+            grant_count=("grant_count", "sum"), total_funding=("total_funding", "sum")
+        )
+        grouped = grouped.sort_values("total_funding", ascending=False).head(limit)
+        return [
+            {"institution": name, "grant_count": int(row["grant_count"]), "total_funding": float(row["total_funding"])}
+            for name, row in grouped.iterrows()
+        ]
@@ -0,0 +1,546 @@
+"""
+Cypher statement statistics (in the spirit of pg_stat_statements) and a slow-query log.
+
+Handlers wrap their driver in TrackedDriver / AsyncTrackedDriver, so every
+session.run and tx.run (execute_cypher, the analytics queries, managed write
+transactions of the bulk loader) is recorded without touching the call sites.
+
+Statements are grouped by fingerprint: the query text with comments removed,
+string and number literals replaced by ?, and whitespace collapsed, so
+f-string built queries that differ only in a LIMIT or an inlined value share
+one entry. Per fingerprint: calls, errors, rows, total/mean/min/max/p95
+duration and the server's result_available_after / result_consumed_after.
+
+Duration is client wall time from run() until the result is consumed (or its
+session closes), so a streamed result includes the time its consumer spent
+between records; the server figures do not.
+
+Statements slower than CYPHER_SLOW_MS go to a bounded ring buffer along with
+their parameters, redacted to type (and length): values are never kept.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest query text kept per statement / slow-log entry
+MAX_QUERY_CHARS = 2000
+
+_TOKENS = re.compile(r"""
+      (?P<ident>`(?:[^`]|``)*`)                   # quoted identifier: kept
+    | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<number>(?<![\w$])\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)
+""", re.VERBOSE | re.DOTALL)
+_LIST = re.compile(r"\[\s*\?(?:\s*,\s*\?)*\s*\]")
+_SPACE = re.compile(r"\s+")
+
+
+def _strip_literal(match: re.Match) -> str:
+    if match.group("ident"):
+        return match.group("ident")
+    if match.group("comment"):
+        return " "
+    return "?"
+
+
+def normalize(query: str) -> str:
+    """Query text with literals replaced by ?, literal lists collapsed to [?] and whitespace collapsed"""
+    text = _TOKENS.sub(_strip_literal, query)
+    text = _LIST.sub("[?]", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def fingerprint(query: str) -> str:
+    """Stable id of a query's normalized text"""
+    return hashlib.md5(normalize(query).encode()).hexdigest()[:16]
+
+
+def redact(parameters: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Parameter names with their value type (and length for strings and collections), never the value"""
+    redacted = {}
+    for name, value in (parameters or {}).items():
+        kind = type(value).__name__
+        if isinstance(value, (str, bytes, list, tuple, dict, set)):
+            kind = f"{kind}[{len(value)}]"
+        redacted[name] = kind
+    return redacted
+
+
+class _Statement:
+    """Running totals for one fingerprint"""
+
+    __slots__ = ("query", "calls", "errors", "rows", "total_ms", "min_ms", "max_ms",
+                 "available_ms", "consumed_ms", "server_calls", "recent", "last_seen")
+
+    def __init__(self, query: str, window: int):
+        self.query = query
+        self.calls = self.errors = self.rows = self.server_calls = 0
+        self.total_ms = self.available_ms = self.consumed_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=window)
+        self.last_seen = 0.0
+
+
+class StatementStats:
+    """Per-fingerprint statement statistics plus the slow-query ring buffer"""
+
+    def __init__(self, slow_ms: float = 500.0, slow_log_size: int = 100,
+                 max_statements: int = 1000, window: int = 200):
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self.window = window
+        self._statements: Dict[str, _Statement] = {}
+        self._slow = deque(maxlen=max(1, slow_log_size))
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.since = time.time()
+
+    def record(self, query: str, parameters: Optional[Dict[str, Any]], database: Optional[str],
+               duration_ms: float, rows: int, summary: Any = None, error: Optional[BaseException] = None):
+        """Add one execution (summary: the driver's ResultSummary, if it could be read)"""
+        text = normalize(query)
+        key = hashlib.md5(text.encode()).hexdigest()[:16]
+        text = text[:MAX_QUERY_CHARS]
+        available = getattr(summary, "result_available_after", None)
+        consumed = getattr(summary, "result_consumed_after", None)
+
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is None:
+                if len(self._statements) >= self.max_statements:
+                    # As pg_stat_statements does: make room by dropping the least executed
+                    victim = min(self._statements, key=lambda k: (self._statements[k].calls, self._statements[k].last_seen))
+                    del self._statements[victim]
+                    self.evicted += 1
+                statement = self._statements[key] = _Statement(text, self.window)
+            statement.calls += 1
+            statement.errors += int(error is not None)
+            statement.rows += rows
+            statement.total_ms += duration_ms
+            statement.min_ms = duration_ms if statement.min_ms is None else min(statement.min_ms, duration_ms)
+            statement.max_ms = max(statement.max_ms, duration_ms)
+            statement.recent.append(duration_ms)
+            statement.last_seen = time.time()
+            if available is not None and consumed is not None:
+                statement.server_calls += 1
+                statement.available_ms += available
+                statement.consumed_ms += consumed
+
+            if duration_ms >= self.slow_ms:
+                self._slow.append({
+                    "at": statement.last_seen,
+                    "id": key,
+                    "query": text,
+                    "parameters": redact(parameters),
+                    "database": database,
+                    "duration_ms": round(duration_ms, 3),
+                    "rows": rows,
+                    "result_available_after_ms": available,
+                    "result_consumed_after_ms": consumed,
+                    "error": type(error).__name__ if error is not None else None,
+                })
+
+        if duration_ms >= self.slow_ms:
+            logger.warning(f"Slow Cypher ({duration_ms:.0f} ms, {rows} rows, id {key}): {text[:200]}")
+
+    @staticmethod
+    def _row(key: str, statement: _Statement, total_ms: float) -> Dict[str, Any]:
+        recent = sorted(statement.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else None
+        server = statement.server_calls
+        return {
+            "id": key,
+            "query": statement.query,
+            "calls": statement.calls,
+            "errors": statement.errors,
+            "rows": statement.rows,
+            "total_ms": round(statement.total_ms, 3),
+            "mean_ms": round(statement.total_ms / statement.calls, 3),
+            "min_ms": round(statement.min_ms or 0.0, 3),
+            "max_ms": round(statement.max_ms, 3),
+            "p95_ms": round(p95, 3) if p95 is not None else None,
+            "pct_time": round(100 * statement.total_ms / total_ms, 2) if total_ms else None,
+            "mean_available_after_ms": round(statement.available_ms / server, 3) if server else None,
+            "mean_consumed_after_ms": round(statement.consumed_ms / server, 3) if server else None,
+            "last_seen": statement.last_seen,
+        }
+
+    SORT_FIELDS = ("total_ms", "mean_ms", "p95_ms", "max_ms", "calls", "rows", "errors")
+
+    def statements(self, sort_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Statement rows, largest sort_by first (p95 over each statement's recent window)"""
+        with self._lock:
+            total_ms = sum(statement.total_ms for statement in self._statements.values())
+            rows = [self._row(key, statement, total_ms) for key, statement in self._statements.items()]
+        rows.sort(key=lambda row: row[sort_by] or 0, reverse=True)
+        return rows[:limit] if limit else rows
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Slow-log entries, newest first"""
+        with self._lock:
+            entries = list(reversed(self._slow))
+        return entries[:limit] if limit else entries
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "since": self.since,
+                "statements": len(self._statements),
+                "max_statements": self.max_statements,
+                "evicted": self.evicted,
+                "calls": sum(statement.calls for statement in self._statements.values()),
+                "total_ms": round(sum(statement.total_ms for statement in self._statements.values()), 3),
+                "slow_ms": self.slow_ms,
+                "slow_logged": len(self._slow),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self.evicted = 0
+            self.since = time.time()
+
+
+statement_stats = StatementStats(
+    slow_ms=settings["cypher"]["slow_ms"],
+    slow_log_size=settings["cypher"]["slow_log_size"],
+    max_statements=settings["cypher"]["stats_max_statements"],
+)
+
+
+# --- driver proxies ---
+
+
+def _run_arguments(query: Any, parameters: Optional[Dict[str, Any]], kwargs: Dict[str, Any]):
+    """Query text and merged parameters of a run(query, parameters, **kwparameters) call"""
+    text = getattr(query, "text", query)
+    merged = {**(parameters or {}), **kwargs}
+    return str(text), merged
+
+
+class _Tracked:
+    """Delegates every attribute it does not override to the wrapped driver object"""
+
+    def __init__(self, wrapped: Any):
+        self._wrapped = wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._wrapped, name)
+
+
+class TrackedResult(_Tracked):
+    """Counts the rows read from a Result and records it once it is consumed"""
+
+    def __init__(self, result: Any, owner: "TrackedSession", query: str, parameters: Dict[str, Any], started: float):
+        super().__init__(result)
+        self._owner = owner
+        self._query = query
+        self._parameters = parameters
+        self._started = started
+        self._rows = 0
+        self._done = False
+
+    def _record(self, error: Optional[BaseException], summary: Any):
+        if self._done:
+            return
+        self._done = True
+        self._owner._pending.discard(self)
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        statement_stats.record(self._query, self._parameters, self._owner._database, duration_ms, self._rows, summary, error)
+
+    def _finish(self, error: Optional[BaseException] = None, summary: Any = None):
+        """Record the execution, reading the summary (which discards unread records) if not given"""
+        if summary is None and error is None and not self._done:
+            try:
+                summary = self._wrapped.consume()
+            except Exception:
+                # e.g. the transaction was already rolled back: recorded without server times
+                pass
+        self._record(error, summary)
+
+    def __iter__(self):
+        try:
+            for record in self._wrapped:
+                self._rows += 1
+                yield record
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        self._finish()
+
+    def _read(self, method: str, *args, **kwargs):
+        try:
+            value = getattr(self._wrapped, method)(*args, **kwargs)
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        return value
+
+    def single(self, *args, **kwargs):
+        record = self._read("single", *args, **kwargs)
+        self._rows += int(record is not None)
+        self._finish()
+        return record
+
+    def data(self, *args, **kwargs):
+        data = self._read("data", *args, **kwargs)
+        self._rows += len(data)
+        self._finish()
+        return data
+
+    def values(self, *args, **kwargs):
+        values = self._read("values", *args, **kwargs)
+        self._rows += len(values)
+        self._finish()
+        return values
+
+    def value(self, *args, **kwargs):
+        values = self._read("value", *args, **kwargs)
+        self._rows += len(values)
+        self._finish()
+        return values
+
+    def fetch(self, n: int):
+        records = self._read("fetch", n)
+        self._rows += len(records)
+        return records
+
+    def consume(self):
+        summary = self._read("consume")
+        self._finish(summary=summary)
+        return summary
+
+
+class TrackedTransaction(_Tracked):
+    """Transaction whose run() results are tracked by the owning session"""
+
+    def __init__(self, tx: Any, owner: "TrackedSession"):
+        super().__init__(tx)
+        self._owner = owner
+
+    def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        return self._owner._track(self._wrapped.run, query, parameters, kwargs)
+
+    def __enter__(self):
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapped.__exit__(*exc_info)
+
+
+class TrackedSession(_Tracked):
+    """Session whose results (auto-commit, explicit and managed transactions) are tracked"""
+
+    def __init__(self, session: Any, database: Optional[str]):
+        super().__init__(session)
+        self._database = database
+        self._pending = set()
+
+    def _track(self, run, query: Any, parameters: Optional[Dict[str, Any]], kwargs: Dict[str, Any]):
+        text, merged = _run_arguments(query, parameters, kwargs)
+        started = time.perf_counter()
+        try:
+            result = run(query, parameters, **kwargs)
+        except Exception as e:
+            statement_stats.record(text, merged, self._database, (time.perf_counter() - started) * 1000, 0, error=e)
+            raise
+        tracked = TrackedResult(result, self, text, merged, started)
+        self._pending.add(tracked)
+        return tracked
+
+    def _finish_pending(self):
+        """Record results nobody consumed (e.g. a write run without .consume()) before the session closes"""
+        for result in list(self._pending):
+            result._finish()
+
+    def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        return self._track(self._wrapped.run, query, parameters, kwargs)
+
+    def begin_transaction(self, *args, **kwargs):
+        return TrackedTransaction(self._wrapped.begin_transaction(*args, **kwargs), self)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._wrapped.execute_read(lambda tx, *a, **k: work(TrackedTransaction(tx, self), *a, **k), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._wrapped.execute_write(lambda tx, *a, **k: work(TrackedTransaction(tx, self), *a, **k), *args, **kwargs)
+
+    def close(self):
+        self._finish_pending()
+        self._wrapped.close()
+
+    def __enter__(self):
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._finish_pending()
+        return self._wrapped.__exit__(*exc_info)
+
+
+class TrackedDriver(_Tracked):
+    """Driver whose sessions record statement statistics; wrapping twice is a no-op"""
+
+    @classmethod
+    def wrap(cls, driver: Any) -> Any:
+        return driver if isinstance(driver, _Tracked) else cls(driver)
+
+    def session(self, *args, **kwargs):
+        return TrackedSession(self._wrapped.session(*args, **kwargs), kwargs.get("database"))
+
+
+# --- async counterparts ---
+
+
+class AsyncTrackedResult(TrackedResult):
+    """TrackedResult for AsyncResult: the reading methods are coroutines"""
+
+    def _finish(self, error: Optional[BaseException] = None, summary: Any = None):
+        # The summary cannot be awaited here; _finish_async reads it
+        self._record(error, summary)
+
+    async def _finish_async(self):
+        summary = None
+        if not self._done:
+            try:
+                summary = await self._wrapped.consume()
+            except Exception:
+                pass
+        self._record(None, summary)
+
+    async def __aiter__(self):
+        try:
+            async for record in self._wrapped:
+                self._rows += 1
+                yield record
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        await self._finish_async()
+
+    async def _read(self, method: str, *args, **kwargs):
+        try:
+            value = await getattr(self._wrapped, method)(*args, **kwargs)
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        return value
+
+    async def single(self, *args, **kwargs):
+        record = await self._read("single", *args, **kwargs)
+        self._rows += int(record is not None)
+        await self._finish_async()
+        return record
+
+    async def data(self, *args, **kwargs):
+        data = await self._read("data", *args, **kwargs)
+        self._rows += len(data)
+        await self._finish_async()
+        return data
+
+    async def values(self, *args, **kwargs):
+        values = await self._read("values", *args, **kwargs)
+        self._rows += len(values)
+        await self._finish_async()
+        return values
+
+    async def value(self, *args, **kwargs):
+        values = await self._read("value", *args, **kwargs)
+        self._rows += len(values)
+        await self._finish_async()
+        return values
+
+    async def fetch(self, n: int):
+        records = await self._read("fetch", n)
+        self._rows += len(records)
+        return records
+
+    async def consume(self):
+        summary = await self._read("consume")
+        self._finish(summary=summary)
+        return summary
+
+
+class AsyncTrackedTransaction(_Tracked):
+    """AsyncTransaction whose run() results are tracked by the owning session"""
+
+    def __init__(self, tx: Any, owner: "AsyncTrackedSession"):
+        super().__init__(tx)
+        self._owner = owner
+
+    async def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        return await self._owner._track(self._wrapped.run, query, parameters, kwargs)
+
+    async def __aenter__(self):
+        await self._wrapped.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._wrapped.__aexit__(*exc_info)
+
+
+class AsyncTrackedSession(_Tracked):
+    """AsyncSession counterpart of TrackedSession"""
+
+    def __init__(self, session: Any, database: Optional[str]):
+        super().__init__(session)
+        self._database = database
+        self._pending = set()
+
+    async def _track(self, run, query: Any, parameters: Optional[Dict[str, Any]], kwargs: Dict[str, Any]):
+        text, merged = _run_arguments(query, parameters, kwargs)
+        started = time.perf_counter()
+        try:
+            result = await run(query, parameters, **kwargs)
+        except Exception as e:
+            statement_stats.record(text, merged, self._database, (time.perf_counter() - started) * 1000, 0, error=e)
+            raise
+        tracked = AsyncTrackedResult(result, self, text, merged, started)
+        self._pending.add(tracked)
+        return tracked
+
+    async def _finish_pending(self):
+        for result in list(self._pending):
+            await result._finish_async()
+
+    async def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        return await self._track(self._wrapped.run, query, parameters, kwargs)
+
+    async def begin_transaction(self, *args, **kwargs):
+        return AsyncTrackedTransaction(await self._wrapped.begin_transaction(*args, **kwargs), self)
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await self._wrapped.execute_read(lambda tx, *a, **k: work(AsyncTrackedTransaction(tx, self), *a, **k), *args, **kwargs)
+
+    async def execute_write(self, work, *args, **kwargs):
+        return await self._wrapped.execute_write(lambda tx, *a, **k: work(AsyncTrackedTransaction(tx, self), *a, **k), *args, **kwargs)
+
+    async def close(self):
+        await self._finish_pending()
+        await self._wrapped.close()
+
+    async def __aenter__(self):
+        await self._wrapped.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._finish_pending()
+        return await self._wrapped.__aexit__(*exc_info)
+
+
+class AsyncTrackedDriver(TrackedDriver):
+    """AsyncDriver whose sessions record statement statistics"""
+
+    def session(self, *args, **kwargs):
+        return AsyncTrackedSession(self._wrapped.session(*args, **kwargs), kwargs.get("database"))
@@ -19,6 +19,10 @@ def migrate():
         database=settings["neo4j"]["database"]
     )
     
+    # Write into the generation readers see (see Neo4jQueryBuilder.GENERATION_LABELS)
+    h.ensure_generations()
+    generation = h.write_generation()
+
     print("Migrating nodes with correct properties...")
     batch_size = 2000
     for i in range(0, len(df), batch_size):
@@ -36,7 +40,7 @@ def migrate():
                 
         query = """
         UNWIND $batch as row
-        MERGE (g:Grant {application_id: row.Application_ID})
+        MERGE (g:Grant {application_id: row.Application_ID, generation: $generation})
         SET g.title = row.Grant_Title,
             g.grant_status = row.Grant_Status,
             g.amount = row.Amount,
@@ -46,17 +50,22 @@ def migrate():
             g.broad_research_area = row.Broad_Research_Area,
             g.field_of_research = row.Field_of_Research
         """
-        h.execute_cypher(query, {"batch": batch})
+        h.execute_cypher(query, {"batch": batch, "generation": generation})
         if i % 10000 == 0:
             print(f"Processed {i} grants...")
 
     print("Ensuring ResearchArea nodes exist...")
     h.execute_cypher("""
     MATCH (g:Grant) 
-    WHERE g.broad_research_area IS NOT NULL AND g.broad_research_area <> ''
-    MERGE (a:ResearchArea {name: g.broad_research_area})
+    WHERE g.generation = $generation AND g.broad_research_area IS NOT NULL AND g.broad_research_area <> ''
+    MERGE (a:ResearchArea {name: g.broad_research_area, generation: $generation})
     MERGE (g)-[:IN_AREA]->(a)
-    """)
+    """, {"generation": generation})
+    
+    # Invalidate cached API analytics
+    h.bump_data_version()
+    h.refresh_institution_summaries()
+    h.refresh_facet_dictionary()
     
     print("DONE! Database is now in sync.")
 
@@ -99,19 +99,20 @@ export const Analytics = () => {
         }
       }
 
-      const [statsRes, fundingRes, trendsRes, grantsRes] = await Promise.all([
-        analyticsService.getStats(activeFilters),
-        analyticsService.getTopInstitutions(5, activeFilters),
-        analyticsService.getTrends(minYear, maxYear, activeFilters),
-        analyticsService.getGrants(pageSize, 0, activeFilters, debouncedSearch, sortConfig.key, sortConfig.direction)
-      ]);
+      // One round trip for all panels (the map loads separately when shown)
+      const dashboardRes = await analyticsService.getDashboard(
+        ["stats", "institutions", "trends", "grants"],
+        minYear, maxYear, 5, pageSize, 0,
+        activeFilters, sortConfig.key, sortConfig.direction
+      );
+      const dashboard = dashboardRes.data;
       
-      const newFundingData = fundingRes.data.map((item: any) => ({
+      const newFundingData = dashboard.institutions.map((item: any) => ({
         name: item.institution,
         funding: item.total_funding / 1e6 // Convert to millions for better display
       }));
 
-      const newTrends = trendsRes.data.map((item: any) => ({
+      const newTrends = dashboard.trends.map((item: any) => ({
         year: item.year,
         projects: item.grant_count,
         funding: item.total_funding / 1e6, // Convert to millions
@@ -120,10 +121,10 @@ export const Analytics = () => {
       }));
 
       updateState({
-          stats: statsRes.data,
+          stats: dashboard.stats,
           fundingData: newFundingData,
           trendsData: newTrends,
-          grants: grantsRes.data,
+          grants: dashboard.grants,
           isLoaded: true
       });
 
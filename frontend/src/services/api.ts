@@ -19,9 +19,12 @@ export const analyticsService = {
   getTrends: (startYear: number = 2000, endYear: number = 2024, filters: any = {}) =>
     api.get(`/analytics/trends`, { params: { start_year_min: startYear, start_year_max: endYear, ...filters } }),
   getFilters: () => api.get('/analytics/filters'),
+  getFacets: (filters: any = {}) => api.get('/analytics/facets', { params: filters }),
   getGrants: (limit: number = 50, skip: number = 0, filters: any = {}, search: string = "", sortBy: string = "start_year", order: string = "DESC") =>
     api.get('/analytics/grants', { params: { limit, skip, search, sort_by: sortBy, order, ...filters } }),
   getMapData: (filters: any = {}) => api.get('/analytics/map', { params: filters }),
+  getDashboard: (panels: string[], startYear: number, endYear: number, institutionsLimit: number, limit: number, skip: number, filters: any = {}, sortBy: string = "start_year", order: string = "DESC") =>
+    api.get('/analytics/dashboard', { params: { panels: panels.join(','), start_year_min: startYear, start_year_max: endYear, institutions_limit: institutionsLimit, limit, skip, sort_by: sortBy, order, ...filters } }),
 };
 
 export const collaborationService = {
@@ -0,0 +1,98 @@
+"""
+Concurrency benchmark for the /api/analytics endpoints.
+
+Fires the same request mix at 1, 10 and 50 concurrent clients and reports
+throughput and latency percentiles, e.g. to compare the async Neo4j data
+layer against the previous blocking one.
+
+    python scripts/benchmark_analytics_concurrency.py --base-url http://localhost:8000 --cold
+
+With --cold every request gets distinct query parameters (limit / year range)
+so the analytics disk cache cannot answer it and each call reaches Neo4j.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ENDPOINTS = ["stats", "institutions", "trends", "grants"]
+# Endpoints whose parameters can vary per request without changing the work done
+COLD_ENDPOINTS = ["institutions", "trends", "grants"]
+
+
+def build_request(base_url: str, endpoint: str, i: int, cold: bool):
+    """URL and query parameters for the i-th request of the mix"""
+    params = {}
+    if cold:
+        if endpoint == "institutions":
+            params["limit"] = 10 + i
+        elif endpoint == "trends":
+            params["start_year_max"] = 2030 + i
+        elif endpoint == "grants":
+            params["limit"] = 50 + i
+    return f"{base_url}/api/analytics/{endpoint}", params
+
+
+def run_level(base_url: str, concurrency: int, requests_per_client: int, cold: bool, offset: int):
+    """Run one concurrency level; returns (latencies_ms, errors, wall_seconds)"""
+    endpoints = COLD_ENDPOINTS if cold else ENDPOINTS
+    total = concurrency * requests_per_client
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def call(i):
+        url, params = build_request(base_url, endpoints[i % len(endpoints)], offset + i, cold)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=120)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = [ms for ms, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    return latencies, errors, wall
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics API concurrency benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--levels", default="1,10,50", help="Comma-separated client counts")
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--cold", action="store_true", help="Vary parameters so the cache never answers")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+
+    offset = 0
+    for concurrency in levels:
+        latencies, errors, wall = run_level(args.base_url, concurrency, args.requests_per_client, args.cold, offset)
+        offset += concurrency * args.requests_per_client
+        total = len(latencies) + errors
+        throughput = len(latencies) / wall if wall else 0.0
+        mean = statistics.mean(latencies) if latencies else 0.0
+        print(f"{concurrency:>8} {total:>9} {errors:>7} {throughput:>9.1f} "
+              f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} {mean:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 from neo4j import GraphDatabase
 import os
+import sys
 from dotenv import load_dotenv
 
+# Ensure backend directory is in path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
 # Load environment variables
 load_dotenv()
 
@@ -25,6 +29,15 @@ def create_indexes():
         "CREATE INDEX grant_status IF NOT EXISTS FOR (g:Grant) ON (g.grant_status)",
         "CREATE INDEX grant_title IF NOT EXISTS FOR (g:Grant) ON (g.title)",
         
+        # Denormalized PI / institution sort keys (maintained by the loader)
+        "CREATE INDEX grant_pi_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.pi_name_sort)",
+        "CREATE INDEX grant_institution_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.institution_name_sort)",
+        
+        # Keyset pagination: sort key + application_id tie-breaker
+        "CREATE INDEX grant_start_year_id IF NOT EXISTS FOR (g:Grant) ON (g.start_year, g.application_id)",
+        "CREATE INDEX grant_amount_id IF NOT EXISTS FOR (g:Grant) ON (g.amount, g.application_id)",
+        "CREATE INDEX grant_title_id IF NOT EXISTS FOR (g:Grant) ON (g.title, g.application_id)",
+        
         # Institution indexes
         "CREATE INDEX institution_name IF NOT EXISTS FOR (i:Institution) ON (i.name)",
         
@@ -34,8 +47,18 @@ def create_indexes():
         # ResearchArea indexes
         "CREATE INDEX research_area_name IF NOT EXISTS FOR (a:ResearchArea) ON (a.name)",
         
-        # Fulltext search indexes (optional, for text search performance)
-        # "CREATE FULLTEXT INDEX grant_fulltext IF NOT EXISTS FOR (g:Grant) ON EACH [g.title, g.description]"
+        # Singleton data version stamp read on every analytics request
+        "CREATE CONSTRAINT data_version_key IF NOT EXISTS FOR (v:DataVersion) REQUIRE v.key IS UNIQUE",
+        
+        # Funding rollup cube cells (incremental refresh looks cells up by key)
+        "CREATE INDEX grant_rollup_key IF NOT EXISTS FOR (g:Grant) ON (g.rollup_key)",
+        "CREATE INDEX funding_rollup_key IF NOT EXISTS FOR (c:FundingRollup) ON (c.key)",
+        
+        # Fulltext search index (used when SEARCH_MODE=fulltext).
+        # researcher_names / institution_name are denormalized onto Grant by the loader.
+        "CREATE FULLTEXT INDEX grant_fulltext IF NOT EXISTS FOR (g:Grant) ON EACH "
+        "[g.title, g.description, g.field_of_research, g.broad_research_area, g.grant_type, "
+        "g.funding_body, g.application_id, g.researcher_names, g.institution_name]"
     ]
 
     print(f"Connecting to {URI}...")
@@ -50,5 +73,24 @@ def create_indexes():
     finally:
         driver.close()
 
+def backfill_denormalized_properties():
+    """
+    Populate the Grant properties copied from relationships (researcher_names,
+    institution_name, pi_name_sort, institution_name_sort) on graphs loaded
+    before the loader maintained them. Grid sorting and fulltext search rely on them.
+    """
+    from app.utils.neo4j_handler import Neo4jHandler
+
+    handler = Neo4jHandler(uri=URI, user=USER, password=PASSWORD, database=DATABASE)
+    try:
+        print("Backfilling denormalized Grant properties...")
+        handler.refresh_denormalized_properties()
+        print("Backfill complete.")
+    except Exception as e:
+        print(f"Error backfilling denormalized properties: {e}")
+    finally:
+        handler.close()
+
 if __name__ == "__main__":
     create_indexes()
+    backfill_denormalized_properties()
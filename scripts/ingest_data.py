@@ -9,6 +9,7 @@ import logging
 from typing import Dict, Any, Optional
 import sys
 import os
+import math
 import toml
 from dotenv import load_dotenv
 
@@ -32,16 +33,25 @@ class DataIngestion:
         """Clear all nodes and relationships (use with caution!)"""
         with self.driver.session(database=self.database) as session:
             logger.info("Clearing database...")
-            session.run("MATCH (n) DETACH DELETE n")  # type: ignore
+            session.run("MATCH (n) WHERE NOT n:DataVersion DETACH DELETE n")  # type: ignore
             logger.info("Database cleared")
+        self.stamp_data_version()
     
     def create_constraints(self):
-        """Create uniqueness constraints"""
+        """
+        Create uniqueness constraints. Keys are unique per load generation, as
+        in GrantBulkLoader.CONSTRAINTS, so the API's blue/green reloads can
+        stage a second copy of the graph.
+        """
         constraints = [
-            "CREATE CONSTRAINT grant_id IF NOT EXISTS FOR (g:Grant) REQUIRE g.application_id IS UNIQUE",
-            "CREATE CONSTRAINT researcher_name IF NOT EXISTS FOR (r:Researcher) REQUIRE r.name IS UNIQUE",
-            "CREATE CONSTRAINT institution_name IF NOT EXISTS FOR (i:Institution) REQUIRE i.name IS UNIQUE",
-            "CREATE CONSTRAINT area_name IF NOT EXISTS FOR (a:ResearchArea) REQUIRE a.name IS UNIQUE",
+            "CREATE CONSTRAINT grant_generation_id IF NOT EXISTS FOR (g:Grant) REQUIRE (g.application_id, g.generation) IS UNIQUE",
+            "CREATE CONSTRAINT researcher_generation_name IF NOT EXISTS FOR (r:Researcher) REQUIRE (r.name, r.generation) IS UNIQUE",
+            "CREATE CONSTRAINT institution_generation_name IF NOT EXISTS FOR (i:Institution) REQUIRE (i.name, i.generation) IS UNIQUE",
+            "CREATE CONSTRAINT area_generation_name IF NOT EXISTS FOR (a:ResearchArea) REQUIRE (a.name, a.generation) IS UNIQUE",
+            "CREATE INDEX grant_application_id IF NOT EXISTS FOR (g:Grant) ON (g.application_id)",
+            "CREATE INDEX researcher_name_lookup IF NOT EXISTS FOR (r:Researcher) ON (r.name)",
+            "CREATE INDEX institution_name_lookup IF NOT EXISTS FOR (i:Institution) ON (i.name)",
+            "CREATE CONSTRAINT data_version_key IF NOT EXISTS FOR (v:DataVersion) REQUIRE v.key IS UNIQUE",
         ]
         
         with self.driver.session(database=self.database) as session:
@@ -59,7 +69,11 @@ class DataIngestion:
             "CREATE INDEX grant_amount IF NOT EXISTS FOR (g:Grant) ON (g.amount)",
             "CREATE INDEX grant_year IF NOT EXISTS FOR (g:Grant) ON (g.start_year)",
             "CREATE INDEX grant_status IF NOT EXISTS FOR (g:Grant) ON (g.grant_status)",
+            "CREATE INDEX grant_pi_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.pi_name_sort)",
+            "CREATE INDEX grant_institution_name_sort IF NOT EXISTS FOR (g:Grant) ON (g.institution_name_sort)",
             "CREATE INDEX researcher_orcid IF NOT EXISTS FOR (r:Researcher) ON (r.orcid_id)",
+            "CREATE INDEX grant_rollup_key IF NOT EXISTS FOR (g:Grant) ON (g.rollup_key)",
+            "CREATE INDEX funding_rollup_key IF NOT EXISTS FOR (c:FundingRollup) ON (c.key)",
         ]
         
         with self.driver.session(database=self.database) as session:
@@ -207,6 +221,156 @@ class DataIngestion:
         
         logger.info("Data ingestion complete!")
     
+    def denormalize_grant_fields(self):
+        """
+        Copy researcher and institution names onto Grant nodes, for the
+        full-text index (researcher_names, institution_name) and grid sorting
+        (pi_name_sort, institution_name_sort)
+        """
+        cypher = """
+        MATCH (g:Grant)
+        CALL {
+            WITH g
+            OPTIONAL MATCH (g)<-[rel:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
+            WITH g, collect(DISTINCT r.name) AS researchers,
+                 min(CASE WHEN type(rel) = 'PRINCIPAL_INVESTIGATOR' THEN r.name END) AS pi_name
+            OPTIONAL MATCH (g)-[:HOSTED_BY]->(i:Institution)
+            WITH g, researchers, pi_name, min(i.name) AS institution
+            SET g.researcher_names = reduce(s = '', n IN researchers | s + CASE WHEN s = '' THEN '' ELSE '; ' END + n),
+                g.institution_name = institution,
+                g.pi_name_sort = pi_name,
+                g.institution_name_sort = institution
+        } IN TRANSACTIONS OF 5000 ROWS
+        """
+        
+        with self.driver.session(database=self.database) as session:
+            session.run(cypher)  # type: ignore
+            logger.info("Denormalized researcher/institution names onto grants")
+    
+    def stamp_data_version(self, rollup_current: bool = False):
+        """
+        Bump the :DataVersion stamp the API uses to invalidate cached analytics.
+        Same query as Neo4jHandler.bump_data_version. On a graph the API has
+        loaded, nodes written here first join its active generation, or its
+        queries would not see them.
+        """
+        labels = ["Grant", "Researcher", "Institution", "ResearchArea", "FundingBody", "FundingRollup"]
+        cypher = f"""
+        MERGE (v:DataVersion {{key: 'graph'}})
+        SET v.version = CASE WHEN timestamp() > coalesce(v.version, 0) THEN timestamp() ELSE v.version + 1 END,
+            v.updated_at = datetime()
+        {'SET v.rollup_version = v.version' if rollup_current else ''}
+        RETURN v.version AS version
+        """
+        
+        with self.driver.session(database=self.database) as session:
+            active = session.run("OPTIONAL MATCH (v:DataVersion {key: 'graph'}) RETURN v.generation AS generation").single()  # type: ignore
+            if active and active["generation"] is not None:
+                for label in labels:
+                    session.run(f"""
+                        MATCH (n:{label}) WHERE n.generation IS NULL
+                        CALL {{ WITH n SET n.generation = $generation }} IN TRANSACTIONS OF 10000 ROWS
+                    """, generation=active["generation"])  # type: ignore
+            record = session.run(cypher).single()  # type: ignore
+            logger.info(f"Data version stamped: {record['version'] if record else None}")
+    
+    def build_funding_rollup(self):
+        """
+        Rebuild the (:FundingRollup) cube the analytics API answers categorical
+        trends / top institution requests from, and stamp it as current.
+        Same queries as Neo4jHandler.refresh_funding_rollup (full rebuild).
+        """
+        log_gamma = math.log((1 + 0.01) / (1 - 0.01))  # 1% quantile sketch accuracy
+        key_cypher = """
+        MATCH (g:Grant)
+        CALL {
+            WITH g
+            SET g.rollup_key = toString(coalesce(g.start_year, '')) + '|' + coalesce(g.funding_body, '') + '|' +
+                               coalesce(g.grant_type, '') + '|' + coalesce(g.broad_research_area, '') + '|' +
+                               coalesce(g.institution_name, '')
+        } IN TRANSACTIONS OF 10000 ROWS
+        """
+        build_cypher = """
+        MATCH (g:Grant)
+        WHERE g.amount IS NOT NULL AND g.amount > 0
+        WITH g.rollup_key AS key, g.start_year AS start_year, g.funding_body AS funding_body,
+             g.grant_type AS grant_type, g.broad_research_area AS broad_research_area,
+             g.institution_name AS institution,
+             toInteger(ceil(log(g.amount) / $log_gamma)) AS bucket,
+             count(*) AS n, sum(g.amount) AS total
+        ORDER BY bucket
+        WITH key, start_year, funding_body, grant_type, broad_research_area, institution,
+             collect(bucket) AS sketch_keys, collect(n) AS sketch_counts,
+             sum(n) AS grant_count, sum(total) AS total_funding
+        CREATE (:FundingRollup {key: key, start_year: start_year, funding_body: funding_body,
+                                grant_type: grant_type, broad_research_area: broad_research_area,
+                                institution: institution, grant_count: grant_count,
+                                total_funding: total_funding, sketch_keys: sketch_keys,
+                                sketch_counts: sketch_counts})
+        """
+        
+        with self.driver.session(database=self.database) as session:
+            session.run(key_cypher)  # type: ignore
+            session.run("MATCH (c:FundingRollup) CALL { WITH c DELETE c } IN TRANSACTIONS OF 10000 ROWS")  # type: ignore
+            session.run(build_cypher, log_gamma=log_gamma)  # type: ignore
+            logger.info("Funding rollup cube built")
+        self.stamp_data_version(rollup_current=True)
+    
+    def build_institution_summaries(self):
+        """
+        Precompute the unfiltered /map row of every institution onto its node and
+        stamp them as current. Same queries as Neo4jHandler.refresh_institution_summaries.
+        """
+        summary_cypher = """
+        MATCH (g:Grant) WHERE g.amount IS NOT NULL
+        MATCH (g)-[:HOSTED_BY]->(i:Institution)
+        WITH i, g
+        ORDER BY g.amount DESC
+        WITH i,
+             sum(CASE WHEN g.amount > 0 THEN 1 ELSE 0 END) AS project_count,
+             sum(CASE WHEN g.amount > 0 THEN g.amount ELSE 0 END) AS total_funding,
+             collect(CASE WHEN g.amount > 0 THEN g.funding_body END)[0..50] AS raw_funders,
+             collect(g) AS inst_grants
+        WHERE project_count > 0
+        CALL {
+            WITH inst_grants
+            UNWIND inst_grants AS g
+            MATCH (g)<-[:PRINCIPAL_INVESTIGATOR|INVESTIGATOR]-(r:Researcher)
+            RETURN count(DISTINCT r) AS researcher_count
+        }
+        WITH i, total_funding, project_count, researcher_count, raw_funders
+        WHERE researcher_count > 0
+        SET i.map_total_funding = total_funding,
+            i.map_project_count = project_count,
+            i.map_researcher_count = researcher_count,
+            i.map_top_funders = reduce(top = [], f IN raw_funders |
+                CASE WHEN f IN top OR size(top) >= 3 THEN top ELSE top + f END)
+        """
+        
+        with self.driver.session(database=self.database) as session:
+            session.run("""
+                MATCH (i:Institution) WHERE i.map_project_count IS NOT NULL
+                REMOVE i.map_total_funding, i.map_project_count, i.map_researcher_count, i.map_top_funders
+            """)  # type: ignore
+            session.run(summary_cypher)  # type: ignore
+            session.run("MATCH (v:DataVersion {key: 'graph'}) SET v.summary_version = v.version")  # type: ignore
+            logger.info("Institution map summaries built")
+    
+    def create_fulltext_index(self):
+        """Create the grant full-text index used by SEARCH_MODE=fulltext"""
+        fulltext_cypher = """
+        CREATE FULLTEXT INDEX grant_fulltext IF NOT EXISTS FOR (g:Grant)
+        ON EACH [g.title, g.description, g.field_of_research, g.broad_research_area, g.grant_type,
+                 g.funding_body, g.application_id, g.researcher_names, g.institution_name]
+        """
+        
+        try:
+            with self.driver.session(database=self.database) as session:
+                session.run(fulltext_cypher)  # type: ignore
+                logger.info("Full-text index created")
+        except Exception as e:
+            logger.warning(f"Could not create full-text index: {str(e)}")
+    
     def create_vector_index(self):
         """
         Create vector index for semantic search
@@ -325,9 +489,15 @@ def main():
         # Step 3: Ingest data
         ingestion.ingest_csv(CSV_PATH)
         
-        # Step 4: Create vector index (optional)
+        # Step 4: Denormalize names (search + sort keys) and create search indexes
+        ingestion.denormalize_grant_fields()
+        ingestion.create_fulltext_index()
         ingestion.create_vector_index()
         
+        # Rebuild the analytics rollup cube (also invalidates cached API analytics)
+        ingestion.build_funding_rollup()
+        ingestion.build_institution_summaries()
+        
         # Step 5: Verify
         ingestion.verify_ingestion()
         